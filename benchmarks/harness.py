@@ -0,0 +1,130 @@
+import json
+import platform
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+# Timing + reporting helpers for the hot-path benchmarks.
+# Every stage is measured per item with perf_counter_ns; batch stages report
+# the latency of one call divided by its batch size (amortized per packet).
+
+
+class StageResult:
+    def __init__(self, name: str, latencies_ns: np.ndarray, items: int, wall_s: float, note: str = ""):
+        self.name = name
+        self.items = int(items)
+        self.wall_s = float(wall_s)
+        self.note = note
+        lat_us = np.asarray(latencies_ns, dtype=np.float64) / 1e3
+        self.p50_us, self.p95_us, self.p99_us = (np.percentile(lat_us, [50, 95, 99]) if len(lat_us) else (np.nan,) * 3)
+        self.mean_us = float(lat_us.mean()) if len(lat_us) else np.nan
+
+    @property
+    def throughput(self) -> float:
+        """Packets per second."""
+        return self.items / self.wall_s if self.wall_s > 0 else float("inf")
+
+    def to_dict(self) -> dict:
+        return {
+            "items": self.items,
+            "wall_s": round(self.wall_s, 6),
+            "throughput_pps": round(self.throughput, 2),
+            "mean_us": round(self.mean_us, 3),
+            "p50_us": round(float(self.p50_us), 3),
+            "p95_us": round(float(self.p95_us), 3),
+            "p99_us": round(float(self.p99_us), 3),
+            "note": self.note,
+        }
+
+
+def measure_calls(name: str, fn, items, note: str = "") -> StageResult:
+    """Calls fn(item) for every item, timing each call."""
+    items = list(items)
+    lat = np.empty(len(items), dtype=np.int64)
+    clock = time.perf_counter_ns
+    start = clock()
+    for i, item in enumerate(items):
+        t0 = clock()
+        fn(item)
+        lat[i] = clock() - t0
+    wall = (clock() - start) / 1e9
+    return StageResult(name, lat, len(items), wall, note)
+
+
+def measure_iterator(name: str, make_iter, note: str = "") -> StageResult:
+    """Times the gap between consecutive yields of a generator (per-packet cost of a source)."""
+    lat = []
+    clock = time.perf_counter_ns
+    start = clock()
+    t0 = start
+    for _ in make_iter():
+        t1 = clock()
+        lat.append(t1 - t0)
+        t0 = t1
+    wall = (clock() - start) / 1e9
+    return StageResult(name, np.asarray(lat, dtype=np.int64), len(lat), wall, note)
+
+
+def measure_batches(name: str, fn, batches, note: str = "", size_of=len) -> StageResult:
+    """Calls fn(batch) per batch; per-packet latency = call time / size_of(batch)."""
+    lat = []
+    total = 0
+    clock = time.perf_counter_ns
+    start = clock()
+    for batch in batches:
+        t0 = clock()
+        fn(batch)
+        elapsed = clock() - t0
+        size = size_of(batch)
+        total += size
+        lat.extend([elapsed / max(size, 1)] * size)
+    wall = (clock() - start) / 1e9
+    return StageResult(name, np.asarray(lat, dtype=np.float64), total, wall, note)
+
+
+def write_results(results: list, path: Path, meta: dict) -> dict:
+    payload = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "meta": meta,
+        "stages": {r.name: r.to_dict() for r in results},
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, indent=2))
+    return payload
+
+
+def compare_to_baseline(current: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Returns [(stage, metric, baseline, current, change)] for every stage whose
+    p50/p95 latency grew or throughput dropped by more than `tolerance`.
+    """
+    regressions = []
+    base_stages = baseline.get("stages", {})
+    for name, cur in current.get("stages", {}).items():
+        base = base_stages.get(name)
+        if not base:
+            continue
+        for metric in ("p50_us", "p95_us"):
+            if base[metric] > 0 and cur[metric] > base[metric] * (1.0 + tolerance):
+                regressions.append((name, metric, base[metric], cur[metric], cur[metric] / base[metric] - 1.0))
+        if base["throughput_pps"] > 0 and cur["throughput_pps"] < base["throughput_pps"] * (1.0 - tolerance):
+            regressions.append((name, "throughput_pps", base["throughput_pps"], cur["throughput_pps"],
+                                cur["throughput_pps"] / base["throughput_pps"] - 1.0))
+    return regressions
+
+
+def print_table(results: list, baseline: dict = None):
+    base_stages = (baseline or {}).get("stages", {})
+    header = f"{'STAGE':<42}{'N':>8}{'pkt/s':>13}{'p50 us':>11}{'p95 us':>11}{'p99 us':>11}{'vs base p50':>13}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        delta = ""
+        base = base_stages.get(r.name)
+        if base and base.get("p50_us"):
+            delta = f"{(r.p50_us / base['p50_us'] - 1.0) * 100:+.1f}%"
+        print(f"{r.name:<42}{r.items:>8}{r.throughput:>13,.0f}{r.p50_us:>11.1f}{r.p95_us:>11.1f}{r.p99_us:>11.1f}{delta:>13}")
@@ -0,0 +1,171 @@
+import argparse
+import json
+import logging
+import sys
+import tempfile
+from itertools import chain
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Proje kök dizinini bul
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from config.paths import TRAIN_FILE, TEST_FILE, SETTINGS_FILE
+from src.utils.logger import logger
+from src.simulation.columnar import open_dataset
+from src.simulation.streamer import SensorStreamer
+from src.stats_engine.guard import DataGuard, StatsGuard
+from src.orchestrator.manager import Orchestrator
+from src.utils.event_store import EventStore
+from benchmarks.harness import (measure_calls, measure_iterator, measure_batches, write_results,
+                                compare_to_baseline, print_table)
+from benchmarks.stubs import StubRulModel
+
+# Microbenchmarks for the diagnosis hot path.
+# Usage:
+#   python benchmarks/run_benchmarks.py                 # run + compare with benchmarks/baseline.json
+#   python benchmarks/run_benchmarks.py --save-baseline # store this run as the new baseline
+#   python benchmarks/run_benchmarks.py --fail-on-regression --tolerance 0.25
+# benchmarks/baseline.json is a committed reference run (default options, stub RUL
+# model); re-record it with --save-baseline when the hardware or hot path changes.
+
+BENCH_DIR = Path(__file__).resolve().parent
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+RESULTS_PATH = BENCH_DIR / "results" / "latest.json"
+
+
+def load_packets(source: Path, columns: list, limit: int) -> tuple:
+    """First `limit` rows of a dataset (engine order) as packet dicts + the raw matrix."""
+    dataset = open_dataset(source, columns)
+    values = np.asarray(dataset.values[:limit])
+    frame = pd.DataFrame(values, columns=columns)
+    frame['unit_number'] = frame['unit_number'].astype(int)
+    frame['cycle'] = frame['cycle'].astype(int)
+    return frame.to_dict('records'), values, dataset
+
+
+def run_dataset(tag: str, source: Path, columns: list, args) -> list:
+    packets, values, dataset = load_packets(source, columns, args.packets)
+    units = sorted({p['unit_number'] for p in packets})
+    results = []
+
+    data_guard = DataGuard()
+    stats_guard = StatsGuard(use_ewma=True, ewma_alpha=0.2)
+    # Olaylar gerçek DB_LOG_PATH yerine geçici bir depoya yazılır (yazma maliyeti ölçüme dahil)
+    event_store = EventStore(args.event_dir / f"{tag}.db")
+    orchestrator = Orchestrator(record_events=False)
+    orchestrator.event_store = event_store
+    if args.stub_rul or orchestrator.rul_model is None:
+        orchestrator.rul_model = StubRulModel()
+    rul_note = type(orchestrator.rul_model).__name__
+
+    # --- Stages in isolation ---
+    results.append(measure_iterator(
+        f"{tag}/streamer.stream", lambda: chain.from_iterable(SensorStreamer(u, source).stream() for u in units)))
+    results.append(measure_iterator(
+        f"{tag}/streamer.stream_rows", lambda: chain.from_iterable(SensorStreamer(u, source).stream_rows() for u in units)))
+    results.append(measure_calls(f"{tag}/data_guard.validate", data_guard.validate, packets))
+    results.append(measure_calls(f"{tag}/stats_guard.score", stats_guard.score, packets))
+    results.append(measure_calls(f"{tag}/rul.predict", orchestrator.predict_rul, packets, rul_note))
+    results.append(measure_calls(f"{tag}/orchestrator.diagnose", orchestrator.diagnose, packets, rul_note))
+
+    # --- End to end: stream -> validate -> diagnose ---
+    e2e = Orchestrator(record_events=False)
+    e2e.event_store = event_store
+    e2e.rul_model = orchestrator.rul_model
+
+    def _pipeline():
+        for unit in units:
+            e2e.stats_guard.reset()
+            for packet in SensorStreamer(unit, source).stream():
+                if data_guard.validate(packet):
+                    yield e2e.diagnose(packet)
+
+    results.append(measure_iterator(f"{tag}/end_to_end", _pipeline, rul_note))
+
+    # --- Batch paths ---
+    feature_idx = [dataset.column_index[f] for f in stats_guard.features]
+    unit_col = values[:, dataset.column_index['unit_number']]
+    bs = args.batch_size
+    stats_guard.reset()
+    results.append(measure_batches(
+        f"{tag}/stats_guard.score_batch",
+        lambda batch: stats_guard.score_batch(*batch),
+        [(values[i:i + bs][:, feature_idx], unit_col[i:i + bs]) for i in range(0, len(values), bs)],
+        size_of=lambda batch: len(batch[1])))
+    results.append(measure_batches(
+        f"{tag}/data_guard.validate_batch", data_guard.validate_batch,
+        [packets[i:i + bs] for i in range(0, len(packets), bs)]))
+    results.append(measure_batches(
+        f"{tag}/orchestrator.diagnose_fleet", orchestrator.diagnose_fleet,
+        [packets[i:i + bs] for i in range(0, len(packets), bs)], rul_note))
+
+    event_store.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JetGuard hot-path microbenchmarks")
+    parser.add_argument("--packets", type=int, default=1000, help="packets replayed per dataset (engine order)")
+    parser.add_argument("--batch-size", type=int, default=500, help="batch size for batch APIs")
+    parser.add_argument("--datasets", nargs="+", default=["train", "test"], choices=["train", "test"])
+    parser.add_argument("--stub-rul", action="store_true", help="use the stub RUL model even if rul_model.pkl exists")
+    parser.add_argument("--keep-logs", action="store_true", help="keep JetGuard logging enabled while measuring")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--output", type=Path, default=RESULTS_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.20, help="allowed relative slowdown before flagging")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    if not args.keep_logs:
+        logger.setLevel(logging.CRITICAL + 1)
+
+    columns = json.load(open(SETTINGS_FILE)).get('data_col_names')
+    sources = {"train": TRAIN_FILE, "test": TEST_FILE}
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        args.event_dir = Path(tmp)
+        for tag in args.datasets:
+            if not sources[tag].exists():
+                print(f"(!) {sources[tag].name} bulunamadı, atlanıyor.")
+                continue
+            results.extend(run_dataset(f"{tag}_{sources[tag].stem.split('_')[-1]}", sources[tag], columns, args))
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else None
+    meta = {"packets": args.packets, "batch_size": args.batch_size, "logs": args.keep_logs}
+    payload = write_results(results, args.output, meta)
+
+    print_table(results, baseline)
+    print(f"\nResults -> {args.output}")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(payload, indent=2))
+        print(f"Baseline updated -> {args.baseline}")
+        return 0
+
+    if baseline is None:
+        # Karşılaştırma istenip referans yoksa sessizce geçme: regresyon kapısı hiçbir şey ölçmemiş olur
+        print(f"❌ No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 2 if args.fail_on_regression else 0
+    if baseline.get("meta", {}).get("packets") != args.packets or \
+            baseline.get("meta", {}).get("batch_size") != args.batch_size:
+        print(f"(!) Baseline was recorded with {baseline.get('meta')}; this run uses {meta}.")
+
+    regressions = compare_to_baseline(payload, baseline, args.tolerance)
+    if regressions:
+        print(f"\n⚠️ {len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for stage, metric, base, cur, change in regressions:
+            print(f"   {stage:<42} {metric:<15} {base:>12.2f} -> {cur:>12.2f} ({change:+.1%})")
+        return 1 if args.fail_on_regression else 0
+
+    print("✅ No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
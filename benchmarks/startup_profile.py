@@ -0,0 +1,123 @@
+import argparse
+import ast
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Proje kök dizinini bul
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# Cold-start profile: runs the target in a fresh interpreter under
+# `python -X importtime` and reports import time per module.
+# Usage:
+#   python benchmarks/startup_profile.py                      # headless scorer (import + Orchestrator())
+#   python benchmarks/startup_profile.py --target dashboard   # top-level imports of dashboard/app.py
+#   python benchmarks/startup_profile.py --target src.stats_engine.metrics --top 15
+#   python benchmarks/startup_profile.py --json startup.json
+
+PRESETS = {
+    "scorer": "from src.orchestrator.manager import Orchestrator\nOrchestrator(record_events=False)",
+    "dashboard": ROOT_DIR / "dashboard" / "app.py",
+}
+
+
+def script_imports(path: Path) -> list:
+    """Top-level import statements of a script (what it pays before its first line of UI)."""
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def build_snippet(target: str) -> str:
+    """Python source that reproduces the target's startup; missing packages are reported, not fatal."""
+    preset = PRESETS.get(target, target)
+    if isinstance(preset, Path) or preset.endswith(".py"):
+        statements = script_imports(Path(preset))
+    elif "\n" in preset or " " in preset:
+        return preset
+    else:
+        statements = [f"import {preset}"]
+
+    lines = []
+    for stmt in statements:
+        lines += ["try:", f"    {stmt}", "except ImportError as e:", "    print('MISSING', e.name)"]
+    return "\n".join(lines)
+
+
+def parse_importtime(stderr: str) -> list:
+    """`-X importtime` lines -> [{module, self_us, cumulative_us, depth}] in import order."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2  # bir boşluk + seviye başına iki boşluk
+        rows.append({"module": name.strip(), "self_us": int(self_us), "cumulative_us": int(cumulative_us),
+                     "depth": depth})
+    return rows
+
+
+def profile(target: str) -> dict:
+    snippet = build_snippet(target)
+    code = f"import sys\nsys.path.insert(0, {str(ROOT_DIR)!r})\n{snippet}"
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT_DIR,
+                          capture_output=True, text=True)
+    wall = time.perf_counter() - t0
+
+    rows = parse_importtime(proc.stderr)
+    packages = {}
+    for row in rows:
+        top = row["module"].split(".")[0]
+        packages[top] = packages.get(top, 0) + row["self_us"]
+
+    return {
+        "target": target,
+        "wall_s": round(wall, 4),
+        "returncode": proc.returncode,
+        "missing": sorted({line.split()[1] for line in proc.stdout.splitlines() if line.startswith("MISSING")}),
+        "import_s": round(sum(r["self_us"] for r in rows) / 1e6, 4),
+        "modules": len(rows),
+        "top_level": sorted((r for r in rows if r["depth"] == 0), key=lambda r: -r["cumulative_us"]),
+        "packages": dict(sorted(packages.items(), key=lambda kv: -kv[1])),
+        "error": proc.stderr.strip().splitlines()[-1] if proc.returncode else "",
+    }
+
+
+def print_report(result: dict, top: int):
+    print(f"\n🚀 STARTUP PROFILE: {result['target']}")
+    print(f"   wall {result['wall_s'] * 1e3:.0f} ms | imports {result['import_s'] * 1e3:.0f} ms "
+          f"| {result['modules']} modules")
+    if result["missing"]:
+        print(f"   ⚠️ not installed (skipped): {', '.join(result['missing'])}")
+    if result["error"]:
+        print(f"   ❌ {result['error']}")
+
+    print(f"\n   {'TOP-LEVEL IMPORT (cumulative)':<48}{'ms':>10}")
+    for row in result["top_level"][:top]:
+        print(f"   {row['module']:<48}{row['cumulative_us'] / 1e3:>10.1f}")
+
+    print(f"\n   {'PACKAGE (self time)':<48}{'ms':>10}")
+    for name, us in list(result["packages"].items())[:top]:
+        print(f"   {name:<48}{us / 1e3:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JetGuard cold-start / import-time profile")
+    parser.add_argument("--target", action="append",
+                        help="preset (scorer, dashboard), module name, script path or code; repeatable")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--json", type=Path, default=None, help="write the full profile as JSON")
+    args = parser.parse_args()
+
+    results = [profile(target) for target in (args.target or ["scorer", "dashboard"])]
+    for result in results:
+        print_report(result, args.top)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+        print(f"\nProfile -> {args.json}")
+
+
+if __name__ == "__main__":
+    main()
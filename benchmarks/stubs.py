@@ -0,0 +1,19 @@
+import numpy as np
+
+# Offline stand-ins used when trained artifacts are missing (e.g. rul_model.pkl is not committed).
+
+
+class StubRulModel:
+    """
+    Mimics RandomForestRegressor.predict: one RUL value per input row.
+    RUL decays linearly with sensor 11 (P30), enough to exercise the RUL policy branches.
+    """
+
+    def __init__(self, base_rul: float = 200.0):
+        self.base_rul = float(base_rul)
+
+    def predict(self, X):
+        if hasattr(X, "columns") and "sensor_measurement11" in X.columns:
+            p30 = np.asarray(X["sensor_measurement11"], dtype=np.float64)
+            return np.clip(self.base_rul - (p30 - 47.0) * 150.0, 0.0, None)
+        return np.full(len(X), self.base_rul)
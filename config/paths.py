@@ -15,6 +15,7 @@ SRC_DIR = ROOT_DIR / "src"
 RAW_DATA_DIR = DATA_DIR / "raw"
 PROCESSED_DATA_DIR = DATA_DIR / "processed"
 LOGS_DIR = DATA_DIR / "logs"
+CACHE_DIR = DATA_DIR / "cache"  # Binary (.npy) copies of the raw text files
 
 # Models sub-directories
 SAVED_MODELS_DIR = MODELS_DIR / "saved"
@@ -22,10 +23,9 @@ SAVED_MODELS_DIR = MODELS_DIR / "saved"
 # Settings file
 SETTINGS_FILE = CONFIG_DIR / "settings.json"
 
-MODEL_FILE_INDEX = json.load(open(SETTINGS_FILE)).get("model_file_index")
-# Data dirs
-TRAIN_FILE = RAW_DATA_DIR / f"train_FD00{MODEL_FILE_INDEX}.txt"
-TEST_FILE = RAW_DATA_DIR / f"test_FD00{MODEL_FILE_INDEX}.txt"
+# MODEL_FILE_INDEX / TRAIN_FILE / TEST_FILE depend on settings.json and are
+# resolved on first access (module __getattr__ below): importing this module
+# neither reads files nor creates directories.
 
 # Config Yamls
 AGENTS_FILE = CONFIG_DIR / "agents.yaml"
@@ -33,20 +33,43 @@ TASKS_FILE = CONFIG_DIR / "tasks.yaml"
 
 # MANUAL DIR
 MANUAL_DIR = DATA_DIR / "processed" / "engine_manual.txt"
+MANUAL_CORPUS_DIR = PROCESSED_DATA_DIR / "manuals"  # optional extra manuals (*.txt / *.md)
 
 # Trained models dirs
 WATCHDOG_MODEL_PATH = SAVED_MODELS_DIR / "watchdog_model.pkl"
 SCALER_PATH = SAVED_MODELS_DIR / "scaler.pkl"
+WATCHDOG_FLAT_PATH = SAVED_MODELS_DIR / "watchdog_flat.json"  # sklearn-free export (+ watchdog_flat.npy)
+RUL_MODEL_PATH = SAVED_MODELS_DIR / "rul_model.pkl"
+RUL_FOREST_PATH = SAVED_MODELS_DIR / "rul_forest.npz"  # sklearn-free export of the RUL forest
+SENSOR_ENVELOPE_PATH = SAVED_MODELS_DIR / "sensor_envelope.npz"  # per-dataset sensor min/max/percentiles
 
-# Log file path
-DB_LOG_PATH = LOGS_DIR / "system_events.json"
+# AI crew response cache (SQLite)
+CREW_CACHE_PATH = CACHE_DIR / "crew_missions.sqlite"
 
+# Diagnosis event store (SQLite, WAL)
+DB_LOG_PATH = LOGS_DIR / "system_events.db"
 
 
 def ensure_directories():
+    """Creates the writable data directories (called by the writers, e.g. the logger)."""
     LOGS_DIR.mkdir(parents=True, exist_ok=True)
     PROCESSED_DATA_DIR.mkdir(parents=True, exist_ok=True)
     SAVED_MODELS_DIR.mkdir(parents=True, exist_ok=True)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
-# runs at import
-ensure_directories()
\ No newline at end of file
+
+def _resolve(name):
+    if name == "MODEL_FILE_INDEX":
+        with open(SETTINGS_FILE) as f:
+            return json.load(f).get("model_file_index")
+    if name in ("TRAIN_FILE", "TEST_FILE"):
+        index = globals().get("MODEL_FILE_INDEX") or __getattr__("MODEL_FILE_INDEX")
+        return RAW_DATA_DIR / f"{name.split('_')[0].lower()}_FD00{index}.txt"
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __getattr__(name):
+    # Lazy settings-derived paths: computed once, then cached as module globals
+    value = _resolve(name)
+    globals()[name] = value
+    return value
\ No newline at end of file
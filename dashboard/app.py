@@ -1,12 +1,9 @@
 import os
 import streamlit as st
-import pandas as pd
-import time
 import sys
+import threading
 from pathlib import Path
 from dotenv import load_dotenv
-import plotly.graph_objects as go
-import plotly.express as px
 from datetime import datetime
 
 # --- ENV AYARLARI ---
@@ -18,13 +15,16 @@ ROOT_DIR = Path(__file__).resolve().parent.parent
 sys.path.append(str(ROOT_DIR))
 
 # --- MODÜL IMPORTLARI ---
+from config.paths import TRAIN_FILE
 from src.simulation.streamer import SensorStreamer
 from src.orchestrator.manager import Orchestrator
-from src.ai_core.crew import JetEngineCrew
+from src.orchestrator.pipeline import TelemetryPipeline, stream_packets, event_log_sink
+from src.ai_core.dispatch import CrewDispatcher, DispatchHandle
 from src.utils.logger import logger
-from src.stats_engine.guard import DataGuard
+from src.utils.event_store import get_event_store
 from src.utils.visualizer import DashboardVisualizer
-from src.stats_engine.metrics import PerformanceEvaluator
+from src.utils.render import RingBuffer, RenderScheduler, TerminalLog
+from src.stats_engine.metrics import StreamingEvaluator
 
 # --- SAYFA YAPILANDIRMASI ---
 st.set_page_config(
@@ -61,10 +61,27 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+# --- AI CREW DISPATCHER (process genelinde tek havuz, tüm session'lar paylaşır) ---
+@st.cache_resource
+def get_crew_dispatcher():
+    return CrewDispatcher(workers=2, max_queue=8, timeout=180.0)
+
+
+def streamlit_thread_initializer():
+    """Sink thread initializer: attaches this script run's context so st.* calls work off the script thread."""
+    try:
+        from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+    except ImportError:  # eski Streamlit sürümleri
+        from streamlit.scriptrunner import add_script_run_ctx, get_script_run_ctx
+    ctx = get_script_run_ctx()
+    return lambda: add_script_run_ctx(threading.current_thread(), ctx)
+
+
 # --- YARDIMCI FONKSİYONLAR ---
 def create_gauge(value, title, min_val, max_val, color="green",
                  threshold=None):
     """Plotly Gauge - Optimize Edilmiş"""
+    import plotly.graph_objects as go  # ilk frame'de yüklenir (soğuk başlangıcı hızlandırır)
 
     tick_step = (max_val - min_val) / 4
 
@@ -99,6 +116,119 @@ def create_gauge(value, title, min_val, max_val, color="green",
     return fig
 
 
+def update_gauge(fig, value, color):
+    """Updates a gauge built by create_gauge in place (value + bar/number color)."""
+    fig.update_traces(value=value, number={'font': {'color': color}}, gauge={'bar': {'color': color}})
+    return fig
+
+
+def create_sensor_heatmap(values):
+    """Single-row sensor heatmap; update_sensor_heatmap refreshes it in place."""
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Heatmap(z=[values], colorscale="Viridis", zmin=min(values), zmax=max(values)))
+    fig.update_layout(height=100, margin=dict(l=0, r=0, t=0, b=0),
+                      paper_bgcolor="rgba(0,0,0,0)")
+    fig.update_xaxes(showticklabels=False)
+    fig.update_yaxes(showticklabels=False)
+    return fig
+
+
+def update_sensor_heatmap(fig, values):
+    fig.update_traces(z=[values], zmin=min(values), zmax=max(values))
+    return fig
+
+
+def build_report(report, context):
+    """Stores the finished crew report + dossier text in session state."""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    st.session_state.report_content = f"""
+        =======================================================
+        🚀 JETGUARD DEFENSE SYSTEM - FAILURE DOSSIER
+        =======================================================
+        DATE       : {timestamp}
+        ENGINE ID  : {engine_id}
+        FAIL CYCLE : {context['cycle']}
+        RISK SCORE : {context['spe']:.6f}
+        EST. RUL   : {int(context['rul'])} Cycles
+        =======================================================
+
+        [SENSOR TELEMETRY SNAPSHOT]
+        {str(context['packet'])}
+
+        =======================================================
+        🤖 AI DIAGNOSIS & ACTION PLAN
+        =======================================================
+        {report}
+                                """
+    st.session_state.ai_report_text_only = report  # Ekranda göstermek için
+    st.session_state.ai_report_ready = True
+
+
+def show_mission_report(evaluator):
+    """Final screen: metrics, heatmap snapshot, AI report and dossier download. Halts the run."""
+    st.divider()
+    st.success("✅ MISSION COMPLETE: AI DIAGNOSIS RECEIVED")
+
+    # --- METRİKLERİ HESAPLA VE HAFIZAYA AL ---
+    if st.session_state.final_metrics is None:
+        try:
+            recall, acc, f1, auc, lead_time, far_100 = evaluator.generate_report()
+            st.session_state.final_metrics = {
+                "rec": recall,
+                "f1": f1,
+                "acc": acc,
+                "lead_time": lead_time,
+                "far_100": far_100
+            }
+        except:
+            st.session_state.final_metrics = {"rec": 0.0, "f1": 0.0,
+                                              "acc": 0.0}
+
+    # --- METRİKLERİ EKRANA BAS ---
+    lead_time_ui = None
+    if st.session_state.fail_cycle is not None and st.session_state.first_alert_cycle is not None:
+        lead_time_ui = st.session_state.fail_cycle - st.session_state.first_alert_cycle
+
+    m1, m2, m3 = st.columns(3)
+
+    m1.metric("Final Recall (Safety)",
+              f"{st.session_state.final_metrics['rec']:.2f}")
+
+    lead = st.session_state.final_metrics.get("lead_time", None)
+    m2.metric("Lead Time (cycles)",
+              "N/A" if lead_time_ui is None else f"{int(lead_time_ui)}")
+
+    m3.metric("False Alarm /100",
+              f"{st.session_state.final_metrics.get('far_100', 0.0):.2f}")
+
+    # --- HEATMAP'İ FİNALDE DE GÖSTER ---
+    if st.session_state.last_heatmap:
+        st.subheader("📡 FINAL SENSOR ARRAY SNAPSHOT")
+        st.plotly_chart(st.session_state.last_heatmap,
+                        use_container_width=True,
+                        config={'staticPlot': True})
+
+    st.markdown(f"""
+            <div style="background-color: #0d1117; border: 1px solid #30363d; padding: 20px; border-radius: 10px;">
+                {st.session_state.ai_report_text_only}
+            </div>
+            """, unsafe_allow_html=True)
+
+    st.download_button(
+        label="📥 DOWNLOAD MISSION DOSSIER (TXT)",
+        data=st.session_state.report_content,
+        file_name=f"failure_report_eng{engine_id}.txt",
+        mime="text/plain",
+        use_container_width=True
+    )
+
+    # Simülasyonu burada kilitliyoruz ama butonu öldürmüyoruz
+    st.warning(
+        "⚠️ SIMULATION HALTED DUE TO CRITICAL FAILURE. REPORT IS READY FOR DOWNLOAD.")
+    st.stop()  # Bu sefer düzgün çalışacak çünkü data önceden hafızaya alındı.
+
+
 # --- BAŞLIK ---
 col_logo, col_title = st.columns([1, 6])
 with col_logo: st.image(
@@ -112,13 +242,30 @@ st.divider()
 # --- SIDEBAR ---
 with st.sidebar:
     st.header("⚙️ SİSTEM AYARLARI")
-    engine_id = st.number_input("Target Engine Unit", 1, 100, 1)
+    # Fleet Overview sayfasından drill-down: unit + dataset session state ile gelir
+    if "engine_id" not in st.session_state:
+        st.session_state.engine_id = 1
+    engine_id = st.number_input("Target Engine Unit", 1, 999, key="engine_id")
+    data_file = Path(st.session_state.get("engine_data_file", TRAIN_FILE))
+    st.caption(f"Dataset: {data_file.name}")
     # TİTREME ÇÖZÜMÜ 1: Varsayılan hızı 0.1'e çektik (Daha kararlı)
-    speed = st.slider("Simulation Clock (sec)", 0.01, 1.0, 0.1)
+    speed = st.slider("Simulation Clock (sec)", 0.0, 1.0, 0.1)  # 0 = tam hız
+    render_fps = st.slider("Render FPS", 1, 30, 10)
     start_btn = st.button("INITIATE SEQUENCE", type="primary",
                           use_container_width=True)
     st.info("System Ready...")
 
+    # Önceki koşulardan alarm geçmişi (olay deposunda indeksli sorgu, simülasyon tekrarı yok)
+    event_store = get_event_store()
+    if event_store is not None:
+        with st.expander("📜 EVENT HISTORY"):
+            history = event_store.critical_events(unit=engine_id, min_priority=3, limit=20)
+            if history.empty:
+                st.caption("No recorded alerts for this unit.")
+            else:
+                st.dataframe(history[["run_id", "cycle", "status", "ratio", "predicted_rul"]],
+                             hide_index=True, use_container_width=True)
+
 # --- YERLEŞİM ---
 kpi_col1, kpi_col2, kpi_col3 = st.columns([1, 1, 2])
 with kpi_col1: rul_placeholder = st.empty()
@@ -139,84 +286,55 @@ if start_btn:
     st.session_state.final_metrics = None
     st.session_state.first_alert_cycle = None
     st.session_state.fail_cycle = None
+    st.session_state.crew_handle = None
+    st.session_state.crew_context = None
+    run_id = datetime.now().strftime("%Y%m%d%H%M%S%f")  # incident id (dedup anahtarı)
 
     logger.info("Visual Simulation Started.")
+    crew_dispatcher = get_crew_dispatcher()
 
-    streamer = SensorStreamer(engine_id=engine_id)
-    orchestrator = Orchestrator()
-    guard = DataGuard()
-    evaluator = PerformanceEvaluator(fail_window=30)
+    streamer = SensorStreamer(engine_id=engine_id, data_file=data_file)
+    # Olay kaydı pipeline'ın "events" sink'inde (ayrı thread, toplu yazım)
+    orchestrator = Orchestrator(run_id=run_id, record_events=False)
+    evaluator = StreamingEvaluator(fail_window=30)
 
-    history_data = {'Cycle': [], 'Anomaly Score': [], 'Threshold': []}
-    terminal_logs = ["System Initialized...",
-                     "Connecting to Satellite Stream...",
-                     "Data Link Established."]
+    # Geçmiş sabit boyutlu halka tamponda; çizim FPS sınırlı (ara cycle'lar birleştirilir)
+    history = RingBuffer(60, ('Cycle', 'Anomaly Score', 'Threshold'))
+    terminal = TerminalLog(["System Initialized...",
+                            "Connecting to Satellite Stream...",
+                            "Data Link Established."], size=12)
+    scheduler = RenderScheduler(fps=render_fps)
+    sensor_cols = [f'sensor_measurement{i}' for i in range(1, 22)]
 
     # TİTREME ÇÖZÜMÜ 2: Plotly Config (Statik Plot)
     plotly_config = {'staticPlot': True, 'displayModeBar': False}
 
-    for data_packet in streamer.stream():
-
-        if not guard.validate(data_packet): continue
-        decision = orchestrator.diagnose(data_packet)
+    # Figürler bir kez kurulur, her karede sadece verileri güncellenir
+    figures = {"rul": None, "loss": None, "heat": None, "chart": None}
+    latest = {}
+    # UI ve alarm sink'leri ayrı thread'lerde: ortak durum (terminal, session_state) bu kilitle korunur
+    ui_lock = threading.Lock()
 
-        current_cycle = data_packet['cycle']
-        spe = decision['spe']
-        threshold = decision['threshold']
-        priority = decision['priority']
+    def draw_frame():
+        decision = latest["decision"]
+        spe, threshold, priority = decision['spe'], decision['threshold'], decision['priority']
         predicted_rul = decision.get('predicted_rul', 0)
 
-        history_data['Cycle'].append(current_cycle)
-        history_data['Anomaly Score'].append(spe)
-        history_data['Threshold'].append(threshold)
-
-        # --- DİNAMİK GROUND TRUTH (Failure Window) ---
-        # Streamer/engine dataset'in gerçek fail_cycle değeri yoksa, MVP için "fail" anını ilk prio=4 gördüğümüz cycle kabul ediyoruz.
-        if "fail_cycle" not in st.session_state:
-            st.session_state.fail_cycle = None
-
-        if priority == 4 and st.session_state.fail_cycle is None:
-            st.session_state.fail_cycle = int(current_cycle)
-
-        FAILURE_WINDOW = 30  # son 30 cycle = risk bölgesi (20-30 arası da seçebilirsin)
-
-        if st.session_state.fail_cycle is not None:
-            simulated_ground_truth = 1 if current_cycle >= (
-                    st.session_state.fail_cycle - FAILURE_WINDOW) else 0
-        else:
-            simulated_ground_truth = 0  # fail henüz oluşmadıysa, ground truth "normal" kabul
-
-        # Tahmin sınıfı: monitoring ve üstü = alarm
-        predicted_class = 1 if priority >= 2 else 0
-
-        # İlk alarm cycle'ını yakala (ilk kez 1 olduğu an)
-        if predicted_class == 1 and st.session_state.first_alert_cycle is None:
-            st.session_state.first_alert_cycle = int(current_cycle)
-
-        # Olasılık/puan olarak risk_score daha doğru (0-1)
-        evaluator.add_record(
-            simulated_ground_truth,
-            predicted_class,
-            probability=float(decision.get("risk_score", 0.0)),
-            cycle=int(current_cycle)
-        )
-
-        # --- GÖRSEL GÜNCELLEME ---
         # A. RUL Gauge
         rul_color = "#00FF00" if predicted_rul > 50 else "#FFA500" if predicted_rul > 20 else "#FF0000"
-        fig_rul = create_gauge(predicted_rul, "Est. RUL (Cycles)", 0, 200,
-                               rul_color, threshold=20)
-        # config parametresi eklendi
-        rul_placeholder.plotly_chart(fig_rul, use_container_width=True,
-                                     config=plotly_config)
+        if figures["rul"] is None:
+            figures["rul"] = create_gauge(predicted_rul, "Est. RUL (Cycles)", 0, 200, rul_color, threshold=20)
+        else:
+            update_gauge(figures["rul"], predicted_rul, rul_color)
+        rul_placeholder.plotly_chart(figures["rul"], use_container_width=True, config=plotly_config)
 
         # B. Anomaly Gauge
         loss_color = "#00FF00" if priority == 1 else "#FFA500" if priority == 2 else "#FF0000"
-        fig_loss = create_gauge(spe, "Anomaly Score", 0, threshold * 3,
-                                loss_color, threshold=threshold)
-        # config parametresi eklendi
-        loss_placeholder.plotly_chart(fig_loss, use_container_width=True,
-                                      config=plotly_config)
+        if figures["loss"] is None:
+            figures["loss"] = create_gauge(spe, "Anomaly Score", 0, threshold * 3, loss_color, threshold=threshold)
+        else:
+            update_gauge(figures["loss"], spe, loss_color)
+        loss_placeholder.plotly_chart(figures["loss"], use_container_width=True, config=plotly_config)
 
         # C. Status
         status_text = decision['status']
@@ -228,153 +346,160 @@ if start_btn:
             <div style="border: 2px solid {border_color}; padding: 20px; border-radius: 10px; text-align: center;">
                 <h2 style="color: {border_color}; margin:0;">SYSTEM STATUS</h2>
                 <h1 style="color: white; margin:0;">{status_text}</h1>
-                <p>Cycle: {int(current_cycle)}</p>
+                <p>Cycle: {int(latest["cycle"])}</p>
             </div>
             """
         status_placeholder.markdown(status_html, unsafe_allow_html=True)
 
-        # D. Grafik
-        df_chart = pd.DataFrame(history_data).tail(60)
-        chart = DashboardVisualizer.create_anomaly_chart(df_chart)
-        chart_placeholder.altair_chart(chart, use_container_width=True)
+        # D. Grafik (son 60 cycle, halka tampondan)
+        figures["chart"] = DashboardVisualizer.update_anomaly_chart(figures["chart"], history.frame())
+        chart_placeholder.altair_chart(figures["chart"], use_container_width=True)
 
         # E. Terminal
-        log_entry = f"> Cycle {current_cycle}: Loss {spe:.4f} | Status: {status_text}"
-        terminal_logs.append(log_entry)
-        if len(terminal_logs) > 12: terminal_logs.pop(0)
-        terminal_html = "<div class='terminal-box'>" + "<br>".join(
-            terminal_logs) + "</div>"
+        with ui_lock:
+            terminal_html = terminal.html()
         ai_terminal_placeholder.markdown(terminal_html, unsafe_allow_html=True)
 
-        # F. Heatmap (GÜNCELLENDİ)
-        sensor_cols = [f'sensor_measurement{i}' for i in range(1, 22)]
-        sensor_df = pd.DataFrame([data_packet])[sensor_cols]
-
-        fig_heat = px.imshow(
-            sensor_df,
-            aspect="auto",
-            color_continuous_scale="Viridis",
-            labels=dict(x="Sensor", y="Value"),
-            zmin=sensor_df.min().min(),  # Renk skalasını sabitlemek için
-            zmax=sensor_df.max().max()
-        )
-        fig_heat.update_layout(height=100, margin=dict(l=0, r=0, t=0, b=0),
-                               paper_bgcolor="rgba(0,0,0,0)")
-        fig_heat.update_xaxes(showticklabels=False)
-        fig_heat.update_yaxes(showticklabels=False)
+        # F. Heatmap
+        sensor_values = [latest["packet"][c] for c in sensor_cols]
+        if figures["heat"] is None:
+            figures["heat"] = create_sensor_heatmap(sensor_values)
+        else:
+            update_sensor_heatmap(figures["heat"], sensor_values)
 
         # Hafızaya kaydet ve çiz
-        st.session_state.last_heatmap = fig_heat
-        sensor_chart_placeholder.plotly_chart(fig_heat,
+        st.session_state.last_heatmap = figures["heat"]
+        sensor_chart_placeholder.plotly_chart(figures["heat"],
                                               use_container_width=True,
                                               config=plotly_config)
 
-        # 5. KRİTİK HATA VE AI TETİKLEME
-        if priority == 4:
-            logger.critical(f"Kritik Hata! Cycle: {current_cycle}")
-            try:
-                evaluator.set_fail_cycle(int(current_cycle))
-            except Exception as e:
-                logger.error(f"Evaluator fail_cycle set edilemedi: {e}")
-
-            # AI Raporu oluşturulmadıysa oluştur
-            if not st.session_state.ai_report_ready:
-                with st.spinner('🤖 AI CREW ENGAGED: ANALYZING TELEMETRY...'):
-                    try:
-                        ai_crew = JetEngineCrew()
-                        ai_input_data = f"SENSOR TELEMETRY: {str(data_packet)}\nPREDICTED RUL: {int(predicted_rul)} CYCLES"
-                        report = ai_crew.run_mission(ai_input_data,
-                                                     f"{spe:.4f}")
-
-                        # Raporu ve Metni Hafızaya Kaydet
-                        timestamp = datetime.now().strftime(
-                            "%Y-%m-%d %H:%M:%S")
-                        st.session_state.report_content = f"""
-        =======================================================
-        🚀 JETGUARD DEFENSE SYSTEM - FAILURE DOSSIER
-        =======================================================
-        DATE       : {timestamp}
-        ENGINE ID  : {engine_id}
-        FAIL CYCLE : {int(current_cycle)}
-        RISK SCORE : {spe:.6f}
-        EST. RUL   : {int(predicted_rul)} Cycles
-        =======================================================
-
-        [SENSOR TELEMETRY SNAPSHOT]
-        {str(data_packet)}
-
-        =======================================================
-        🤖 AI DIAGNOSIS & ACTION PLAN
-        =======================================================
-        {report}
-                                """
-                        st.session_state.ai_report_text_only = report  # Ekranda göstermek için
-                        st.session_state.ai_report_ready = True
-
-                    except Exception as e:
-                        st.error(f"AI FAILURE: {e}")
-
-        # Rapor Hazırsa Ekranda Göster
+    def on_decisions(items):
+        """UI sink (coalesce, own thread): per-cycle bookkeeping for every item, at most one redraw per call."""
+        with ui_lock:
+            draw = record_decisions(items)
+        if draw:
+            draw_frame()
+
+        # AI görevi bitti mi? (non-blocking poll)
+        with ui_lock:
+            handle = st.session_state.crew_handle
+            if handle is not None and not st.session_state.ai_report_ready and handle.done():
+                if handle.status == DispatchHandle.DONE:
+                    build_report(handle.report, st.session_state.crew_context)
+                else:
+                    st.error(f"AI FAILURE: {handle.error or handle.status}")
+                    st.session_state.crew_handle = None
+
+        # Rapor hazır: kaynağı durdur; rapor pipeline bittikten sonra script thread'inde gösterilir
         if st.session_state.ai_report_ready:
-            st.divider()
-            st.success("✅ MISSION COMPLETE: AI DIAGNOSIS RECEIVED")
-
-            # --- METRİKLERİ HESAPLA VE HAFIZAYA AL ---
-            if st.session_state.final_metrics is None:
-                try:
-                    recall, acc, f1, auc, lead_time, far_100 = evaluator.generate_report()
-                    st.session_state.final_metrics = {
-                        "rec": recall,
-                        "f1": f1,
-                        "acc": acc,
-                        "lead_time": lead_time,
-                        "far_100": far_100
-                    }
-                except:
-                    st.session_state.final_metrics = {"rec": 0.0, "f1": 0.0,
-                                                      "acc": 0.0}
-
-            # --- METRİKLERİ EKRANA BAS ---
-            lead_time_ui = None
-            if st.session_state.fail_cycle is not None and st.session_state.first_alert_cycle is not None:
-                lead_time_ui = st.session_state.fail_cycle - st.session_state.first_alert_cycle
-
-            m1, m2, m3 = st.columns(3)
-
-            m1.metric("Final Recall (Safety)",
-                      f"{st.session_state.final_metrics['rec']:.2f}")
-
-            lead = st.session_state.final_metrics.get("lead_time", None)
-            m2.metric("Lead Time (cycles)",
-                      "N/A" if lead_time_ui is None else f"{int(lead_time_ui)}")
-
-            m3.metric("False Alarm /100",
-                      f"{st.session_state.final_metrics.get('far_100', 0.0):.2f}")
-
-            # --- HEATMAP'İ FİNALDE DE GÖSTER ---
-            if st.session_state.last_heatmap:
-                st.subheader("📡 FINAL SENSOR ARRAY SNAPSHOT")
-                st.plotly_chart(st.session_state.last_heatmap,
-                                use_container_width=True,
-                                config={'staticPlot': True})
-
-            st.markdown(f"""
-                    <div style="background-color: #0d1117; border: 1px solid #30363d; padding: 20px; border-radius: 10px;">
-                        {st.session_state.ai_report_text_only}
-                    </div>
-                    """, unsafe_allow_html=True)
-
-            st.download_button(
-                label="📥 DOWNLOAD MISSION DOSSIER (TXT)",
-                data=st.session_state.report_content,
-                file_name=f"failure_report_eng{engine_id}.txt",
-                mime="text/plain",
-                use_container_width=True
+            pipeline.stop()
+
+    def record_decisions(items) -> bool:
+        draw = False
+        for item in items:
+            data_packet, decision = item["packet"], item["decision"]
+            if decision['status'] == "INVALID DATA": continue
+
+            current_cycle = data_packet['cycle']
+            spe = decision['spe']
+            threshold = decision['threshold']
+            priority = decision['priority']
+
+            history.append(current_cycle, spe, threshold)
+
+            # --- DİNAMİK GROUND TRUTH (Failure Window) ---
+            # Streamer/engine dataset'in gerçek fail_cycle değeri yoksa, MVP için "fail" anını ilk prio=4 gördüğümüz cycle kabul ediyoruz.
+            if priority == 4 and st.session_state.fail_cycle is None:
+                st.session_state.fail_cycle = int(current_cycle)
+
+            FAILURE_WINDOW = 30  # son 30 cycle = risk bölgesi (20-30 arası da seçebilirsin)
+
+            if st.session_state.fail_cycle is not None:
+                simulated_ground_truth = 1 if current_cycle >= (
+                        st.session_state.fail_cycle - FAILURE_WINDOW) else 0
+            else:
+                simulated_ground_truth = 0  # fail henüz oluşmadıysa, ground truth "normal" kabul
+
+            # Tahmin sınıfı: monitoring ve üstü = alarm
+            predicted_class = 1 if priority >= 2 else 0
+
+            # İlk alarm cycle'ını yakala (ilk kez 1 olduğu an)
+            if predicted_class == 1 and st.session_state.first_alert_cycle is None:
+                st.session_state.first_alert_cycle = int(current_cycle)
+
+            # Olasılık/puan olarak risk_score daha doğru (0-1)
+            evaluator.add_record(
+                simulated_ground_truth,
+                predicted_class,
+                probability=float(decision.get("risk_score", 0.0)),
+                cycle=int(current_cycle)
             )
-
-            # Simülasyonu burada kilitliyoruz ama butonu öldürmüyoruz
-            st.warning(
-                "⚠️ SIMULATION HALTED DUE TO CRITICAL FAILURE. REPORT IS READY FOR DOWNLOAD.")
-            st.stop()  # Bu sefer düzgün çalışacak çünkü data önceden hafızaya alındı.
-
-        time.sleep(speed)
+            if priority == 4:
+                try:
+                    evaluator.set_fail_cycle(int(current_cycle))
+                except Exception as e:
+                    logger.error(f"Evaluator fail_cycle set edilemedi: {e}")
+
+            # --- GÖRSEL GÜNCELLEME (FPS sınırlı; kritik anlar her zaman çizilir) ---
+            terminal.append(f"> Cycle {current_cycle}: Loss {spe:.4f} | Status: {decision['status']}")
+            latest.update(decision=decision, packet=data_packet, cycle=current_cycle)
+            draw |= scheduler.ready(force=priority == 4)
+        return draw
+
+    def on_alerts(items):
+        """Alert sink (block, own thread): CRITICAL cycles -> log + AI crew dispatch in the background."""
+        with ui_lock:
+            dispatch_alerts(items)
+
+    def dispatch_alerts(items):
+        for item in items:
+            data_packet, decision = item["packet"], item["decision"]
+            if decision['priority'] != 4:
+                continue
+            current_cycle = data_packet['cycle']
+            logger.critical(f"Kritik Hata! Cycle: {current_cycle}",
+                            extra={"unit": engine_id, "cycle": current_cycle, "priority": 4})
+
+            # AI Raporu istenmediyse arka planda başlat (stream durmaz)
+            if not st.session_state.ai_report_ready and st.session_state.crew_handle is None:
+                spe, predicted_rul = decision['spe'], decision.get('predicted_rul', 0)
+                ai_input_data = f"SENSOR TELEMETRY: {str(data_packet)}\nPREDICTED RUL: {int(predicted_rul)} CYCLES"
+                st.session_state.crew_handle = crew_dispatcher.submit(
+                    engine_id, run_id, ai_input_data, f"{spe:.4f}",
+                    deviating_sensors=orchestrator.stats_guard.deviating_sensors(data_packet),
+                    predicted_rul=predicted_rul)
+                st.session_state.crew_context = {
+                    "cycle": int(current_cycle), "spe": spe,
+                    "rul": predicted_rul, "packet": dict(data_packet)
+                }
+                terminal.append("> 🤖 AI CREW DISPATCHED (background analysis)")
+
+    # Kaynak -> doğrulama -> micro-batch skor -> sink'ler (sınırlı kuyruklar; yavaş çizim skorlamayı bekletmez)
+    # UI ve alarm sink'leri loop thread'i dışında çalışır (Streamlit bağlamı thread'e eklenir)
+    st_context = streamlit_thread_initializer()
+    pipeline = TelemetryPipeline(orchestrator, max_batch=32)
+    pipeline.add_sink("ui", on_decisions, policy="coalesce", threaded=True, initializer=st_context)
+    pipeline.add_sink("alerts", on_alerts, threaded=True, initializer=st_context)
+    if event_store is not None:
+        pipeline.add_sink("events", event_log_sink(event_store, run_id), threaded=True)
+    pipeline.run_blocking(stream_packets(streamer), speed=speed)
+    logger.info(f"Pipeline stages:\n{pipeline.report()}")
+
+    # Tam hızda replay: birleştirilen son cycle'lar da ekrana yansısın
+    if scheduler.dirty:
+        draw_frame()
+    logger.info(f"Render: {scheduler.frames} frames drawn, {scheduler.coalesced} cycles coalesced.")
+
+    if event_store is not None:
+        event_store.flush()
+
+    # Stream bitti ama AI görevi hâlâ sürüyor olabilir: sadece burada bekle
+    handle = st.session_state.crew_handle
+    if handle is not None and not st.session_state.ai_report_ready:
+        with st.spinner('🤖 AI CREW ENGAGED: ANALYZING TELEMETRY...'):
+            try:
+                build_report(handle.result(), st.session_state.crew_context)
+            except Exception as e:
+                st.error(f"AI FAILURE: {e}")
+    if st.session_state.ai_report_ready:
+        show_mission_report(evaluator)
@@ -0,0 +1,100 @@
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import plotly.graph_objects as go
+import streamlit as st
+
+# --- PATH AYARLARI ---
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(ROOT_DIR))
+os.environ["CREWAI_TELEMETRY_OPT_OUT"] = "true"
+
+from src.orchestrator.fleet import available_datasets, model_version, score_fleet
+
+# --- SAYFA YAPILANDIRMASI ---
+st.set_page_config(page_title="JetGuard Fleet Overview", page_icon="🛰️", layout="wide")
+
+
+@st.cache_data(show_spinner="Scoring fleet...")
+def load_fleet(source: str, version: str):
+    """Per-unit summary; memoized per (dataset, model version) on top of the disk cache."""
+    return score_fleet(source)
+
+
+def risk_grid(summary, columns: int = 10):
+    """Units laid out on a fixed-width grid, colored by current risk score."""
+    n = len(summary)
+    rows = int(np.ceil(n / columns))
+    z = np.full(rows * columns, np.nan)
+    z[:n] = summary["risk_score"].to_numpy()
+    text = np.full(rows * columns, "", dtype=object)
+    text[:n] = [f"Unit {u}<br>{s}<br>RUL {r:.0f}" for u, s, r in
+                zip(summary["unit_number"], summary["status"], summary["predicted_rul"])]
+    labels = np.full(rows * columns, "", dtype=object)
+    labels[:n] = summary["unit_number"].astype(str).to_numpy()
+
+    fig = go.Figure(go.Heatmap(
+        z=z.reshape(rows, columns), text=labels.reshape(rows, columns), texttemplate="%{text}",
+        customdata=text.reshape(rows, columns), hovertemplate="%{customdata}<extra></extra>",
+        colorscale=[[0, "#1a7f37"], [0.5, "#d29922"], [1, "#da3633"]], zmin=0, zmax=1,
+        xgap=2, ygap=2, colorbar={'title': 'Risk'}
+    ))
+    fig.update_layout(height=max(220, 42 * rows), margin=dict(l=0, r=0, t=10, b=0),
+                      paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)", font={'color': "white"})
+    fig.update_xaxes(showticklabels=False)
+    fig.update_yaxes(showticklabels=False, autorange="reversed")
+    return fig
+
+
+st.title("🛰️ FLEET OVERVIEW")
+st.caption("Every engine of the selected dataset, scored in one batched pass")
+
+datasets = available_datasets()
+if not datasets:
+    st.error("data/raw altında train_FD00x / test_FD00x dosyası bulunamadı.")
+    st.stop()
+
+source = st.selectbox("Dataset", datasets, format_func=lambda p: p.name)
+summary = load_fleet(str(source), model_version())
+
+# --- KPI ---
+k1, k2, k3, k4 = st.columns(4)
+k1.metric("Units", len(summary))
+k2.metric("Critical", int((summary["priority"] == 4).sum()))
+k3.metric("Warning / Monitoring", int(summary["priority"].between(2, 3).sum()))
+valid_rul = summary.loc[summary["predicted_rul"] >= 0, "predicted_rul"]
+k4.metric("Median RUL", "N/A" if valid_rul.empty else f"{valid_rul.median():.0f}")
+
+# --- RİSK HARİTASI ---
+st.subheader("Current Risk")
+st.plotly_chart(risk_grid(summary), use_container_width=True, config={'displayModeBar': False})
+
+# --- TABLO (sıralanabilir) ---
+st.subheader("Engines")
+st.dataframe(
+    summary.sort_values(["priority", "risk_score"], ascending=False),
+    hide_index=True,
+    use_container_width=True,
+    column_config={
+        "unit_number": st.column_config.NumberColumn("Unit"),
+        "risk_score": st.column_config.ProgressColumn("Risk", min_value=0.0, max_value=1.0, format="%.2f"),
+        "ratio": st.column_config.NumberColumn("SPE / Threshold", format="%.2f"),
+        "predicted_rul": st.column_config.NumberColumn("Predicted RUL", format="%.0f"),
+        "first_warning_cycle": st.column_config.NumberColumn("First Warning", help="-1 = never"),
+        "first_critical_cycle": st.column_config.NumberColumn("First Critical", help="-1 = never"),
+    },
+)
+
+# --- DRILL-DOWN ---
+st.subheader("Drill-down")
+col_unit, col_btn = st.columns([3, 1])
+with col_unit:
+    unit = st.selectbox("Engine", summary.sort_values("risk_score", ascending=False)["unit_number"].tolist())
+with col_btn:
+    st.write("")
+    if st.button("OPEN SINGLE-ENGINE VIEW", type="primary", use_container_width=True):
+        st.session_state.engine_id = int(unit)
+        st.session_state.engine_data_file = str(source)
+        st.switch_page("app.py")
@@ -0,0 +1,35 @@
+import sys
+import numpy as np
+from pathlib import Path
+
+# Proje kök dizinini bul
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from config.paths import RAW_DATA_DIR, SENSOR_ENVELOPE_PATH
+from src.stats_engine.envelope import SensorEnvelope, SENSOR_COLUMNS
+
+
+def build_envelope():
+    print("📐 Sensör zarf tablosu (envelope) oluşturuluyor...")
+
+    train_files = sorted(RAW_DATA_DIR.glob("train_FD00*.txt"))
+    if not train_files:
+        print(f"❌ HATA: {RAW_DATA_DIR} altında train_FD00x.txt bulunamadı.")
+        return
+
+    envelope = SensorEnvelope.build(train_files)
+    envelope.save(SENSOR_ENVELOPE_PATH)
+    print(f"✅ {len(envelope.datasets)} dataset x {len(SENSOR_COLUMNS)} sensör -> {SENSOR_ENVELOPE_PATH}")
+
+    lo, hi = envelope.bounds()
+    hard_lo, hard_hi = envelope.hard_bounds()
+    hard_lo = np.where(hard_lo > 0, 0.0, hard_lo)  # pozitif sensörler: <= 0 red
+    for i, sensor in enumerate(SENSOR_COLUMNS):
+        print(f"   {sensor:<22} min={envelope.stat('min')[i]:>10.4f}  max={envelope.stat('max')[i]:>10.4f}"
+              f"  | envelope [{lo[i]:.4f}, {hi[i]:.4f}]  reject outside ({hard_lo[i]:.4g}, {hard_hi[i]:.4g}]")
+
+
+if __name__ == "__main__":
+    np.set_printoptions(suppress=True)
+    build_envelope()
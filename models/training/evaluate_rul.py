@@ -0,0 +1,150 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Proje kök dizinini bul
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from config.paths import RAW_DATA_DIR, SETTINGS_FILE, PROCESSED_DATA_DIR
+from src.simulation.columnar import open_dataset
+from src.stats_engine.forest import FlatForest
+
+# Test-set RUL evaluation (CMAPSS protocol).
+# test_FD00x.txt stops every engine some cycles before failure; RUL_FD00x.txt
+# holds the true remaining life at that last cycle, one line per unit.
+# Last cycles are taken with one grouped (vectorized) selection, all units are
+# predicted in one batched call. Usage:
+#   python models/training/evaluate_rul.py                       # every test_FD00x with a truth file
+#   python models/training/evaluate_rul.py --datasets 1 --max-rmse 45
+#   python models/training/evaluate_rul.py --model retrained_forest.npz --per-unit 10
+
+
+def nasa_score(error: np.ndarray) -> float:
+    """PHM08 asymmetric score, error = predicted - true: late predictions (error > 0) cost more."""
+    error = np.asarray(error, dtype=np.float64)
+    return float(np.sum(np.where(error < 0, np.exp(-error / 13.0), np.exp(error / 10.0)) - 1.0))
+
+
+def load_model(path=None):
+    """FlatForest (.npz) or sklearn pickle (.pkl); default: whatever the model registry serves."""
+    if path is None:
+        from src.stats_engine.registry import get_model_registry
+        return get_model_registry().rul_model()
+    path = Path(path)
+    if path.suffix == ".npz":
+        return FlatForest.load(path)
+    import joblib
+    return joblib.load(path)
+
+
+def available_datasets() -> list:
+    """Dataset indices that ship both test_FD00x.txt and RUL_FD00x.txt."""
+    return sorted(int(p.stem[-1]) for p in RAW_DATA_DIR.glob("test_FD00*.txt")
+                  if (RAW_DATA_DIR / f"RUL_FD00{p.stem[-1]}.txt").exists())
+
+
+def last_cycles(values: np.ndarray, unit_col: int) -> np.ndarray:
+    """Row index of each unit's last cycle (rows of one unit are contiguous, as in CMAPSS)."""
+    units = values[:, unit_col]
+    return np.flatnonzero(np.r_[units[1:] != units[:-1], True])
+
+
+def evaluate_dataset(model, index: int, columns: list) -> dict:
+    """Metrics + per-unit errors of one test set. Times: parse/select, predict (ms)."""
+    t0 = time.perf_counter()
+    dataset = open_dataset(RAW_DATA_DIR / f"test_FD00{index}.txt", columns)
+    truth = np.loadtxt(RAW_DATA_DIR / f"RUL_FD00{index}.txt", ndmin=1)
+
+    values = np.asarray(dataset.values)
+    last = values[last_cycles(values, dataset.column_index['unit_number'])]
+    if len(last) != len(truth):
+        raise ValueError(f"FD00{index}: {len(last)} units in test file but {len(truth)} truth values")
+    features = list(model.feature_names_in_)
+    X = pd.DataFrame(last[:, [dataset.column_index[c] for c in features]], columns=features)
+    t1 = time.perf_counter()
+
+    predicted = np.asarray(model.predict(X), dtype=np.float64)  # tek batch çağrısı
+    t2 = time.perf_counter()
+
+    error = predicted - truth
+    units = pd.DataFrame({
+        "unit_number": last[:, dataset.column_index['unit_number']].astype(int),
+        "last_cycle": last[:, dataset.column_index['cycle']].astype(int),
+        "true_rul": truth,
+        "predicted_rul": predicted,
+        "error": error,
+    })
+    return {
+        "dataset": f"FD00{index}",
+        "units": len(units),
+        "rmse": float(np.sqrt(np.mean(error ** 2))),
+        "mae": float(np.mean(np.abs(error))),
+        "bias": float(np.mean(error)),
+        "nasa_score": nasa_score(error),
+        "late_share": float(np.mean(error > 0)),
+        "load_ms": round(1e3 * (t1 - t0), 2),
+        "predict_ms": round(1e3 * (t2 - t1), 2),
+        "per_unit": units,
+    }
+
+
+def evaluate(datasets: list = None, model_path=None) -> list:
+    with open(SETTINGS_FILE) as f:
+        columns = json.load(f)["data_col_names"]
+    model = load_model(model_path)
+    if model is None:
+        raise FileNotFoundError("RUL modeli yok: önce models/training/train_rul.py çalıştırın")
+    return [evaluate_dataset(model, index, columns) for index in (datasets or available_datasets())]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched test-set RUL evaluation against RUL_FD00x ground truth")
+    parser.add_argument("--datasets", type=int, nargs="+", default=None, help="FD00x indices (default: all available)")
+    parser.add_argument("--model", type=Path, default=None, help=".npz FlatForest or .pkl (default: served model)")
+    parser.add_argument("--per-unit", type=int, default=0, help="print the N worst units per dataset")
+    parser.add_argument("--output", type=Path, nargs="?", const=PROCESSED_DATA_DIR, default=None,
+                        help="write per-unit CSVs + summary JSON (default dir: data/processed)")
+    parser.add_argument("--max-rmse", type=float, default=None, help="exit 1 if any dataset's RMSE is above this")
+    parser.add_argument("--max-score", type=float, default=None, help="exit 1 if any dataset's NASA score is above this")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    results = evaluate(args.datasets, args.model)
+    elapsed = time.perf_counter() - t0
+
+    print(f"\n📏 RUL TEST EVALUATION ({args.model or 'served model'})")
+    print(f"   {'DATASET':<9}{'units':>6}{'RMSE':>9}{'MAE':>9}{'bias':>9}{'NASA score':>13}{'late %':>8}"
+          f"{'load ms':>9}{'pred ms':>9}")
+    for r in results:
+        print(f"   {r['dataset']:<9}{r['units']:>6}{r['rmse']:>9.2f}{r['mae']:>9.2f}{r['bias']:>9.2f}"
+              f"{r['nasa_score']:>13.1f}{100 * r['late_share']:>8.1f}{r['load_ms']:>9.1f}{r['predict_ms']:>9.1f}")
+        if args.per_unit:
+            worst = r["per_unit"].reindex(r["per_unit"]["error"].abs().sort_values(ascending=False).index)
+            print(worst.head(args.per_unit).to_string(index=False, float_format=lambda v: f"{v:.1f}"))
+    print(f"⏱️ Toplam: {elapsed:.2f}s")
+
+    if args.output:
+        args.output.mkdir(parents=True, exist_ok=True)
+        for r in results:
+            r["per_unit"].to_csv(args.output / f"rul_eval_{r['dataset']}.csv", index=False)
+        summary = [{k: v for k, v in r.items() if k != "per_unit"} for r in results]
+        (args.output / "rul_eval_summary.json").write_text(json.dumps(summary, indent=2))
+        print(f"✅ Sonuçlar -> {args.output}")
+
+    # Dağıtım öncesi kapı: eşik aşılırsa sıfırdan farklı çıkış kodu
+    failed = [r["dataset"] for r in results
+              if (args.max_rmse is not None and r["rmse"] > args.max_rmse)
+              or (args.max_score is not None and r["nasa_score"] > args.max_score)]
+    if failed:
+        print(f"❌ Eşik aşıldı: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Proje kök dizinini bul
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from config.paths import TRAIN_FILE, CACHE_DIR, SETTINGS_FILE
+from src.simulation.columnar import open_dataset
+from src.utils.logger import logger
+
+# Shared preprocessing stage for the training scripts.
+# One dataset file -> one feature table: parsed columns, RUL labels, health
+# masks and MinMax-scaled watchdog features. The table is cached under
+# CACHE_DIR keyed by (dataset file signature, settings hash), so every trainer
+# sees identical features and retraining skips the parse / label work.
+
+FEATURE_STORE_VERSION = 1
+
+# settings.json anahtarları: sadece bunlar değişirse tablo yeniden üretilir
+FEATURE_SETTINGS_KEYS = ("data_col_names", "drop_columns", "health_window")
+DEFAULT_HEALTH_WINDOW = {"healthy_max_cycle": 50, "degraded_min_cycle": 130}
+
+
+def load_settings() -> dict:
+    """The feature-relevant part of settings.json (read once per call)."""
+    with open(SETTINGS_FILE) as f:
+        settings = json.load(f)
+    feature_settings = {key: settings.get(key) for key in FEATURE_SETTINGS_KEYS}
+    feature_settings["health_window"] = {**DEFAULT_HEALTH_WINDOW, **(settings.get("health_window") or {})}
+    return feature_settings
+
+
+def settings_hash(settings: dict) -> str:
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _minmax(X: np.ndarray) -> tuple:
+    """MinMaxScaler(feature_range=(0, 1)).fit on X: (scale_, min_), same arithmetic as sklearn."""
+    data_min = np.nanmin(X, axis=0)
+    data_range = np.nanmax(X, axis=0) - data_min
+    # sklearn _handle_zeros_in_scale: sabit kolonların aralığı 1 kabul edilir
+    data_range[data_range < 10 * np.finfo(data_range.dtype).eps] = 1.0
+    scale = 1.0 / data_range
+    return scale, -data_min * scale
+
+
+class FeatureTable:
+    """
+    Preprocessed training view of one CMAPSS file.
+
+    values          : raw (n, n_columns) matrix, engine rows contiguous
+    rul             : RUL label per row (last cycle of the engine - cycle)
+    healthy         : cycle <= healthy_max_cycle (watchdog training rows)
+    degraded        : cycle >  degraded_min_cycle (watchdog positives)
+    stats_features  : watchdog features (settings.json drop_columns removed)
+    rul_features    : RUL model features (every column but unit_number / cycle)
+    scaled          : stats_features MinMax-scaled on the healthy rows
+    """
+
+    def __init__(self, source, key, columns, values, rul, healthy, degraded,
+                 stats_features, rul_features, scaled, scale, scale_min, settings):
+        self.source = Path(source)
+        self.key = key
+        self.columns = list(columns)
+        self.column_index = {c: i for i, c in enumerate(self.columns)}
+        self.values = values
+        self.rul = rul
+        self.healthy = healthy
+        self.degraded = degraded
+        self.stats_features = list(stats_features)
+        self.rul_features = list(rul_features)
+        self.scaled = scaled
+        self.scale = scale
+        self.scale_min = scale_min
+        self.settings = settings
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def validation(self) -> np.ndarray:
+        """Watchdog validation rows: certainly healthy or certainly degraded."""
+        return self.healthy | self.degraded
+
+    def matrix(self, features: list) -> np.ndarray:
+        return self.values[:, [self.column_index[c] for c in features]]
+
+    def frame(self, features: list = None) -> pd.DataFrame:
+        features = self.columns if features is None else list(features)
+        return pd.DataFrame(self.matrix(features), columns=features)
+
+    def column(self, name: str) -> np.ndarray:
+        return self.values[:, self.column_index[name]]
+
+    # --- Cache I/O ---
+    def save(self, path):
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                version=np.array(FEATURE_STORE_VERSION), key=np.array(self.key),
+                source=np.array(str(self.source)), columns=np.asarray(self.columns, dtype=str),
+                values=self.values, rul=self.rul, healthy=self.healthy, degraded=self.degraded,
+                stats_features=np.asarray(self.stats_features, dtype=str),
+                rul_features=np.asarray(self.rul_features, dtype=str),
+                scaled=self.scaled, scale=self.scale, scale_min=self.scale_min,
+                settings=np.array(json.dumps(self.settings)),
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as z:
+            if int(z["version"]) != FEATURE_STORE_VERSION:
+                raise ValueError(f"FeatureTable: unsupported format version {int(z['version'])}")
+            return cls(str(z["source"]), str(z["key"]), [str(c) for c in z["columns"]], z["values"],
+                       z["rul"], z["healthy"], z["degraded"], [str(c) for c in z["stats_features"]],
+                       [str(c) for c in z["rul_features"]], z["scaled"], z["scale"], z["scale_min"],
+                       json.loads(str(z["settings"])))
+
+
+def build_feature_table(source, settings: dict, key: str = None) -> FeatureTable:
+    """Runs the preprocessing stage (columnar parse + labels + masks + scaling)."""
+    columns = settings["data_col_names"]
+    dataset = open_dataset(source, columns)
+    values = np.asarray(dataset.values)
+    cycle = values[:, columns.index('cycle')]
+
+    # RUL = motorun son döngüsü - mevcut döngü (engine satırları ardışık: groupby/merge yok)
+    rul = np.empty(len(values), dtype=np.int32)
+    for start, end in dataset.unit_spans.values():
+        rul[start:end] = cycle[start:end].max() - cycle[start:end]
+
+    window = settings["health_window"]
+    healthy = cycle <= window["healthy_max_cycle"]
+    degraded = cycle > window["degraded_min_cycle"]
+
+    drop = set(settings.get("drop_columns") or ())
+    stats_features = [c for c in columns if c not in drop and c not in ('unit_number', 'cycle')]
+    rul_features = [c for c in columns if c not in ('unit_number', 'cycle')]
+
+    X = values[:, [columns.index(c) for c in stats_features]]
+    scale, scale_min = _minmax(X[healthy])
+    scaled = X * scale + scale_min
+
+    return FeatureTable(source, key or "", columns, values, rul, healthy, degraded,
+                        stats_features, rul_features, scaled, scale, scale_min, settings)
+
+
+def _cache_path(source: Path, signature: tuple, settings: dict) -> Path:
+    key = hashlib.sha256(json.dumps([FEATURE_STORE_VERSION, str(source), list(signature),
+                                     settings_hash(settings)]).encode()).hexdigest()[:16]
+    return CACHE_DIR / f"features_{source.stem}_{key}.npz"
+
+
+def load_feature_table(source=TRAIN_FILE, use_cache: bool = True) -> FeatureTable:
+    """
+    Feature table for `source`.
+    Cache hit: one .npz read. Miss (new data file or changed settings): rebuild and store.
+    """
+    source = Path(source)
+    if not source.exists():
+        raise FileNotFoundError(source)
+    settings = load_settings()
+    st = source.stat()
+    cache_path = _cache_path(source, (st.st_mtime_ns, st.st_size), settings)
+    key = cache_path.stem.rsplit("_", 1)[-1]
+
+    if use_cache and cache_path.exists():
+        try:
+            return FeatureTable.load(cache_path)
+        except Exception as e:
+            logger.warning(f"Feature cache okunamadı ({cache_path.name}): {e}")
+
+    table = build_feature_table(source, settings, key)
+    logger.info(f"Feature table built: {source.name} ({len(table)} rows, "
+                f"{len(table.stats_features)} watchdog / {len(table.rul_features)} RUL features)")
+    if use_cache:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        for stale in CACHE_DIR.glob(f"features_{source.stem}_*.npz"):
+            stale.unlink(missing_ok=True)
+        table.save(cache_path)
+    return table
+
+
+if __name__ == "__main__":
+    table = load_feature_table()
+    print(f"✅ {table.source.name}: {len(table)} satır | key={table.key}")
+    print(f"   healthy={int(table.healthy.sum())} degraded={int(table.degraded.sum())} "
+          f"| watchdog={len(table.stats_features)} RUL={len(table.rul_features)} özellik")
@@ -0,0 +1,213 @@
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Proje kök dizinini bul
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from config.paths import TRAIN_FILE, PROCESSED_DATA_DIR
+from models.training.feature_store import load_feature_table
+from src.simulation.columnar import open_dataset
+from src.stats_engine.guard import RISK_PARAMS, map_risk, grouped_ewma
+from src.stats_engine.watchdog import fold_residual_projection
+
+from sklearn.preprocessing import MinMaxScaler
+from sklearn.decomposition import PCA
+
+# Watchdog hyperparameter / threshold sweep.
+# One worker task = one (n_components, healthy window) fit. Inside a task the
+# SPE of every row is computed once (folded scaler+PCA projection); EWMA is
+# linear, so it is smoothed once per alpha on the raw SPE and divided by each
+# candidate threshold afterwards. Risk mapping and metrics are vectorized over
+# all engines. Workers read the dataset through the memory-mapped columnar cache.
+
+# Production config (train_stats.py + Orchestrator) -> "baseline" row in the results
+BASELINE = {"n_components": 2, "healthy_max_cycle": 50, "threshold_sigma": 2.0, "ewma_alpha": 0.2,
+            "steepness": RISK_PARAMS["steepness"], "medium": RISK_PARAMS["medium"]}
+
+DEFAULT_GRID = {
+    "n_components": [1, 2, 3, 4, 5],
+    "healthy_max_cycle": [30, 50, 70],
+    "threshold_sigma": [1.5, 2.0, 2.5, 3.0],
+    "ewma_alpha": [0.1, 0.2, 0.3, 0.5],
+    "steepness": [5.0, 10.0, 15.0],
+    "medium": [0.3, 0.4, 0.5],  # alarm = MONITORING ve üstü (risk_code >= 1)
+}
+
+PARAM_COLUMNS = list(DEFAULT_GRID)
+METRIC_COLUMNS = ["lead_time_mean", "lead_time_median", "detection_rate", "false_alarms_per_100", "recall"]
+
+# Worker başına paylaşılan (salt okunur) veri: initializer'da bir kez kurulur
+_shared = {}
+
+
+def _init_worker(source: str, columns: list, features: list, fail_window: int, alarm_code: int):
+    dataset = open_dataset(Path(source), columns)  # memmap: sayfalar süreçler arası paylaşılır
+    values = dataset.values
+    cycle = values[:, dataset.column_index['cycle']]
+    units = values[:, dataset.column_index['unit_number']].astype(np.int64)
+    starts = np.array([s for s, _ in dataset.unit_spans.values()], dtype=np.int64)
+    ends = np.array([e for _, e in dataset.unit_spans.values()], dtype=np.int64)
+    fail_cycle = cycle[ends - 1]  # run-to-failure: son cycle = arıza
+
+    first_row = np.zeros(len(cycle), dtype=bool)
+    first_row[starts] = True
+    rul = np.repeat(fail_cycle, ends - starts) - cycle
+
+    _shared.update(
+        X=values[:, [dataset.column_index[c] for c in features]],
+        cycle=cycle, units=units, starts=starts, fail_cycle=fail_cycle,
+        first_row=first_row, in_window=rul <= fail_window,
+        fail_window=int(fail_window), alarm_code=int(alarm_code),
+    )
+
+
+def alarm_metrics(alarm: np.ndarray) -> dict:
+    """
+    Fleet metrics of one alarm vector (rows ordered engine by engine).
+
+    lead_time      : fail_cycle - onset of the alarm episode still active at failure
+                     (0 for engines not in alarm at their last cycle)
+    false alarms   : alarm onsets before the failure window, per 100 cycles
+                     (same rule as PerformanceEvaluator)
+    recall         : share of failure-window rows in alarm
+    """
+    d = _shared
+    cycle, starts = d["cycle"], d["starts"]
+    onset = alarm & (d["first_row"] | ~np.r_[False, alarm[:-1]])
+
+    last_onset = np.maximum.reduceat(np.where(onset, cycle, -1.0), starts)
+    detected = alarm[np.r_[starts[1:], len(alarm)] - 1]
+    lead = np.where(detected, d["fail_cycle"] - last_onset, 0.0)
+
+    false_events = int(np.count_nonzero(onset & ~d["in_window"]))
+    return {
+        "lead_time_mean": float(lead.mean()),
+        "lead_time_median": float(np.median(lead)),
+        "detection_rate": float(detected.mean()),
+        "false_alarms_per_100": 100.0 * false_events / len(alarm),
+        "recall": float(alarm[d["in_window"]].mean()),
+    }
+
+
+def _fit_task(task: tuple) -> list:
+    """Evaluates every threshold / EWMA / risk combination of one (n_components, healthy window) fit."""
+    n_components, healthy_max_cycle, grid = task
+    d = _shared
+    healthy = d["cycle"] <= healthy_max_cycle
+    X_healthy = np.asarray(d["X"][healthy])
+
+    scaler = MinMaxScaler().fit(X_healthy)
+    pca = PCA(n_components=n_components).fit(scaler.transform(X_healthy))
+    A, b = fold_residual_projection(scaler.scale_, scaler.min_, pca.components_, pca.mean_)
+
+    residual = np.asarray(d["X"]) @ A + b
+    spe = np.einsum("ij,ij->i", residual, residual) / residual.shape[1]
+    mu, std = spe[healthy].mean(), spe[healthy].std()
+
+    rows = []
+    for alpha in grid["ewma_alpha"]:
+        memory = np.full(int(d["units"].max()) + 1, np.nan)
+        smoothed_spe = grouped_ewma(spe, d["units"], memory, alpha)
+        for sigma in grid["threshold_sigma"]:
+            threshold = mu + sigma * std
+            ratio = spe / threshold
+            smoothed = smoothed_spe / threshold
+            for steepness, medium in itertools.product(grid["steepness"], grid["medium"]):
+                _, code = map_risk(ratio, smoothed, {"steepness": steepness, "medium": medium})
+                rows.append({
+                    "n_components": n_components, "healthy_max_cycle": healthy_max_cycle,
+                    "threshold_sigma": sigma, "ewma_alpha": alpha, "steepness": steepness, "medium": medium,
+                    "threshold": float(threshold), **alarm_metrics(code >= d["alarm_code"]),
+                })
+    return rows
+
+
+def pareto_frontier(results: pd.DataFrame) -> pd.DataFrame:
+    """Configs not dominated on (lead time ↑, false alarms ↓, recall ↑), best lead time first."""
+    objectives = np.column_stack([results["lead_time_mean"], -results["false_alarms_per_100"], results["recall"]])
+    keep = np.ones(len(results), dtype=bool)
+    for i in range(len(results)):
+        if not keep[i]:
+            continue
+        dominated = (objectives >= objectives[i]).all(axis=1) & (objectives > objectives[i]).any(axis=1)
+        if dominated.any():
+            keep[i] = False
+    return results[keep].sort_values(["lead_time_mean", "false_alarms_per_100", "recall"],
+                                     ascending=[False, True, False])
+
+
+def run_sweep(source=TRAIN_FILE, grid: dict = None, fail_window: int = 30, alarm_code: int = 1,
+              workers: int = None) -> pd.DataFrame:
+    grid = {**DEFAULT_GRID, **(grid or {})}
+    table = load_feature_table(source)  # columnar cache + özellik listesi (train_stats ile aynı)
+    init_args = (str(Path(source)), table.columns, table.stats_features, fail_window, alarm_code)
+    tasks = [(n, hw, grid) for n in grid["n_components"] for hw in grid["healthy_max_cycle"]]
+
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        _init_worker(*init_args)
+        chunks = [_fit_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=_init_worker,
+                                 initargs=init_args) as pool:
+            chunks = list(pool.map(_fit_task, tasks))
+
+    results = pd.DataFrame([row for chunk in chunks for row in chunk])
+    is_baseline = np.ones(len(results), dtype=bool)
+    for key, value in BASELINE.items():
+        is_baseline &= np.isclose(results[key], value)
+    results["baseline"] = is_baseline
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel watchdog hyperparameter / threshold sweep")
+    parser.add_argument("--source", type=Path, default=TRAIN_FILE, help="run-to-failure dataset (train_FD00x)")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: cpu count)")
+    parser.add_argument("--fail-window", type=int, default=30, help="cycles before failure counted as positives")
+    parser.add_argument("--alarm-code", type=int, default=1, help="risk_code treated as an alarm (1 = MONITORING)")
+    parser.add_argument("--grid", type=Path, default=None, help="JSON file overriding DEFAULT_GRID entries")
+    parser.add_argument("--output", type=Path, default=PROCESSED_DATA_DIR / "watchdog_sweep.csv")
+    args = parser.parse_args()
+
+    grid = json.loads(args.grid.read_text()) if args.grid else None
+    n_configs = int(np.prod([len(v) for v in {**DEFAULT_GRID, **(grid or {})}.values()]))
+    print(f"🔎 Watchdog sweep: {n_configs} konfigürasyon | {args.source.name}")
+
+    t0 = time.perf_counter()
+    results = run_sweep(args.source, grid, args.fail_window, args.alarm_code, args.workers)
+    elapsed = time.perf_counter() - t0
+    frontier = pareto_frontier(results)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    results.to_csv(args.output, index=False)
+    frontier_path = args.output.with_name(args.output.stem + "_frontier.json")
+    frontier_path.write_text(json.dumps({
+        "source": str(args.source), "fail_window": args.fail_window, "alarm_code": args.alarm_code,
+        "configs": len(results), "elapsed_s": round(elapsed, 2),
+        "frontier": frontier[PARAM_COLUMNS + ["threshold"] + METRIC_COLUMNS].to_dict(orient="records"),
+    }, indent=2))
+
+    print(f"⏱️ {len(results)} konfigürasyon {elapsed:.1f}s içinde değerlendirildi "
+          f"({len(results) / elapsed:.0f} config/s)")
+    shown = PARAM_COLUMNS + METRIC_COLUMNS
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print("\n📌 Baseline (production):")
+        print(results.loc[results["baseline"], shown].to_string(index=False))
+        print(f"\n🏆 Pareto frontier ({len(frontier)} config, ilk 15):")
+        print(frontier[shown].head(15).to_string(index=False))
+    print(f"\n✅ Sonuçlar -> {args.output}\n✅ Frontier -> {frontier_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,50 +8,30 @@ import sys
 ROOT_DIR = Path(__file__).resolve().parent.parent.parent
 sys.path.append(str(ROOT_DIR))
 
-from config.paths import TRAIN_FILE, MODELS_DIR
+from config.paths import TRAIN_FILE, RUL_MODEL_PATH, RUL_FOREST_PATH
+from src.stats_engine.forest import FlatForest
+from models.training.feature_store import load_feature_table
+from models.training.evaluate_rul import evaluate
 
 
 def train_rul_model():
     print("🚀 RUL (Kalan Ömür) Modeli Eğitimi Başlıyor...")
 
-    # 1. Veriyi Yükle
-    # Sütun isimlerini tanımla (NASA Veriseti standardı)
-    cols = ['unit_number', 'cycle', 'setting1', 'setting2', 'setting3'] + [f'sensor_measurement{i}' for i in
-                                                                           range(1, 22)]
-    data_path = TRAIN_FILE
-
-    if not data_path.exists():
-        print(f"❌ HATA: Veri dosyası bulunamadı: {data_path}")
+    # 1. Veriyi Yükle (ortak feature store; train_stats ile aynı parse edilmiş tablo)
+    try:
+        table = load_feature_table(TRAIN_FILE)
+    except FileNotFoundError:
+        print(f"❌ HATA: Veri dosyası bulunamadı: {TRAIN_FILE}")
         return
+    print(f"✅ Veri yüklendi: {table.values.shape}")
 
-    df = pd.read_csv(data_path, sep='\s+', header=None, names=cols)
-    print(f"✅ Veri yüklendi: {df.shape}")
-
-    # 2. RUL (Remaining Useful Life) Hesapla
-    # Mantık: Her motorun ulaştığı maksimum döngü ömrüdür.
-    # RUL = Max_Cycle - Current_Cycle
-    print("⏳ RUL etiketleri hesaplanıyor...")
-
-    # Her motorun max döngüsünü bul
-    max_cycles = df.groupby('unit_number')['cycle'].max().reset_index()
-    max_cycles.columns = ['unit_number', 'max']
-
-    # Ana tabloya birleştir
-    df = df.merge(max_cycles, on='unit_number', how='left')
-
-    # RUL hesapla
-    df['RUL'] = df['max'] - df['cycle']
-
-    # Gereksiz sütunları at (max sütunu artık lazım değil)
-    df.drop('max', axis=1, inplace=True)
+    # 2. RUL (Remaining Useful Life) etiketleri feature store'da hazır
+    # Mantık: RUL = Max_Cycle - Current_Cycle (motor başına)
 
     # 3. Eğitim İçin Hazırlık
     # Eğitilecek özellikler (Sensörler + Ayarlar)
-    features = [c for c in df.columns if c not in ['unit_number', 'cycle', 'RUL']]
-    target = 'RUL'
-
-    X = df[features]
-    y = df[target]
+    X = table.frame(table.rul_features)
+    y = pd.Series(table.rul, name='RUL')
 
     # 4. Modeli Eğit (Random Forest Regressor)
     # Bu algoritma sensörler arasındaki karmaşık ilişkileri iyi yakalar
@@ -60,13 +40,29 @@ def train_rul_model():
     rf_model.fit(X, y)
 
     # 5. Modeli Kaydet
-    save_path = MODELS_DIR / 'rul_model.pkl'
+    # Tek satırlık tahminlerde thread dağıtımı sadece gecikme ekler
+    rf_model.n_jobs = 1
+    save_path = RUL_MODEL_PATH
     # Klasör yoksa oluştur
     save_path.parent.mkdir(parents=True, exist_ok=True)
 
     joblib.dump(rf_model, save_path)
     print(f"🎉 BAŞARILI: Model kaydedildi -> {save_path}")
-    print("Örnek Tahmin (Cycle 1):", rf_model.predict(X.iloc[[0]]))
+
+    # 6. Flat (sklearn'siz) export: serving tarafı bunu yükler
+    forest = FlatForest.from_sklearn(rf_model)
+    forest.save(RUL_FOREST_PATH)
+    print(f"🌲 Flat forest export -> {RUL_FOREST_PATH} ({forest.n_trees} trees, depth {forest.max_depth})")
+
+    sample = rf_model.predict(X.iloc[[0]])
+    flat_sample = forest.predict_one(X.iloc[0].to_numpy())
+    print("Örnek Tahmin (Cycle 1):", sample, "| flat:", flat_sample)
+    if sample[0] != flat_sample:
+        print("⚠️ UYARI: Flat forest tahmini sklearn ile birebir aynı değil!")
+
+    # 7. Test seti (RUL_FD00x ground truth): dağıtımdan önce doğruluk kontrolü
+    for r in evaluate(model_path=RUL_FOREST_PATH):
+        print(f"📏 {r['dataset']} test: RMSE={r['rmse']:.2f} | NASA score={r['nasa_score']:.1f} ({r['units']} unit)")
 
 
 if __name__ == "__main__":
@@ -1,6 +1,4 @@
-import json
-
-import pandas as pd
+import argparse
 import numpy as np
 import joblib
 import sys
@@ -10,8 +8,10 @@ from pathlib import Path
 ROOT_DIR = Path(__file__).resolve().parent.parent.parent
 sys.path.append(str(ROOT_DIR))
 
-from config.paths import TRAIN_FILE, WATCHDOG_MODEL_PATH, SCALER_PATH, SETTINGS_FILE
+from config.paths import TRAIN_FILE, WATCHDOG_MODEL_PATH, SCALER_PATH, WATCHDOG_FLAT_PATH
 from src.stats_engine.metrics import PerformanceEvaluator
+from src.stats_engine.watchdog import FlatWatchdog
+from models.training.feature_store import load_feature_table
 
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.decomposition import PCA
@@ -22,32 +22,28 @@ def train_watchdog():
     print("🚀 WATCHDOG EĞİTİMİ (FINAL - SAFETY BUFFER)")
     print("=" * 50)
 
-    # 1. VERİ YÜKLEME
-    col_names = json.load(open(SETTINGS_FILE)).get('data_col_names')
+    # 1. VERİ YÜKLEME (ortak feature store: parse + maskeler + ölçekleme tek seferde, cache'li)
     try:
-        df = pd.read_csv(TRAIN_FILE, sep='\s+', header=None, names=col_names)
+        table = load_feature_table(TRAIN_FILE)
     except FileNotFoundError:
         print(f"❌ HATA: Veri dosyası bulunamadı: {TRAIN_FILE}")
         return
 
     # 2. ÖN İŞLEME
-    drop_sensors = json.load(open(SETTINGS_FILE)).get('drop_columns')
-    features = [c for c in df.columns if c not in drop_sensors and c not in ['unit_number', 'cycle']]
-
-    # EĞİTİM: İlk 50 döngü (Sağlıklı)
-    healthy_data = df[df['cycle'] <= 50][features]
+    features = table.stats_features
 
-    # TEST: Kesin Sağlamlar (<=50) vs Kesin Bozuklar (>130)
-    val_mask = (df['cycle'] <= 50) | (df['cycle'] > 130)
-    X_val_raw = df.loc[val_mask, features]
-    y_true_val = (df.loc[val_mask, 'cycle'] > 130).astype(int).values
+    # EĞİTİM: İlk N döngü (Sağlıklı) -- settings.json health_window
+    # TEST: Kesin Sağlamlar vs Kesin Bozuklar
+    val_mask = table.validation
+    y_true_val = table.degraded[val_mask].astype(int)
 
     print(f"✅ Özellik Sayısı: {len(features)}")
 
-    # 3. SCALING (MinMax)
+    # 3. SCALING (MinMax) -- ölçeklenmiş matris feature store'dan gelir, scaler serving için kaydedilir
     scaler = MinMaxScaler()
-    X_train = scaler.fit_transform(healthy_data)
-    X_val = scaler.transform(X_val_raw)
+    scaler.fit(table.frame(features)[table.healthy])
+    X_train = table.scaled[table.healthy]
+    X_val = table.scaled[val_mask]
 
     # 4. İSTATİSTİKSEL MODEL (PCA - Bottleneck)
     pca = PCA(n_components=2)
@@ -83,7 +79,7 @@ def train_watchdog():
     evaluator.y_pred = list(y_pred_val)
     evaluator.y_prob = list(val_errors)
 
-    recall, acc, f1, auc = evaluator.generate_report()
+    recall, acc, f1, auc, *_ = evaluator.generate_report()  # + lead_time, far_100
 
     # 7. KAYIT (Recall > 0.60 MVP için kabulümüzdür, görsellik önemli)
     model_packet = {
@@ -95,7 +91,26 @@ def train_watchdog():
     joblib.dump(scaler, SCALER_PATH)
     joblib.dump(model_packet, WATCHDOG_MODEL_PATH)
     print(f"\n✅ Model Kaydedildi: {WATCHDOG_MODEL_PATH}")
+    export_flat(scaler, model_packet)
+
+
+def export_flat(scaler=None, model_packet=None):
+    """
+    Serving artifact: watchdog_flat.json + .npy (memory-mapped by StatsGuard, no sklearn).
+    Without arguments the existing pickles are converted (no retraining).
+    """
+    if scaler is None or model_packet is None:
+        scaler = joblib.load(SCALER_PATH)
+        model_packet = joblib.load(WATCHDOG_MODEL_PATH)
+    FlatWatchdog.from_sklearn(scaler, model_packet).save(WATCHDOG_FLAT_PATH)
+    print(f"✅ Flat Model Kaydedildi: {WATCHDOG_FLAT_PATH} (+ {WATCHDOG_FLAT_PATH.with_suffix('.npy').name})")
 
 
 if __name__ == "__main__":
-    train_watchdog()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Watchdog (MinMax + PCA) training")
+    parser.add_argument("--export-only", action="store_true",
+                        help="convert the existing scaler.pkl / watchdog_model.pkl to the flat artifact")
+    if parser.parse_args().export_only:
+        export_flat()
+    else:
+        train_watchdog()
\ No newline at end of file
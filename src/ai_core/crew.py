@@ -7,23 +7,35 @@ from pathlib import Path
 ROOT_DIR = Path(__file__).resolve().parent.parent.parent
 sys.path.append(str(ROOT_DIR))
 
-dotenv.load_dotenv(ROOT_DIR / '.env.local')
-groq_key = os.getenv("GROQ_API_KEY")
+from config.paths import CONFIG_DIR, AGENTS_FILE, TASKS_FILE
 
-if not groq_key or groq_key == "":
-    raise ValueError("🚨 GROQ_API_KEY bulunamadı! Lütfen .env dosyanızı kontrol edin.")
+GROQ_BASE_URL = "https://api.groq.com/openai/v1"
 
-os.environ["OPENAI_API_KEY"] = groq_key
-os.environ["OPENAI_BASE_URL"] = "https://api.groq.com/openai/v1"
-os.environ["OPENAI_API_BASE"] = "https://api.groq.com/openai/v1"
 
-from src.ai_core.tools import AnalysisTools
-from config.paths import CONFIG_DIR, AGENTS_FILE, TASKS_FILE
-from crewai import Agent, Task, Crew, Process
-from langchain_groq import ChatGroq
+def configure_groq() -> str:
+    """
+    Reads GROQ_API_KEY (.env.local) and points the OpenAI-compatible clients at Groq.
+    Called when a crew is built, so importing this module never fails on a missing key.
+    """
+    dotenv.load_dotenv(ROOT_DIR / '.env.local')
+    groq_key = os.getenv("GROQ_API_KEY")
+
+    if not groq_key or groq_key == "":
+        raise ValueError("🚨 GROQ_API_KEY bulunamadı! Lütfen .env dosyanızı kontrol edin.")
+
+    os.environ["OPENAI_API_KEY"] = groq_key
+    os.environ["OPENAI_BASE_URL"] = GROQ_BASE_URL
+    os.environ["OPENAI_API_BASE"] = GROQ_BASE_URL
+    return groq_key
+
 
 class JetEngineCrew:
     def __init__(self):
+        groq_key = configure_groq()
+
+        # LLM yığını (crewai / langchain_groq) sadece crew kurulurken yüklenir
+        from langchain_groq import ChatGroq
+
         # 2. GERÇEK MOTOR (Adres değiştirildiği için hatasız bağlanacak)
         self.llm = ChatGroq(
             api_key=groq_key,
@@ -38,10 +50,15 @@ class JetEngineCrew:
         with open(path, 'r') as file:
             return yaml.safe_load(file)
 
-    def run_mission(self, sensor_data, loss_score):
+    def run_mission(self, sensor_data, loss_score, deviating_sensors=None, predicted_rul=None):
         """
         Orchestrates the AI crew to analyze the failure.
+        deviating_sensors / predicted_rul are accepted for interface parity with
+        CachedJetEngineCrew (they only feed its fingerprint) and are ignored here.
         """
+        from crewai import Agent, Task, Crew, Process
+        from src.ai_core.tools import AnalysisTools
+
         sensor_analyst = Agent(
             role=self.agents_config['sensor_analyst']['role'],
             goal=self.agents_config['sensor_analyst']['goal'],
@@ -0,0 +1,331 @@
+import functools
+import os
+import queue
+import threading
+import time
+
+from src.utils.logger import logger
+
+# Background dispatch for the AI crew: the telemetry loop submits a mission and
+# keeps scoring; a bounded pool of worker threads runs the (slow) LLM round trips.
+
+
+def default_crew_factory(wait_timeout: float = 180.0):
+    """
+    Builds the crew backend for one worker thread.
+    JETGUARD_CREW_BACKEND=stub -> offline StubJetEngineCrew (latency via JETGUARD_STUB_LATENCY).
+    JETGUARD_CREW_CACHE=off    -> always call the backend (no MissionCache).
+    wait_timeout bounds how long a cache miss waits for an identical in-flight mission.
+    """
+    if os.getenv("JETGUARD_CREW_BACKEND", "").lower() == "stub":
+        from src.ai_core.stub import StubJetEngineCrew
+        crew = StubJetEngineCrew(latency=float(os.getenv("JETGUARD_STUB_LATENCY", "0.5")))
+    else:
+        # Import burada: crewai/langchain sadece gerçekten ihtiyaç olduğunda yüklenir
+        from src.ai_core.crew import JetEngineCrew
+        crew = JetEngineCrew()
+
+    if os.getenv("JETGUARD_CREW_CACHE", "on").lower() in ("off", "0", "false"):
+        return crew
+
+    from src.ai_core.mission_cache import CachedJetEngineCrew, get_mission_cache
+    return CachedJetEngineCrew(crew, get_mission_cache(), wait_timeout=wait_timeout)
+
+
+class DispatchHandle:
+    """Future-like handle for one crew mission."""
+
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
+    TIMED_OUT = "TIMED_OUT"
+    REJECTED = "REJECTED"
+
+    FINAL = (DONE, FAILED, CANCELLED, TIMED_OUT, REJECTED)
+
+    def __init__(self, key: tuple, sensor_data, loss_score, timeout: float, mission_kwargs: dict = None):
+        self.key = key
+        self.sensor_data = sensor_data
+        self.loss_score = loss_score
+        self.mission_kwargs = mission_kwargs or {}
+        self.timeout = float(timeout)
+        self.submitted_at = time.monotonic()
+        self.deadline = self.submitted_at + self.timeout
+        self.started_at = None
+        self.finished_at = None
+        self.report = None
+        self.error = None
+        self._status = self.PENDING
+        self._lock = threading.Lock()
+        self._event = threading.Event()
+
+    def _finish(self, status: str, report=None, error=None) -> bool:
+        """Moves the handle to a final state once; later transitions are ignored."""
+        with self._lock:
+            if self._status in self.FINAL:
+                return False
+            self._status = status
+            self.report = report
+            self.error = error
+            self.finished_at = time.monotonic()
+        self._event.set()
+        return True
+
+    def _start(self) -> bool:
+        with self._lock:
+            if self._status != self.PENDING:
+                return False
+            self._status = self.RUNNING
+            self.started_at = time.monotonic()
+            return True
+
+    @property
+    def status(self) -> str:
+        return self.poll()
+
+    def poll(self) -> str:
+        """Non-blocking status check (also applies the per-request timeout)."""
+        if self._status not in self.FINAL and time.monotonic() > self.deadline:
+            self._finish(self.TIMED_OUT, error=TimeoutError(f"Crew mission {self.key} exceeded {self.timeout:g}s"))
+        return self._status
+
+    def done(self) -> bool:
+        return self.poll() in self.FINAL
+
+    def cancel(self) -> bool:
+        """Cancels a queued mission; a running one is abandoned (its late result is dropped)."""
+        return self._finish(self.CANCELLED)
+
+    def result(self, timeout: float = None):
+        """Blocks until the mission finishes. Raises on failure, timeout or cancellation."""
+        wait = self.deadline - time.monotonic()
+        if timeout is not None:
+            wait = min(wait, timeout)
+        self._event.wait(max(wait, 0.0))
+        status = self.poll()
+
+        if status == self.DONE:
+            return self.report
+        if status in (self.PENDING, self.RUNNING):
+            raise TimeoutError(f"Crew mission {self.key} still {status.lower()}")
+        if status == self.CANCELLED:
+            raise RuntimeError(f"Crew mission {self.key} was cancelled")
+        raise self.error if self.error else RuntimeError(f"Crew mission {self.key}: {status}")
+
+    @property
+    def latency(self):
+        if self.finished_at is None:
+            return None
+        return self.finished_at - self.submitted_at
+
+
+class CrewDispatcher:
+    """
+    Bounded queue + worker pool for JetEngineCrew missions.
+    - submit() never blocks: a full queue returns a REJECTED handle
+    - missions are deduplicated by (engine_id, incident) while in flight
+    - every worker owns its own crew instance (LLM clients are not shared across threads)
+
+    A timeout only abandons the handle: a blocking LLM call cannot be interrupted,
+    so its worker stays occupied until the call returns. To keep `workers` threads
+    available, submit()/stats() start a replacement for every worker stuck in an
+    abandoned mission, at most `max_spare` extra threads in total; a stuck worker
+    exits when its call finally returns. When the spares are used up too, new
+    missions wait in the queue (and time out there).
+    """
+
+    IDLE_POLL = 0.5  # boşta bekleyen worker kapanışı en geç bu kadar sürede fark eder
+
+    def __init__(self, crew_factory=None, workers: int = 2, max_queue: int = 16, timeout: float = 180.0,
+                 max_spare: int = None):
+        self.crew_factory = crew_factory or functools.partial(default_crew_factory, wait_timeout=float(timeout))
+        self.timeout = float(timeout)
+        self.n_workers = int(workers)
+        self.max_spare = self.n_workers if max_spare is None else int(max_spare)
+        self._queue = queue.Queue(maxsize=int(max_queue))
+        self._inflight = {}
+        self._running = {}  # worker thread -> handle it is executing
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats = {"submitted": 0, "deduplicated": 0, "rejected": 0,
+                       "done": 0, "failed": 0, "timed_out": 0, "cancelled": 0, "replaced": 0}
+        self._latencies = []
+        self._spawned = 0
+        self._saturated_logged = False
+
+        self._workers = []
+        with self._lock:
+            for _ in range(self.n_workers):
+                self._spawn_worker()
+        logger.info(f"CrewDispatcher: {len(self._workers)} worker(s), queue={max_queue}, timeout={self.timeout:g}s")
+
+    def _spawn_worker(self):
+        """Starts one worker thread (caller holds _lock)."""
+        worker = threading.Thread(target=self._worker_loop, name=f"crew-worker-{self._spawned}", daemon=True)
+        self._spawned += 1
+        self._workers.append(worker)
+        worker.start()
+
+    def _abandoned(self) -> int:
+        """Workers still blocked in a mission whose handle already timed out / was cancelled (caller holds _lock)."""
+        return sum(1 for handle in self._running.values() if handle.done())
+
+    def _replace_stuck_workers(self):
+        with self._lock:
+            if self._closed:
+                return
+            stuck = self._abandoned()
+            while len(self._workers) - stuck < self.n_workers and len(self._workers) - self.n_workers < self.max_spare:
+                self._spawn_worker()
+                self._stats["replaced"] += 1
+                logger.warning(f"CrewDispatcher: {stuck} worker(s) stuck in abandoned missions, "
+                               f"started a replacement ({len(self._workers)} threads).")
+            saturated = len(self._workers) - stuck < self.n_workers
+            if saturated and not self._saturated_logged:
+                logger.error(f"CrewDispatcher: {stuck} worker(s) stuck and max_spare={self.max_spare} reached; "
+                             f"missions queue until a stuck call returns.")
+            self._saturated_logged = saturated
+
+    def submit(self, engine_id, incident, sensor_data, loss_score, timeout: float = None,
+               **mission_kwargs) -> DispatchHandle:
+        """
+        Queues a mission. Extra keyword arguments (e.g. deviating_sensors,
+        predicted_rul for the mission cache) are forwarded to run_mission.
+        """
+        key = (engine_id, incident)
+        self._replace_stuck_workers()
+        with self._lock:
+            existing = self._inflight.get(key)
+            if existing is not None and not existing.done():
+                self._stats["deduplicated"] += 1
+                return existing
+
+            handle = DispatchHandle(key, sensor_data, loss_score, timeout or self.timeout, mission_kwargs)
+            if self._closed:
+                handle._finish(DispatchHandle.REJECTED, error=RuntimeError("CrewDispatcher is shut down"))
+                return handle
+            try:
+                self._queue.put_nowait(handle)
+            except queue.Full:
+                self._stats["rejected"] += 1
+                logger.warning(f"CrewDispatcher: queue full, mission {key} rejected.")
+                handle._finish(DispatchHandle.REJECTED, error=RuntimeError("Crew dispatch queue is full"))
+                return handle
+
+            self._inflight[key] = handle
+            self._stats["submitted"] += 1
+        logger.info(f"CrewDispatcher: mission {key} queued (depth={self._queue.qsize()}).")
+        return handle
+
+    def _worker_loop(self):
+        me = threading.current_thread()
+        crew = None
+        while True:
+            try:
+                handle = self._queue.get(timeout=self.IDLE_POLL)
+            except queue.Empty:
+                # Kapanış bayrağı: kuyruk doluyken sentinel konamamış olabilir, boş kuyruk = çık
+                if self._closed:
+                    return
+                continue
+            if handle is None:
+                self._queue.task_done()
+                return
+            try:
+                if handle.done() or not handle._start():
+                    self._record(handle)
+                    continue
+
+                with self._lock:
+                    self._running[me] = handle
+                try:
+                    if crew is None:
+                        crew = self.crew_factory()
+                    report = crew.run_mission(handle.sensor_data, handle.loss_score, **handle.mission_kwargs)
+                    if not handle._finish(DispatchHandle.DONE, report=report):
+                        logger.warning(f"CrewDispatcher: late result for {handle.key} dropped ({handle.status}).")
+                except Exception as e:
+                    logger.error(f"CrewDispatcher: mission {handle.key} failed: {e}")
+                    handle._finish(DispatchHandle.FAILED, error=e)
+                finally:
+                    with self._lock:
+                        self._running.pop(me, None)
+                self._record(handle)
+            finally:
+                self._queue.task_done()
+
+            # Havuz yedek worker'la büyüdüyse (takılan çağrı geri döndü) fazlalık thread çıkar
+            with self._lock:
+                if not self._closed and len(self._workers) - self._abandoned() > self.n_workers:
+                    self._workers.remove(me)
+                    return
+
+    def _record(self, handle: DispatchHandle):
+        with self._lock:
+            status = handle.status
+            counter = {"DONE": "done", "FAILED": "failed", "TIMED_OUT": "timed_out", "CANCELLED": "cancelled"}.get(status)
+            if counter:
+                self._stats[counter] += 1
+            if status == DispatchHandle.DONE and handle.latency is not None:
+                self._latencies.append(handle.latency)
+                del self._latencies[:-500]  # son 500 görev yeterli
+            if self._inflight.get(handle.key) is handle:
+                del self._inflight[handle.key]
+
+    def stats(self) -> dict:
+        self._replace_stuck_workers()
+        with self._lock:
+            lat = sorted(self._latencies)
+            out = dict(self._stats)
+            out["workers"] = len(self._workers)
+            out["stuck_workers"] = self._abandoned()
+        out["queue_depth"] = self._queue.qsize()
+        out["inflight"] = len(self._inflight)
+        out["latency_p50"] = lat[len(lat) // 2] if lat else None
+        out["latency_max"] = lat[-1] if lat else None
+        return out
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False, timeout: float = None):
+        """
+        Stops the pool without ever blocking on a full queue. Queued missions still
+        run unless cancel_pending=True (they are then cancelled and removed from the
+        queue); workers exit once the dispatcher is closed and the queue is empty.
+        wait=True joins the workers for at most `timeout` seconds (default: the
+        mission timeout, after which every queued handle has expired); threads still
+        blocked in an LLM call are left behind (daemon) and logged.
+        """
+        with self._lock:
+            self._closed = True
+            if cancel_pending:
+                for handle in list(self._inflight.values()):
+                    if handle.status == DispatchHandle.PENDING:
+                        handle.cancel()
+            workers = list(self._workers)
+        if cancel_pending:
+            self._drain_queue()
+        for _ in workers:
+            try:
+                self._queue.put_nowait(None)  # hızlı uyandırma; dolu kuyrukta IDLE_POLL + boş kuyruk kuralı
+            except queue.Full:
+                break
+        if wait:
+            deadline = time.monotonic() + (self.timeout if timeout is None else float(timeout))
+            for w in workers:
+                w.join(max(deadline - time.monotonic(), 0.0))
+            stuck = [w.name for w in workers if w.is_alive()]
+            if stuck:
+                logger.warning(f"CrewDispatcher: shutdown left {len(stuck)} worker(s) blocked in a mission: {stuck}")
+
+    def _drain_queue(self):
+        """Removes every queued entry (cancelled handles keep the slots of a full queue)."""
+        while True:
+            try:
+                handle = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if handle is not None:
+                handle.cancel()
+                self._record(handle)
+            self._queue.task_done()
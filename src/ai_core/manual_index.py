@@ -0,0 +1,205 @@
+import math
+import re
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from config.paths import MANUAL_DIR, MANUAL_CORPUS_DIR
+from src.utils.logger import logger
+
+# In-memory BM25 index over the maintenance manual(s).
+# Built once per process, rebuilt only when a source file's mtime/size changes
+# (checked at most every `refresh_interval` seconds, never per query).
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+# "Sensor 11", "sensor_measurement11", "sensor11" -> "sensor11"
+_SENSOR_RE = re.compile(r"sensor[\s_]*(?:measurement)?[\s_#]*(\d+)")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from if in into is it of on or the to with what which how why "
+    "this that when where do does check".split()
+)
+MANUAL_SUFFIXES = (".txt", ".md")
+
+
+def _stem(token: str) -> str:
+    """Very small suffix stripper: 'stalls'/'stalled'/'stalling' -> 'stall', 'pressures' -> 'pressure'."""
+    # Önce çoğul eki, sonra -ing/-ed ("bearings" -> "bearing" -> "bear", tekil ile aynı kök)
+    # "-es" sadece s/x/z/ch/sh sonrası çoğul eki ("boxes" -> "box"); "stages" -> "stage" düz -s kuralıyla
+    if len(token) > 4 and token.endswith(("sses", "xes", "zes", "ches", "shes")):
+        token = token[:-2]
+    elif len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        token = token[:-1]
+    if len(token) > 5 and token.endswith("ing"):
+        return token[:-3]
+    if len(token) > 4 and token.endswith("ed"):
+        return token[:-2]
+    return token
+
+
+def tokenize(text: str) -> list:
+    text = _SENSOR_RE.sub(r"sensor\1", text.lower())
+    return [_stem(t) for t in _TOKEN_RE.findall(text) if t not in _STOPWORDS]
+
+
+class ManualHit:
+    __slots__ = ("score", "text", "source")
+
+    def __init__(self, score: float, text: str, source: str):
+        self.score = score
+        self.text = text
+        self.source = source
+
+
+class _IndexSnapshot:
+    """One immutable build: published with a single assignment, read once per query."""
+    __slots__ = ("paragraphs", "paragraph_source", "postings", "doc_norm")
+
+    def __init__(self, paragraphs: tuple, paragraph_source: tuple, postings: dict, doc_norm: np.ndarray):
+        self.paragraphs = paragraphs
+        self.paragraph_source = paragraph_source
+        self.postings = postings
+        self.doc_norm = doc_norm
+
+
+_EMPTY_SNAPSHOT = _IndexSnapshot((), (), {}, np.empty(0))
+
+
+class ManualIndex:
+    """
+    Paragraph-level BM25 index over one or more manual files/directories.
+    Paragraphs are blank-line separated blocks (one fault code per block in engine_manual.txt).
+    """
+
+    def __init__(self, sources, k1: float = 1.5, b: float = 0.75, refresh_interval: float = 5.0):
+        self.sources = [Path(s) for s in sources]
+        self.k1 = float(k1)
+        self.b = float(b)
+        self.refresh_interval = float(refresh_interval)
+
+        self._lock = threading.Lock()
+        self._signature = None
+        self._last_check = 0.0
+
+        # Rebuild sırasında okuyucular eski snapshot'ı tam olarak görür (search kilitsiz)
+        self._snapshot = _EMPTY_SNAPSHOT
+
+        self.refresh(force=True)
+
+    @property
+    def paragraphs(self) -> tuple:
+        return self._snapshot.paragraphs
+
+    @property
+    def paragraph_source(self) -> tuple:
+        return self._snapshot.paragraph_source
+
+    # --- Build ---
+    def _files(self) -> list:
+        files = []
+        for src in self.sources:
+            if src.is_dir():
+                files.extend(sorted(p for p in src.rglob("*") if p.suffix.lower() in MANUAL_SUFFIXES))
+            elif src.exists():
+                files.append(src)
+        return files
+
+    def _current_signature(self, files) -> tuple:
+        sig = []
+        for p in files:
+            st = p.stat()
+            sig.append((str(p), st.st_mtime_ns, st.st_size))
+        return tuple(sig)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Rebuilds the index if a source changed. Returns True when a rebuild happened."""
+        now = time.monotonic()
+        if not force and now - self._last_check < self.refresh_interval:
+            return False
+
+        with self._lock:
+            self._last_check = now
+            files = self._files()
+            signature = self._current_signature(files)
+            if not force and signature == self._signature:
+                return False
+            self._build(files)
+            self._signature = signature
+            return True
+
+    def _build(self, files):
+        t0 = time.perf_counter()
+        paragraphs, sources = [], []
+        for path in files:
+            content = path.read_text(errors="replace")
+            for block in re.split(r"\n\s*\n", content):
+                block = block.strip()
+                if block:
+                    paragraphs.append(block)
+                    sources.append(path.name)
+
+        postings = {}
+        doc_len = np.zeros(len(paragraphs), dtype=np.float64)
+        for doc_id, text in enumerate(paragraphs):
+            counts = Counter(tokenize(text))
+            doc_len[doc_id] = sum(counts.values())
+            for token, tf in counts.items():
+                postings.setdefault(token, ([], []))
+                postings[token][0].append(doc_id)
+                postings[token][1].append(tf)
+
+        n_docs = len(paragraphs)
+        avgdl = doc_len.mean() if n_docs else 1.0
+        doc_norm = self.k1 * (1.0 - self.b + self.b * doc_len / max(avgdl, 1e-9))
+        doc_norm.flags.writeable = False
+
+        # token -> (doc_ids, tf, idf); BM25 idf (Lucene varyantı, daima pozitif)
+        postings = {
+            token: (np.asarray(ids, dtype=np.int64), np.asarray(tfs, dtype=np.float64),
+                    math.log(1.0 + (n_docs - len(ids) + 0.5) / (len(ids) + 0.5)))
+            for token, (ids, tfs) in postings.items()
+        }
+        self._snapshot = _IndexSnapshot(tuple(paragraphs), tuple(sources), postings, doc_norm)
+        logger.info(f"ManualIndex: {n_docs} paragraphs / {len(postings)} terms from {len(files)} file(s) "
+                    f"in {(time.perf_counter() - t0) * 1e3:.1f} ms")
+
+    # --- Query ---
+    def search(self, query: str, top_k: int = 3) -> list:
+        self.refresh()
+        top_k = max(int(top_k), 1)
+        tokens = set(tokenize(query))
+        snapshot = self._snapshot  # tek okuma: eşzamanlı rebuild karışık bir görünüm veremez
+        if not tokens or not snapshot.paragraphs:
+            return []
+
+        scores = np.zeros(len(snapshot.paragraphs), dtype=np.float64)
+        k1 = self.k1
+        for token in tokens:
+            posting = snapshot.postings.get(token)
+            if posting is None:
+                continue
+            ids, tf, idf = posting
+            scores[ids] += idf * tf * (k1 + 1.0) / (tf + snapshot.doc_norm[ids])
+
+        hit_ids = np.flatnonzero(scores > 0)
+        if len(hit_ids) == 0:
+            return []
+        if len(hit_ids) > top_k:
+            hit_ids = hit_ids[np.argpartition(-scores[hit_ids], top_k - 1)[:top_k]]
+        hit_ids = hit_ids[np.argsort(-scores[hit_ids], kind="stable")]
+        return [ManualHit(float(scores[i]), snapshot.paragraphs[i], snapshot.paragraph_source[i]) for i in hit_ids]
+
+
+_manual_index = None
+_manual_index_lock = threading.Lock()
+
+
+def get_manual_index() -> ManualIndex:
+    """Process-wide index over engine_manual.txt + data/processed/manuals/ (if present)."""
+    global _manual_index
+    with _manual_index_lock:
+        if _manual_index is None:
+            _manual_index = ManualIndex([MANUAL_DIR, MANUAL_CORPUS_DIR])
+        return _manual_index
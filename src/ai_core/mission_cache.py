@@ -0,0 +1,207 @@
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from config.paths import AGENTS_FILE, TASKS_FILE, CREW_CACHE_PATH
+from src.utils.logger import logger
+
+# Disk-backed cache for crew mission reports.
+# Key = hash of a quantized incident fingerprint (deviating sensors, loss bucket,
+# RUL bucket) + hash of the prompt templates, so near-identical failure signatures
+# across the fleet reuse one LLM answer until the templates change.
+
+_template_hash_cache = {}
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def prompt_template_hash() -> str:
+    """sha256 over agents.yaml + tasks.yaml (recomputed only when their mtime changes)."""
+    stamp = tuple(os.stat(p).st_mtime_ns for p in (AGENTS_FILE, TASKS_FILE))
+    cached = _template_hash_cache.get(stamp)
+    if cached is None:
+        h = hashlib.sha256()
+        for p in (AGENTS_FILE, TASKS_FILE):
+            h.update(p.read_bytes())
+        cached = h.hexdigest()
+        _template_hash_cache.clear()
+        _template_hash_cache[stamp] = cached
+    return cached
+
+
+def mission_fingerprint(deviating_sensors, loss_score, predicted_rul, loss_buckets_per_octave: int = 4,
+                        rul_step: float = 10.0) -> dict:
+    """
+    Canonical, quantized description of an incident.
+    loss: log2 buckets (4 per doubling ~ 19% wide), RUL: fixed-width buckets.
+    """
+    loss = float(loss_score)
+    loss_bucket = int(math.floor(math.log2(loss) * loss_buckets_per_octave)) if loss > 0 else None
+
+    rul = float(predicted_rul) if predicted_rul is not None else -1.0
+    rul_bucket = int(rul // rul_step) if rul >= 0 else -1
+
+    return {
+        "sensors": sorted({str(s) for s in deviating_sensors}),
+        "loss_bucket": loss_bucket,
+        "rul_bucket": rul_bucket,
+        "templates": prompt_template_hash(),
+    }
+
+
+def fingerprint_key(fingerprint: dict) -> str:
+    canonical = json.dumps(fingerprint, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class MissionCache:
+    """
+    SQLite-backed report cache with TTL expiry and LRU eviction (by last access).
+    Safe to share between threads; several processes may use the same file.
+    """
+
+    def __init__(self, path=CREW_CACHE_PATH, max_entries: int = 512, ttl: float = 7 * 24 * 3600.0):
+        self.path = path
+        self.max_entries = int(max_entries)
+        self.ttl = float(ttl)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expired": 0}
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS missions ("
+            " key TEXT PRIMARY KEY, report TEXT NOT NULL, fingerprint TEXT NOT NULL,"
+            " created REAL NOT NULL, last_access REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_missions_access ON missions(last_access)")
+        self._conn.commit()
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT report, created FROM missions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            report, created = row
+            if now - created > self.ttl:
+                self._conn.execute("DELETE FROM missions WHERE key = ?", (key,))
+                self._conn.commit()
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE missions SET last_access = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._stats["hits"] += 1
+            return report
+
+    def put(self, key: str, report: str, fingerprint: dict):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO missions (key, report, fingerprint, created, last_access, hits)"
+                " VALUES (?, ?, ?, ?, ?, 0)",
+                (key, str(report), json.dumps(fingerprint, sort_keys=True), now, now)
+            )
+            self._stats["stores"] += 1
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        cur = self._conn.execute("DELETE FROM missions WHERE created < ?", (now - self.ttl,))
+        self._stats["expired"] += cur.rowcount
+        cur = self._conn.execute(
+            "DELETE FROM missions WHERE key IN ("
+            " SELECT key FROM missions ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+        self._stats["evictions"] += cur.rowcount
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM missions")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._stats)
+            out["entries"] = self._conn.execute("SELECT COUNT(*) FROM missions").fetchone()[0]
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate"] = out["hits"] / lookups if lookups else 0.0
+        return out
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def get_mission_cache() -> MissionCache:
+    """Process-wide MissionCache (one SQLite connection shared by all crew workers)."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = MissionCache()
+        return _shared_cache
+
+
+class CachedJetEngineCrew:
+    """
+    Drop-in wrapper around JetEngineCrew (or StubJetEngineCrew) that answers
+    repeated incident signatures from MissionCache instead of the LLM.
+    Calls without `deviating_sensors` cannot be fingerprinted and bypass the cache.
+    Every path returns the report as str (a hit can only return the stored text).
+    A call that finds the same signature in flight waits at most `wait_timeout`
+    seconds for it, then raises TimeoutError (None = wait indefinitely).
+    """
+
+    def __init__(self, crew, cache: MissionCache, wait_timeout: float = 180.0):
+        self.crew = crew
+        self.cache = cache
+        self.wait_timeout = wait_timeout
+        self.bypassed = 0
+
+    # Aynı anahtar için eşzamanlı miss'ler tek LLM çağrısını bekler (single-flight)
+    _inflight = {}
+    _inflight_lock = threading.Lock()
+
+    def run_mission(self, sensor_data, loss_score, deviating_sensors=None, predicted_rul=None):
+        if deviating_sensors is None:
+            self.bypassed += 1
+            return str(self.crew.run_mission(sensor_data, loss_score))
+
+        fingerprint = mission_fingerprint(deviating_sensors, loss_score, predicted_rul)
+        key = fingerprint_key(fingerprint)
+
+        deadline = None if self.wait_timeout is None else time.monotonic() + self.wait_timeout
+        while True:
+            report = self.cache.get(key)
+            if report is not None:
+                logger.info(f"MissionCache: HIT {key[:12]} ({', '.join(fingerprint['sensors']) or 'no sensors'})")
+                return report
+
+            with self._inflight_lock:
+                leader_done = self._inflight.get(key)
+                if leader_done is None:
+                    self._inflight[key] = threading.Event()
+                    break
+            # Başka bir worker aynı imzayı soruyor: bitmesini (en fazla wait_timeout) bekle, sonra cache'e bak
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+            if not leader_done.wait(remaining):
+                raise TimeoutError(f"MissionCache: identical mission {key[:12]} still running "
+                                   f"after {self.wait_timeout:g}s")
+
+        try:
+            # CrewOutput -> str: hit yolu da cache'teki metni döndürür (çağıran tek tip görür)
+            report = str(self.crew.run_mission(sensor_data, loss_score))
+            self.cache.put(key, report, fingerprint)
+            logger.info(f"MissionCache: stored {key[:12]}")
+            return report
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key).set()
@@ -0,0 +1,36 @@
+import time
+import random
+
+# Offline stand-in for JetEngineCrew: same run_mission() interface, no LLM/network.
+# Select it with JETGUARD_CREW_BACKEND=stub (see src/ai_core/dispatch.py).
+
+
+class StubJetEngineCrew:
+    """
+    Fake two-agent crew that returns a canned dossier after a configurable delay.
+    Used to test dispatch throughput/latency and caching without the remote LLM.
+    """
+
+    def __init__(self, latency: float = 0.5, jitter: float = 0.0, fail_rate: float = 0.0, seed: int = None):
+        self.latency = float(latency)
+        self.jitter = float(jitter)
+        self.fail_rate = float(fail_rate)
+        self.calls = 0
+        self._rng = random.Random(seed)
+
+    def run_mission(self, sensor_data, loss_score, deviating_sensors=None, predicted_rul=None):
+        # deviating_sensors / predicted_rul: cache fingerprint alanları, stub için kullanılmaz
+        self.calls += 1
+        delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        time.sleep(delay)
+
+        if self.fail_rate and self._rng.random() < self.fail_rate:
+            raise RuntimeError("StubJetEngineCrew: simulated LLM failure")
+
+        return (
+            "[STUB CREW REPORT]\n"
+            f"Statistical Anomaly Score: {loss_score}\n"
+            "Root Cause (simulated): HPC efficiency degradation.\n"
+            "Action: Reduce thrust, schedule borescope inspection of the HPC stages.\n"
+            f"Telemetry digest: {str(sensor_data)[:120]}"
+        )
@@ -1,5 +1,8 @@
+import re
+
 from crewai.tools import tool
-from config.paths import MANUAL_DIR
+from src.ai_core.manual_index import get_manual_index
+from src.stats_engine.envelope import get_sensor_envelope
 
 class AnalysisTools:
 
@@ -39,28 +42,25 @@ class AnalysisTools:
         Retrieves the nominal operating range (Min-Max) for a specific jet engine sensor.
         Useful for verifying if a sensor is out of bounds.
         """
-        # Bu veriler normalde bir veritabanından gelir. Simüle ediyoruz.
-        limits_db = {
-            "sensor_measurement2": {"name": "T24 (LPC Outlet Temp)", "min": 640, "max": 645},
-            "sensor_measurement3": {"name": "T30 (HPC Outlet Temp)", "min": 1570, "max": 1600},
-            "sensor_measurement4": {"name": "T50 (LPT Outlet Temp)", "min": 1390, "max": 1420},
-            "sensor_measurement11": {"name": "P30 (Static Pressure)", "min": 46, "max": 48},
-        }
+        # Eğitim verisinden türetilmiş zarf tablosu (DataGuard ile aynı kaynak)
+        envelope = get_sensor_envelope()
 
-        # Gelen string'i temizle (örn: 'Sensor 11' -> 'sensor_measurement11')
-        # Ajan bazen "Sensor 11" der, bazen "sensor_measurement11". Basit bir mapping:
-        key = sensor_name.lower().strip().replace(" ", "_")
-        if "sensor_" not in key and key.isdigit():  # Sadece "11" geldiyse
-            key = f"sensor_measurement{key}"
-        elif "sensor" in key and "measurement" not in key:  # "sensor11" geldiyse
-            key = key.replace("sensor", "sensor_measurement")
+        # Gelen string'i temizle (örn: 'Sensor 11', 'sensor11', '11' -> 'sensor_measurement11')
+        match = re.search(r"(\d+)", sensor_name or "")
+        key = f"sensor_measurement{int(match.group(1))}" if match else str(sensor_name).strip()
 
-        info = limits_db.get(key)
-        if info:
-            return f"LIMITS for {key} ({info['name']}): Min={info['min']}, Max={info['max']}"
-        else:
+        if envelope is None or key not in envelope.sensors:
             return f"No limit data found for {sensor_name}. Assume standard deviation check."
 
+        lines = []
+        for dataset in envelope.datasets:
+            info = envelope.limits(key, dataset)
+            lines.append(
+                f"LIMITS for {key} ({info['name']}) [{dataset}]: Min={info['min']:.4f}, Max={info['max']:.4f}, "
+                f"P01={info['p01']:.4f}, P99={info['p99']:.4f}, Median={info['p50']:.4f}, Std={info['std']:.4f}"
+            )
+        return "\n".join(lines)
+
     @tool("Consult Technical Manual")
     def consult_manual(search_query: str):
         """
@@ -68,24 +68,14 @@ class AnalysisTools:
         (e.g., 'Compressor', 'Vibration', 'Sensor 11').
         Returns the relevant section from the maintenance manual.
         """
-        manual_path = MANUAL_DIR
-
         try:
-            with open(manual_path, 'r') as f:
-                content = f.read()
-
-            # Basit Arama Mantığı
-            results = []
-            paragraphs = content.split('\n\n')  # Paragraflara böl
-
-            for p in paragraphs:
-                if search_query.lower() in p.lower():
-                    results.append(p)
+            # Paragraf bazlı BM25 indeks (süreç başına bir kez kurulur, sorguda dosya okunmaz)
+            results = get_manual_index().search(search_query, top_k=3)
 
             if not results:
                 return "No specific manual entry found for this query. Use standard protocol."
 
-            return "\n---\n".join(results)
+            return "\n---\n".join(hit.text for hit in results)
 
         except Exception as e:
             return f"Error reading manual: {str(e)}"
\ No newline at end of file
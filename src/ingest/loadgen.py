@@ -0,0 +1,170 @@
+import argparse
+import http.client
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from config.paths import RAW_DATA_DIR, SETTINGS_FILE
+from src.simulation.columnar import open_dataset
+from src.ingest.server import DEFAULT_PORT
+
+# Load generator for the ingest server: replays CMAPSS files as a live fleet.
+# Engines are interleaved by cycle (cycle 1 of every engine, then cycle 2, ...),
+# the way a fleet gateway would forward them. Units are split over connections
+# (unit % connections), so every engine is sent over one connection, in order.
+# Usage:
+#   python src/ingest/loadgen.py --files train_FD001.txt train_FD003.txt --rate 5000 --batch 200
+#   python src/ingest/loadgen.py --rate 0 --connections 4    # as fast as the server accepts
+
+
+def fleet_records(files: list, columns: list) -> list:
+    """Packets of every file, cycle-interleaved; unit numbers are offset so files don't collide."""
+    unit_idx, cycle_idx = columns.index("unit_number"), columns.index("cycle")
+    blocks, offset = [], 0
+    for name in files:
+        path = Path(name) if Path(name).exists() else RAW_DATA_DIR / name
+        values = np.array(open_dataset(path, columns).values, dtype=np.float64)
+        values[:, unit_idx] += offset
+        offset = int(values[:, unit_idx].max())
+        blocks.append(values)
+    values = np.vstack(blocks)
+    order = np.lexsort((values[:, unit_idx], values[:, cycle_idx]))  # önce cycle, sonra unit
+    values = values[order]
+
+    records = [dict(zip(columns, row)) for row in values.tolist()]
+    for record in records:
+        record["unit_number"] = int(record["unit_number"])
+        record["cycle"] = int(record["cycle"])
+    return records
+
+
+class _Sender(threading.Thread):
+    """One keep-alive connection: posts its batches at its share of the target rate."""
+
+    def __init__(self, host, port, batches, rate, max_retries=50):
+        super().__init__(daemon=True)
+        self.host, self.port = host, port
+        self.batches = batches
+        self.rate = rate  # packets/s (0 = sınırsız)
+        self.max_retries = max_retries
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.latencies = []
+
+    def run(self):
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        headers = {"Content-Type": "application/json"}
+        t_start = time.perf_counter()
+        for batch in self.batches:
+            if self.rate > 0:
+                # Hedef hız: bu batch'in planlanan gönderim zamanını bekle
+                delay = t_start + self.sent / self.rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            body = json.dumps(batch)
+            for attempt in range(self.max_retries + 1):
+                t0 = time.perf_counter()
+                conn.request("POST", "/ingest", body, headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status != 503:
+                    break
+                self.retries += 1
+                time.sleep(min(0.05 * 2 ** attempt, 1.0))  # backpressure: geri çekil, aynı batch'i tekrar dene
+            self.latencies.append(time.perf_counter() - t0)
+            if response.status == 202:
+                self.sent += len(batch)
+            else:
+                self.failed += len(batch)
+        conn.close()
+
+
+def get_stats(host: str, port: int) -> dict:
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    conn.request("GET", "/stats")
+    stats = json.loads(conn.getresponse().read())
+    conn.close()
+    return stats
+
+
+def run_load(records: list, host="127.0.0.1", port=DEFAULT_PORT, rate: float = 0.0, batch: int = 100,
+             connections: int = 1, wait: bool = True, wait_timeout: float = 600.0) -> dict:
+    """
+    Sends `records` and (wait=True) polls /stats until the server has processed them.
+    Returns send throughput, end-to-end throughput and request latency percentiles.
+    """
+    baseline = get_stats(host, port)["processed"]
+
+    # Unit -> bağlantı; her bağlantı kendi kayıtlarını sırayla, batch'ler halinde gönderir
+    lanes = [[] for _ in range(connections)]
+    for record in records:
+        lanes[record["unit_number"] % connections].append(record)
+    senders = [_Sender(host, port, [lane[i:i + batch] for i in range(0, len(lane), batch)], rate / connections)
+               for lane in lanes if lane]
+
+    t0 = time.perf_counter()
+    for sender in senders:
+        sender.start()
+    for sender in senders:
+        sender.join()
+    send_s = time.perf_counter() - t0
+
+    sent = sum(s.sent for s in senders)
+    processed, e2e_s = None, None
+    if wait:
+        deadline = time.monotonic() + wait_timeout
+        while time.monotonic() < deadline:
+            processed = get_stats(host, port)["processed"] - baseline
+            if processed >= sent:
+                break
+            time.sleep(0.05)
+        e2e_s = time.perf_counter() - t0
+
+    latencies = np.array([lat for s in senders for lat in s.latencies]) * 1e3
+    return {
+        "packets": len(records),
+        "sent": sent,
+        "failed": sum(s.failed for s in senders),
+        "retries_503": sum(s.retries for s in senders),
+        "send_s": round(send_s, 3),
+        "send_rate": round(sent / send_s, 1) if send_s > 0 else 0.0,
+        "processed": processed,
+        "e2e_s": None if e2e_s is None else round(e2e_s, 3),
+        "e2e_rate": None if not e2e_s else round(processed / e2e_s, 1),
+        "latency_ms_p50": round(float(np.percentile(latencies, 50)), 2) if len(latencies) else None,
+        "latency_ms_p99": round(float(np.percentile(latencies, 99)), 2) if len(latencies) else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CMAPSS replay load generator for the ingest server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--files", nargs="+", default=["train_FD001.txt"], help="CMAPSS files (RAW_DATA_DIR or paths)")
+    parser.add_argument("--rate", type=float, default=0.0, help="target packets/s over all connections (0 = max)")
+    parser.add_argument("--batch", type=int, default=100, help="packets per POST")
+    parser.add_argument("--connections", type=int, default=1)
+    parser.add_argument("--limit", type=int, default=None, help="send only the first N packets")
+    parser.add_argument("--no-wait", action="store_true", help="don't wait for the server to process the load")
+    args = parser.parse_args()
+
+    with open(SETTINGS_FILE) as f:
+        columns = json.load(f)["data_col_names"]
+    records = fleet_records(args.files, columns)[:args.limit]
+    print(f"🚚 {len(records)} paket | {', '.join(args.files)} | rate={args.rate or 'max'} "
+          f"batch={args.batch} connections={args.connections}")
+
+    result = run_load(records, args.host, args.port, args.rate, args.batch, args.connections, not args.no_wait)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+import argparse
+import json
+import multiprocessing as mp
+import queue
+import signal
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from src.utils.logger import logger
+
+# Sharded ingestion service for live telemetry.
+#   POST /ingest  body: one packet {...} or a batch [{...}, ...]  -> 202 {"accepted": n}
+#   GET  /stats   per-shard counters and queue depth
+#   GET  /health
+# Packets are hash-sharded by unit_number over N worker processes. Every worker
+# owns one Orchestrator (fleet mode: per-unit EWMA / alert state) for its units,
+# drains its queue into micro-batches and writes the results to the shared
+# event store (SQLite WAL, one connection per worker). One unit always maps to
+# the same worker and each worker queue is FIFO, so per-engine order is kept
+# for packets sent in order (e.g. one load generator connection per unit group).
+
+DEFAULT_PORT = 8765
+
+# Paylaşımlı sayaç düzeni (worker başına bir satır, sadece sahibi yazar)
+STAT_FIELDS = ("packets", "batches", "invalid", "busy_s", "last_ts")
+
+
+def shard_of(unit, n_shards: int) -> int:
+    """Stable shard of a unit_number (same in every process); unparsable units go to shard 0."""
+    try:
+        return int(unit) % n_shards
+    except (TypeError, ValueError, OverflowError):  # None, "abc", NaN, ±Infinity
+        return 0
+
+
+def packet_error(packet):
+    """Why a batch item cannot be routed (None if it can): not an object, or no usable unit_number."""
+    if not isinstance(packet, dict):
+        return f"expected a JSON object, got {type(packet).__name__}"
+    unit = packet.get("unit_number")
+    # bool int'in alt sınıfı; float sadece tam sayı değerliyse (3.0), NaN/Infinity değil
+    if isinstance(unit, bool) or not isinstance(unit, (int, float)) \
+            or (isinstance(unit, float) and not unit.is_integer()) or unit < 0:
+        return f"unit_number must be a non-negative integer, got {unit!r}"
+    return None
+
+
+def _worker_main(shard: int, inbox, slots, stats, run_id: str, record_events: bool, max_batch: int):
+    """Worker process: one Orchestrator, micro-batched diagnose_fleet over the shard's packets."""
+    # Ctrl-C tüm süreç grubuna gider: kapanışı ana süreç yönetir (kuyruk boşaltılır, sonra sentinel)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from src.orchestrator.manager import Orchestrator
+
+    orchestrator = Orchestrator(run_id=run_id, record_events=record_events)
+    base = shard * len(STAT_FIELDS)
+    logger.info(f"Ingest worker {shard} ready.")
+
+    running = True
+    while running:
+        packets = inbox.get()
+        if packets is None:
+            break
+        slots.release()
+        # Kuyrukta bekleyenleri tek batch'te topla (fleet skoru batch boyutuyla ölçeklenir)
+        while len(packets) < max_batch:
+            try:
+                more = inbox.get_nowait()
+            except queue.Empty:
+                break
+            if more is None:
+                running = False
+                break
+            slots.release()
+            packets.extend(more)
+
+        t0 = time.perf_counter()
+        try:
+            result = orchestrator.diagnose_fleet(packets)
+            invalid = int((result["status"] == "INVALID DATA").sum())
+        except Exception as e:
+            logger.error(f"Ingest worker {shard}: batch of {len(packets)} failed: {e}")
+            invalid = len(packets)
+        stats[base] += len(packets)
+        stats[base + 1] += 1
+        stats[base + 2] += invalid
+        stats[base + 3] += time.perf_counter() - t0
+        stats[base + 4] = time.time()
+
+    if orchestrator.event_store is not None:
+        orchestrator.event_store.flush()
+    logger.info(f"Ingest worker {shard} stopped ({int(stats[base])} packets).")
+
+
+class IngestService:
+    """Worker pool + shard routing. `submit` is thread-safe (called by the HTTP handler threads)."""
+
+    def __init__(self, workers: int = None, run_id: str = None, record_events: bool = True,
+                 max_batch: int = 1024, queue_size: int = 256, put_timeout: float = 5.0):
+        self.n_shards = int(workers or mp.cpu_count() or 1)
+        self.run_id = run_id or f"ingest-{time.strftime('%Y%m%d-%H%M%S')}"
+        self.record_events = record_events
+        self.max_batch = int(max_batch)
+        self.put_timeout = float(put_timeout)
+        self.started = time.time()
+
+        # spawn: her worker kendi logger/registry/event store'unu kurar (fork edilmiş thread/bağlantı yok)
+        ctx = mp.get_context("spawn")
+        self.stats = ctx.Array("d", self.n_shards * len(STAT_FIELDS), lock=False)
+        self.queues = [ctx.Queue() for _ in range(self.n_shards)]
+        # Kapasite: shard başına bekleyen batch sayısı (worker her get'te bir slot bırakır)
+        self.slots = [ctx.BoundedSemaphore(queue_size) for _ in range(self.n_shards)]
+        self.accepted = [0] * self.n_shards
+        self.rejected = 0
+        self.malformed = 0
+        self._lock = threading.Lock()
+        self.processes = [
+            ctx.Process(target=_worker_main, name=f"ingest-{i}", daemon=True,
+                        args=(i, self.queues[i], self.slots[i], self.stats, self.run_id, record_events,
+                              self.max_batch))
+            for i in range(self.n_shards)
+        ]
+
+    def start(self):
+        for proc in self.processes:
+            proc.start()
+        logger.info(f"IngestService: {self.n_shards} worker(s), run_id={self.run_id}")
+        return self
+
+    def submit(self, packets: list) -> int:
+        """
+        Routes a batch to its shards (order inside the batch is kept per shard).
+        All or nothing: a malformed item rejects the whole batch with ValueError
+        (client error, not retried); otherwise waits up to put_timeout for a free
+        slot on every target shard, else nothing is enqueued and queue.Full is
+        raised (client retries).
+        """
+        for i, packet in enumerate(packets):
+            error = packet_error(packet)
+            if error is not None:
+                with self._lock:
+                    self.malformed += len(packets)
+                raise ValueError(f"item {i}: {error}")
+
+        parts = [[] for _ in range(self.n_shards)]
+        for packet in packets:
+            parts[shard_of(packet["unit_number"], self.n_shards)].append(packet)
+
+        # Aynı shard'a giden iki isteğin sırası karışmasın: yönlendirme tek kilit altında
+        targets = [shard for shard, part in enumerate(parts) if part]
+        deadline = time.monotonic() + self.put_timeout
+        with self._lock:
+            taken = []
+            for shard in targets:
+                if not self.slots[shard].acquire(timeout=max(0.0, deadline - time.monotonic())):
+                    for held in taken:
+                        self.slots[held].release()
+                    self.rejected += len(packets)
+                    raise queue.Full
+                taken.append(shard)
+            for shard in targets:
+                self.queues[shard].put(parts[shard])
+                self.accepted[shard] += len(parts[shard])
+        return len(packets)
+
+    def snapshot(self) -> dict:
+        width = len(STAT_FIELDS)
+        shards = []
+        for i in range(self.n_shards):
+            row = dict(zip(STAT_FIELDS, self.stats[i * width:(i + 1) * width]))
+            try:
+                depth = self.queues[i].qsize()
+            except NotImplementedError:  # macOS
+                depth = -1
+            shards.append({"shard": i, "alive": self.processes[i].is_alive(), "accepted": self.accepted[i],
+                           "queue_batches": depth, **{k: (int(v) if k in ("packets", "batches", "invalid")
+                                                          else round(v, 3)) for k, v in row.items()}})
+        uptime = time.time() - self.started
+        processed = sum(s["packets"] for s in shards)
+        return {
+            "run_id": self.run_id,
+            "uptime_s": round(uptime, 1),
+            "accepted": sum(self.accepted),
+            "processed": processed,
+            "rejected": self.rejected,
+            "malformed": self.malformed,
+            "pending": sum(self.accepted) - processed,
+            "shards": shards,
+        }
+
+    def stop(self, timeout: float = 30.0):
+        """Drains the queues (sentinel after the pending batches) and joins the workers."""
+        for q in self.queues:
+            q.put(None)
+        for proc in self.processes:
+            proc.join(timeout)
+            if proc.is_alive():
+                logger.warning(f"IngestService: {proc.name} did not stop, terminating.")
+                proc.terminate()
+        logger.info(f"IngestService stopped: {self.snapshot()['processed']} packets processed.")
+
+
+class IngestHandler(BaseHTTPRequestHandler):
+    service: IngestService = None  # make_server bağlar
+    protocol_version = "HTTP/1.1"  # keep-alive: load generator tek bağlantı kullanır
+    disable_nagle_algorithm = True  # header + body ayrı yazılır; Nagle/delayed ACK istek başına ~40 ms ekler
+
+    def _reply(self, code: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._reply(200, self.service.snapshot())
+        elif self.path == "/health":
+            alive = all(p.is_alive() for p in self.service.processes)
+            self._reply(200 if alive else 503, {"ok": alive})
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/ingest":
+            self._reply(404, {"error": "not found"})
+            return
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        except (ValueError, json.JSONDecodeError) as e:
+            self._reply(400, {"error": f"invalid JSON: {e}"})
+            return
+        packets = payload if isinstance(payload, list) else [payload]
+        try:
+            accepted = self.service.submit(packets)
+        except queue.Full:
+            self._reply(503, {"error": "ingest queues full, retry later"})  # backpressure
+            return
+        except ValueError as e:
+            self._reply(400, {"error": f"invalid batch: {e}"})
+            return
+        self._reply(202, {"accepted": accepted})
+
+    def log_message(self, fmt, *args):
+        pass  # istek başına access log yok (yük altında log kuyruğunu doldurur)
+
+
+def make_server(service: IngestService, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    handler = type("BoundIngestHandler", (IngestHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded multi-process telemetry ingestion server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes / shards (default: cpu count)")
+    parser.add_argument("--run-id", default=None, help="run_id written with every event")
+    parser.add_argument("--no-events", action="store_true", help="do not write results to the event store")
+    parser.add_argument("--max-batch", type=int, default=1024, help="max packets per diagnose_fleet call")
+    parser.add_argument("--queue-size", type=int, default=256, help="pending batches per shard before 503")
+    args = parser.parse_args()
+
+    service = IngestService(args.workers, args.run_id, not args.no_events, args.max_batch, args.queue_size).start()
+    server = make_server(service, args.host, args.port)
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    print(f"📡 Ingest server: http://{args.host}:{args.port}/ingest | {service.n_shards} worker | "
+          f"run_id={service.run_id}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+        print(f"✅ {json.dumps({k: v for k, v in service.snapshot().items() if k != 'shards'})}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config.paths import RAW_DATA_DIR, CACHE_DIR, SETTINGS_FILE
+from src.simulation.columnar import open_dataset
+from src.stats_engine.registry import get_model_registry
+from src.utils.logger import logger
+
+# Fleet overview: every unit of a dataset scored in one diagnose_fleet pass and
+# reduced to one row per engine. Results are cached on disk per
+# (dataset file signature, model version).
+
+FLEET_CACHE_VERSION = 1
+
+FLEET_SUMMARY_COLUMNS = ["unit_number", "cycles", "last_cycle", "status", "priority", "max_priority",
+                         "risk_score", "ratio", "predicted_rul", "first_warning_cycle", "first_critical_cycle"]
+
+
+def available_datasets() -> list:
+    """train_FD00x / test_FD00x files present under data/raw."""
+    return sorted(p for p in RAW_DATA_DIR.glob("*_FD00*.txt") if not p.name.startswith("RUL_"))
+
+
+def model_version() -> str:
+    """
+    Short hash over the checksums of the artifacts the Orchestrator actually uses
+    (from the shared model registry); changes whenever a model is retrained.
+    """
+    registry = get_model_registry()
+    registry.check()
+    if registry.get("watchdog_flat") is None:  # export yoksa StatsGuard pickle'lara düşer
+        registry.get("scaler")
+        registry.get("watchdog")
+    registry.get("sensor_envelope")
+    registry.rul_model()
+    return registry.fingerprint()
+
+
+def summarize_fleet(diagnosis: pd.DataFrame) -> pd.DataFrame:
+    """Reduces a diagnose_fleet frame to one row per unit (state at its last cycle)."""
+    if diagnosis.empty:
+        return pd.DataFrame(columns=FLEET_SUMMARY_COLUMNS)
+
+    diag = diagnosis.sort_values(["unit_number", "cycle"], kind="stable")
+    units = diag["unit_number"].to_numpy()
+    cycles = diag["cycle"].to_numpy()
+    priority = diag["priority"].to_numpy()
+
+    starts = np.flatnonzero(np.r_[True, units[1:] != units[:-1]])
+    ends = np.r_[starts[1:], len(units)] - 1
+    last = diag.iloc[ends]
+
+    def first_cycle(flag: np.ndarray) -> np.ndarray:
+        # unit başına ilk True satırın cycle'ı (yoksa -1)
+        masked = np.where(flag, cycles, np.iinfo(np.int64).max)
+        first = np.minimum.reduceat(masked, starts)
+        return np.where(first == np.iinfo(np.int64).max, -1, first)
+
+    return pd.DataFrame({
+        "unit_number": units[starts],
+        "cycles": ends - starts + 1,
+        "last_cycle": cycles[ends],
+        "status": last["status"].to_numpy(),
+        "priority": last["priority"].to_numpy(),
+        "max_priority": np.maximum.reduceat(priority, starts),
+        "risk_score": last["risk_score"].to_numpy(),
+        "ratio": last["ratio"].to_numpy(),
+        "predicted_rul": last["predicted_rul"].to_numpy(),
+        "first_warning_cycle": first_cycle(priority >= 2),
+        "first_critical_cycle": first_cycle(priority == 4),
+    })
+
+
+def _cache_path(source: Path, signature: tuple, version: str) -> Path:
+    key = hashlib.sha256(json.dumps([FLEET_CACHE_VERSION, str(source), list(signature), version]).encode())
+    return CACHE_DIR / f"fleet_{source.stem}_{key.hexdigest()[:16]}.pkl"
+
+
+def score_fleet(source, orchestrator=None, use_cache: bool = True) -> pd.DataFrame:
+    """
+    Per-unit fleet summary for one dataset file.
+    Cache hit: one pickle read. Miss: one diagnose_fleet pass over every row.
+    """
+    source = Path(source)
+    columns = json.load(open(SETTINGS_FILE)).get('data_col_names')
+    dataset = open_dataset(source, columns)
+    cache_path = _cache_path(source, dataset.signature, model_version())
+
+    if use_cache and cache_path.exists():
+        try:
+            return pd.read_pickle(cache_path)
+        except Exception as e:
+            logger.warning(f"Fleet cache okunamadı ({cache_path.name}): {e}")
+
+    if orchestrator is None:
+        from src.orchestrator.manager import Orchestrator
+        orchestrator = Orchestrator(record_events=False)
+
+    t0 = time.perf_counter()
+    orchestrator.reset_fleet()
+    summary = summarize_fleet(orchestrator.diagnose_fleet(dataset.to_frame()))
+    logger.info(f"Fleet scored: {source.name} ({len(dataset.values)} rows, {len(summary)} units) "
+                f"in {time.perf_counter() - t0:.2f}s")
+
+    if use_cache:
+        for stale in CACHE_DIR.glob(f"fleet_{source.stem}_*.pkl"):
+            stale.unlink(missing_ok=True)
+        tmp = cache_path.with_name(cache_path.name + ".tmp")
+        summary.to_pickle(tmp)
+        os.replace(tmp, cache_path)
+    return summary
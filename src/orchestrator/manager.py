@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from pathlib import Path
 import sys
@@ -7,30 +8,91 @@ sys.path.append(str(ROOT_DIR))
 
 from src.utils.logger import logger
 from src.stats_engine.guard import DataGuard, StatsGuard
+from src.stats_engine.forest import FlatForest
+from src.stats_engine.registry import get_model_registry
+from src.utils.event_store import get_event_store
+
+# StatsGuard risk seviyesi -> (status, priority, color)
+LEVEL_MAP = {
+    "LOW": ("NORMAL", 1, "green"),
+    "MEDIUM": ("MONITORING", 2, "orange"),
+    "HIGH": ("WARNING", 3, "orange"),
+    "CRITICAL": ("CRITICAL FAILURE", 4, "red"),
+}
+
+# Aynı politika, StatsGuard.risk_code (0-3) ile indekslenen diziler olarak
+_CODE_STATUS = np.array([LEVEL_MAP[lvl][0] for lvl in ("LOW", "MEDIUM", "HIGH", "CRITICAL")], dtype=object)
+_CODE_PRIORITY = np.array([LEVEL_MAP[lvl][1] for lvl in ("LOW", "MEDIUM", "HIGH", "CRITICAL")], dtype=np.int8)
+_CODE_COLOR = np.array([LEVEL_MAP[lvl][2] for lvl in ("LOW", "MEDIUM", "HIGH", "CRITICAL")], dtype=object)
+
+# Zarf dışı (training envelope + margin) ama fiziksel olarak mümkün okuma: en az WARNING
+ENVELOPE_ALERT = ("SENSOR OUT OF ENVELOPE", 3, "orange")
 
 
 class Orchestrator:
-    def __init__(self):
+    def __init__(self, run_id: str = None, record_events: bool = True):
         logger.info("Orchestrator başlatılıyor...")
 
+        # Her teşhis sonucu olay deposuna (SQLite, DB_LOG_PATH) yazılır
+        self.run_id = run_id
+        self.event_store = get_event_store() if record_events else None
+
+        # Modeller süreç genelindeki registry'den paylaşımlı gelir (oturum başına kopya yok)
+        self.registry = get_model_registry()
         self.data_guard = DataGuard()
-        self.stats_guard = StatsGuard(use_ewma=True, ewma_alpha=0.2)
+        self.stats_guard = StatsGuard(use_ewma=True, ewma_alpha=0.2, registry=self.registry)
 
         # AI Ekibinin RUL (Kestirimci Bakım) Modeli
-        self.rul_model_path = ROOT_DIR / 'models' / 'saved' / 'rul_model.pkl'
-        self.rul_model = None
-        try:
-            import joblib
-            self.rul_model = joblib.load(self.rul_model_path)
-            logger.info("✅ RUL Tahmin Modeli Yüklendi.")
-        except Exception:
+        # Önce flat forest (sklearn gerektirmez), yoksa joblib pickle
+        self.rul_model = self.registry.rul_model()
+        if self.rul_model is not None:
+            logger.info(f"✅ RUL Tahmin Modeli Yüklendi ({type(self.rul_model).__name__}).")
+        else:
             logger.warning(
                 "⚠️ RUL Modeli yok/okunamadı. predicted_rul=-1 dönecek.")
+        self._model_generation = self.registry.generation
+
+        # Fleet modu: unit_number ile indekslenen kompakt durum dizileri
+        self._unit_priority = np.zeros(1, dtype=np.int8)        # son görülen priority
+        self._unit_first_alert = np.full(1, -1, dtype=np.int32)  # ilk priority>=2 cycle'ı
+        self._unit_last_cycle = np.full(1, -1, dtype=np.int32)
+
+    def refresh_models(self) -> bool:
+        """
+        Picks up retrained artifacts (registry hot reload). Cheap when nothing
+        changed: the registry stats files at most every check_interval seconds.
+        EWMA / fleet state is kept across the swap.
+        """
+        generation = self.registry.check()
+        if generation == self._model_generation:
+            return False
+        self._model_generation = generation
+        self.stats_guard.load_models()
+        self.data_guard.reload_bounds()
+        self.rul_model = self.registry.rul_model()
+        logger.info(f"Orchestrator: models refreshed (generation {generation}).")
+        return True
+
+    def predict_rul(self, data_packet: dict) -> float:
+        """Single-packet RUL. FlatForest skips the DataFrame/sklearn round trip."""
+        if isinstance(self.rul_model, FlatForest):
+            return self.rul_model.predict_one(self.rul_model.vector(data_packet))
+
+        df = pd.DataFrame([data_packet])
+        rul_input = df.drop(columns=['unit_number', 'cycle'], errors='ignore')
+        return float(self.rul_model.predict(rul_input)[0])
 
     def diagnose(self, data_packet: dict) -> dict:
-        # 1. Veri Bütünlüğü Kontrolü (DataGuard)
+        self.refresh_models()
+        result = self._diagnose(data_packet)
+        if self.event_store is not None:
+            packet = data_packet or {}
+            self.event_store.record(result, packet.get('unit_number'), packet.get('cycle'), self.run_id)
+        return result
+
+    def _diagnose(self, data_packet: dict) -> dict:
+        # 1. Veri Bütünlüğü Kontrolü (DataGuard; red logları ValidationReporter'da hız sınırlı özetlenir)
         if not self.data_guard.validate(data_packet):
-            logger.warning("Orchestrator: Geçersiz veri paketi reddedildi.")
             return {
                 "status": "INVALID DATA", "priority": 0, "color": "gray",
                 "loss": 0.0, "threshold": self.stats_guard.threshold,
@@ -41,10 +103,7 @@ class Orchestrator:
         predicted_rul = -1.0
         if self.rul_model is not None:
             try:
-                df = pd.DataFrame([data_packet])
-                rul_input = df.drop(columns=['unit_number', 'cycle'],
-                                    errors='ignore')
-                predicted_rul = float(self.rul_model.predict(rul_input)[0])
+                predicted_rul = self.predict_rul(data_packet)
             except Exception as e:
                 logger.error(f"RUL Tahmin Hatası: {e}")
 
@@ -60,14 +119,7 @@ class Orchestrator:
         # 4. İstatistikten Gelen Kararı UI İçin Çevirme (Policy Mapping)
         risk_level = stats["risk_level"]
 
-        level_map = {
-            "LOW": ("NORMAL", 1, "green"),
-            "MEDIUM": ("MONITORING", 2, "orange"),
-            "HIGH": ("WARNING", 3, "orange"),
-            "CRITICAL": ("CRITICAL FAILURE", 4, "red"),
-        }
-
-        status, prio, color = level_map.get(risk_level, ("UNKNOWN", 0, "gray"))
+        status, prio, color = LEVEL_MAP.get(risk_level, ("UNKNOWN", 0, "gray"))
 
         # Ek Güvenlik: İstatistik "Normal" dese bile AI "RUL çok düşük" derse önceliği artır
         # Ek Güvenlik 1: RUL 20'nin altındaysa Sarı Alarm (Warning) ver
@@ -82,16 +134,25 @@ class Orchestrator:
             prio = 4
             color = "red"
             logger.critical(
-                f"RUL Tükendi ({predicted_rul:.1f}). AI Crew göreve çağrılıyor!")
+                f"RUL Tükendi ({predicted_rul:.1f}). AI Crew göreve çağrılıyor!",
+                extra={"unit": data_packet.get('unit_number'), "cycle": data_packet.get('cycle'),
+                       "rul": predicted_rul, "priority": prio})
+
+        # Ek Güvenlik 3: zarf dışı okuma reddedilmez, skorlanır; daha uç bir değer alarmı susturamaz
+        if prio < ENVELOPE_ALERT[1] and self.data_guard.out_of_envelope(data_packet)[0]:
+            status, prio, color = ENVELOPE_ALERT
 
         # 5. Loglama
         current_cycle = data_packet.get('cycle')
         log_msg = f"Cycle {current_cycle} | Risk: {stats['risk_score']:.3f} | Ratio: {stats['ratio']:.2f} | RUL: {predicted_rul:.1f}"
 
-        if prio == 4:
-            logger.critical(f"CRITICAL FAILURE | {log_msg}")
-        elif prio >= 2:
-            logger.warning(f"{status} | {log_msg}")
+        if prio >= 2:
+            extra = {"unit": data_packet.get('unit_number'), "cycle": current_cycle, "spe": stats["spe"],
+                     "ratio": stats["ratio"], "rul": predicted_rul, "priority": prio}
+            if prio == 4:
+                logger.critical(f"CRITICAL FAILURE | {log_msg}", extra=extra)
+            else:
+                logger.warning(f"{status} | {log_msg}", extra=extra)
 
         # 6. app.py'ın beklediği final sözlük (dictionary)
         return {
@@ -104,4 +165,170 @@ class Orchestrator:
             "priority": prio,
             "color": color,
             "predicted_rul": predicted_rul
-        }
\ No newline at end of file
+        }
+
+    # --- FLEET MODE ---
+    def _grow_fleet_state(self, max_unit: int):
+        needed = max_unit + 1
+        if needed <= len(self._unit_priority):
+            return
+        size = max(needed, 2 * len(self._unit_priority))
+        pad = size - len(self._unit_priority)
+        self._unit_priority = np.concatenate([self._unit_priority, np.zeros(pad, dtype=np.int8)])
+        self._unit_first_alert = np.concatenate([self._unit_first_alert, np.full(pad, -1, dtype=np.int32)])
+        self._unit_last_cycle = np.concatenate([self._unit_last_cycle, np.full(pad, -1, dtype=np.int32)])
+
+    def diagnose_fleet(self, packets, validated: bool = False) -> pd.DataFrame:
+        """
+        Batch diagnosis for an interleaved telemetry feed from many engines.
+
+        packets: list of packet dicts or a DataFrame with the same columns.
+        validated=True skips DataGuard for packets that already passed
+        DataGuard.check (e.g. the pipeline's validate stage).
+        Every engine keeps its own EWMA (StatsGuard) and alert state, indexed by
+        unit_number, so one Orchestrator (one set of loaded models) serves the
+        whole fleet. Returns one row per packet, in input order, with the same
+        fields as `diagnose` plus unit_number and cycle.
+        """
+        self.refresh_models()
+        frame = packets if isinstance(packets, pd.DataFrame) else pd.DataFrame.from_records(packets)
+        n = len(frame)
+        if n == 0:
+            return pd.DataFrame(columns=["unit_number", "cycle", "spe", "threshold", "ratio", "risk_score",
+                                         "status", "priority", "color", "predicted_rul"])
+
+        # 1. Veri Bütünlüğü (vektörel; red logları DataGuard'da özetlenir)
+        if 'unit_number' not in frame.columns:
+            logger.error("Orchestrator: Fleet batch missing column 'unit_number'.")
+            valid = np.zeros(n, dtype=bool)
+        else:
+            valid = np.ones(n, dtype=bool) if validated else self.data_guard.validate_batch(frame)[0]
+            valid &= frame['unit_number'].notna().to_numpy()
+
+        units = pd.to_numeric(frame['unit_number'], errors="coerce").fillna(-1).to_numpy(dtype=np.int64) \
+            if 'unit_number' in frame.columns else np.full(n, -1, dtype=np.int64)
+        cycles = pd.to_numeric(frame['cycle'], errors="coerce").fillna(-1).to_numpy(dtype=np.int64) \
+            if 'cycle' in frame.columns else np.full(n, -1, dtype=np.int64)
+
+        status = np.full(n, "INVALID DATA", dtype=object)
+        priority = np.zeros(n, dtype=np.int8)
+        color = np.full(n, "gray", dtype=object)
+        spe = np.zeros(n)
+        ratio = np.zeros(n)
+        risk_score = np.zeros(n)
+        predicted_rul = np.full(n, -1.0)
+
+        if valid.any():
+            good = frame.loc[valid]
+
+            # 2. RUL Tahmini (tek predict çağrısı)
+            if self.rul_model is not None:
+                try:
+                    rul_input = good.drop(columns=['unit_number', 'cycle'], errors='ignore')
+                    names = getattr(self.rul_model, "feature_names_in_", None)
+                    if names is not None:
+                        rul_input = rul_input[list(names)]
+                    predicted_rul[valid] = self.rul_model.predict(rul_input)
+                except Exception as e:
+                    logger.error(f"RUL Tahmin Hatası (fleet): {e}")
+
+            # 3. İstatistiksel Motor (unit bazında EWMA)
+            stats = self.stats_guard.score_batch(good[self.stats_guard.features], units[valid]) \
+                if self.stats_guard.ready else {"ok": False}
+            if stats.get("ok") is False:
+                stats_ok = np.zeros(len(good), dtype=bool)
+            else:
+                stats_ok = stats["ok"]
+
+            rows = np.flatnonzero(valid)
+            scored = rows[stats_ok]
+            status[rows[~stats_ok]] = "MISSING FEATURES"
+
+            if len(scored):
+                code = stats["risk_code"][stats_ok]
+                spe[scored] = stats["spe"][stats_ok]
+                ratio[scored] = stats["ratio"][stats_ok]
+                risk_score[scored] = stats["risk_score"][stats_ok]
+                status[scored] = _CODE_STATUS[code]
+                priority[scored] = _CODE_PRIORITY[code]
+                color[scored] = _CODE_COLOR[code]
+
+                # 4. RUL güvenlik kuralları (diagnose ile aynı)
+                rul = predicted_rul[scored]
+                low_rul = (rul > 5) & (rul <= 20) & (priority[scored] < 4)
+                end_of_life = (rul >= 0) & (rul <= 5)
+
+                status[scored[low_rul]] = "LOW RUL WARNING"
+                priority[scored[low_rul]] = np.maximum(priority[scored[low_rul]], 3)
+                color[scored[low_rul]] = "orange"
+
+                status[scored[end_of_life]] = "CRITICAL: END OF LIFE"
+                priority[scored[end_of_life]] = 4
+                color[scored[end_of_life]] = "red"
+
+                # Zarf dışı okumalar en az WARNING (diagnose ile aynı)
+                breach = self.data_guard.out_of_envelope(good[self.data_guard.required_sensors])[stats_ok]
+                escalate = scored[breach & (priority[scored] < ENVELOPE_ALERT[1])]
+                status[escalate], priority[escalate], color[escalate] = ENVELOPE_ALERT
+
+                self._update_fleet_state(units[scored], cycles[scored], priority[scored])
+
+        # 5. Loglama: satır başına değil, batch başına özet
+        critical_units = np.unique(units[priority == 4])
+        if len(critical_units):
+            logger.critical(f"CRITICAL FAILURE | Fleet batch | Units: {critical_units.tolist()}",
+                            extra={"priority": 4})
+        n_elevated = int(((priority >= 2) & (priority < 4)).sum())
+        if n_elevated:
+            logger.warning(f"Fleet batch | {n_elevated} elevated packets (priority 2-3)")
+
+        result = pd.DataFrame({
+            "unit_number": units,
+            "cycle": cycles,
+            "spe": spe,
+            "threshold": self.stats_guard.threshold if self.stats_guard.ready else 0.0,
+            "ratio": ratio,
+            "risk_score": risk_score,
+            "status": status,
+            "priority": priority,
+            "color": color,
+            "predicted_rul": predicted_rul,
+        })
+        if self.event_store is not None:
+            self.event_store.record_frame(result, self.run_id)
+        return result
+
+    def _update_fleet_state(self, units: np.ndarray, cycles: np.ndarray, priority: np.ndarray):
+        """Folds a scored batch into the per-unit alert state arrays."""
+        self._grow_fleet_state(int(units.max()))
+
+        # Son durum: her unit için batch içindeki son satır
+        rev_units = units[::-1]
+        uniq, rev_idx = np.unique(rev_units, return_index=True)
+        last = len(units) - 1 - rev_idx
+        self._unit_priority[uniq] = priority[last]
+        self._unit_last_cycle[uniq] = cycles[last]
+
+        # İlk alarm: daha önce alarm vermemiş unit'ler için ilk priority>=2 satırı
+        alert = priority >= 2
+        if alert.any():
+            a_units, a_idx = np.unique(units[alert], return_index=True)
+            fresh = self._unit_first_alert[a_units] < 0
+            self._unit_first_alert[a_units[fresh]] = cycles[alert][a_idx[fresh]]
+
+    def fleet_state(self) -> pd.DataFrame:
+        """Current alert state of every unit seen by `diagnose_fleet`."""
+        seen = np.flatnonzero(self._unit_last_cycle >= 0)
+        return pd.DataFrame({
+            "unit_number": seen,
+            "last_cycle": self._unit_last_cycle[seen],
+            "priority": self._unit_priority[seen],
+            "first_alert_cycle": self._unit_first_alert[seen],
+        })
+
+    def reset_fleet(self):
+        """Clears per-unit EWMA and alert state for a fresh fleet replay."""
+        self.stats_guard.reset()
+        self._unit_priority[:] = 0
+        self._unit_first_alert[:] = -1
+        self._unit_last_cycle[:] = -1
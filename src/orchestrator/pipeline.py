@@ -0,0 +1,419 @@
+import argparse
+import asyncio
+import inspect
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from src.utils.logger import logger
+from src.stats_engine.guard import REASON_OK
+
+# Asyncio telemetry pipeline:
+#   source -> [q] -> validate -> [q] -> score (micro-batch) -> sink queues -> sinks (UI, event log, alerts)
+# Stages are connected by bounded queues, so a slow stage back-pressures the
+# ones before it. Packets are validated once (validate stage); scoring runs
+# diagnose_fleet(validated=True) on whatever has queued up (up to max_batch
+# packets) in a dedicated thread, so the loop keeps feeding it while sinks
+# work. Slow sinks (rendering, I/O) should be threaded=True so they stay off the
+# loop thread too. Sinks take one of two policies:
+#   "block"    bounded queue; a full queue back-pressures scoring (no loss: event log, alerts)
+#   "coalesce" never blocks scoring; the sink gets everything since its last call (rendering)
+# Every stage keeps StageStats (queue depth, service time, blocked time), so
+# stats() / bottleneck() show where the time goes.
+
+_END = object()  # kuyruk sonu işareti
+
+
+class StageStats:
+    """Counters of one stage. busy = service time, blocked = waiting on a full downstream queue."""
+
+    def __init__(self, name: str, queue=None):
+        self.name = name
+        self.queue = queue
+        self.items = 0
+        self.batches = 0
+        self.busy_s = 0.0
+        self.blocked_s = 0.0
+        self.last_service_s = 0.0
+        self.max_depth = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def depth(self) -> int:
+        if self.queue is None:
+            return 0
+        return self.queue.qsize() if hasattr(self.queue, "qsize") else len(self.queue)
+
+    def sample_depth(self):
+        self.max_depth = max(self.max_depth, self.depth())
+
+    def record(self, items: int, service_s: float):
+        self.items += items
+        self.batches += 1
+        self.busy_s += service_s
+        self.last_service_s = service_s
+
+    def snapshot(self, elapsed: float) -> dict:
+        return {
+            "items": self.items,
+            "batches": self.batches,
+            "mean_batch": round(self.items / self.batches, 1) if self.batches else 0.0,
+            "service_ms": round(1e3 * self.busy_s / self.batches, 3) if self.batches else 0.0,
+            "per_item_us": round(1e6 * self.busy_s / self.items, 1) if self.items else 0.0,
+            "busy_s": round(self.busy_s, 4),
+            "blocked_s": round(self.blocked_s, 4),
+            "utilization": round(self.busy_s / elapsed, 3) if elapsed > 0 else 0.0,
+            "queue_depth": self.depth(),
+            "max_depth": self.max_depth,
+            "dropped": self.dropped,
+            "errors": self.errors,
+        }
+
+
+class Sink:
+    """
+    One output stage. fn(items) gets a list of {"packet", "decision"} dicts in
+    stream order; it may be a coroutine function. threaded=True runs a sync fn
+    on the sink's own thread (initializer runs once on that thread, e.g. to
+    attach a UI framework's context), so a slow fn does not block the loop.
+    """
+
+    POLICIES = ("block", "coalesce")
+
+    def __init__(self, name: str, fn, policy: str = "block", threaded: bool = False, queue_size: int = 64,
+                 max_pending: int = 10000, initializer=None):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Sink '{name}': unknown policy {policy!r} (expected one of {self.POLICIES})")
+        self.name = name
+        self.fn = fn
+        self.policy = policy
+        self.threaded = threaded
+        self.queue_size = int(queue_size)
+        self.max_pending = int(max_pending)
+        self.initializer = initializer
+
+
+class TelemetryPipeline:
+    """
+    Usage:
+        pipeline = TelemetryPipeline(Orchestrator(record_events=False))
+        pipeline.add_sink("ui", render, policy="coalesce")
+        pipeline.add_sink("events", event_log_sink(get_event_store(), run_id), threaded=True)
+        pipeline.run_blocking(stream_packets(SensorStreamer(engine_id=1)), speed=0.1)
+        print(pipeline.bottleneck())
+    """
+
+    def __init__(self, orchestrator, queue_size: int = 64, max_batch: int = 64, batch_wait: float = 0.0):
+        self.orchestrator = orchestrator
+        self.queue_size = int(queue_size)
+        self.max_batch = int(max_batch)
+        self.batch_wait = float(batch_wait)  # >0: skor batch'ini doldurmak için en fazla bu kadar bekle
+        self.sinks = []
+        self.stage_stats = {}
+        self.started_at = None
+        self.finished_at = None
+        self._stopping = False
+
+    def add_sink(self, name: str, fn, policy: str = "block", threaded: bool = False, **kwargs):
+        self.sinks.append(Sink(name, fn, policy, threaded, **kwargs))
+        return self
+
+    def stop(self):
+        """Stops the source; packets already queued are still scored and delivered."""
+        self._stopping = True
+
+    # --- Stats ---
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    def stats(self) -> dict:
+        elapsed = self.elapsed()
+        return {name: stage.snapshot(elapsed) for name, stage in self.stage_stats.items()}
+
+    def bottleneck(self) -> str:
+        """Stage with the highest utilization (service time / wall time)."""
+        if not self.stage_stats:
+            return ""
+        return max(self.stage_stats.values(), key=lambda s: s.busy_s).name
+
+    def report(self) -> str:
+        lines = [f"{'STAGE':<12}{'items':>8}{'batch':>7}{'svc ms':>9}{'µs/item':>9}{'util':>7}"
+                 f"{'blocked s':>11}{'depth':>7}{'max':>6}{'drop':>6}"]
+        for name, s in self.stats().items():
+            lines.append(f"{name:<12}{s['items']:>8}{s['mean_batch']:>7}{s['service_ms']:>9}{s['per_item_us']:>9}"
+                         f"{s['utilization']:>7}{s['blocked_s']:>11}{s['queue_depth']:>7}{s['max_depth']:>6}"
+                         f"{s['dropped']:>6}")
+        lines.append(f"elapsed {self.elapsed():.3f}s | bottleneck: {self.bottleneck()}")
+        return "\n".join(lines)
+
+    # --- Run ---
+    def run_blocking(self, packets, speed: float = 0.0) -> dict:
+        """asyncio.run wrapper for sync callers (scripts, the Streamlit script thread)."""
+        return asyncio.run(self.run(packets, speed))
+
+    async def run(self, packets, speed: float = 0.0) -> dict:
+        """
+        Runs until the source is exhausted (or stop()) and every sink has drained. Returns stats().
+        packets: async or sync iterable of packet dicts; speed: seconds between packets (0 = max).
+        """
+        self._stopping = False
+        validate_q = asyncio.Queue(self.queue_size)
+        score_q = asyncio.Queue(self.queue_size)
+        self.stage_stats = {"source": StageStats("source"), "validate": StageStats("validate", validate_q),
+                            "score": StageStats("score", score_q)}
+
+        outlets = []
+        for sink in self.sinks:
+            if sink.policy == "block":
+                outlet = _BlockingOutlet(sink, asyncio.Queue(sink.queue_size))
+            else:
+                outlet = _CoalescingOutlet(sink)
+            self.stage_stats[sink.name] = outlet.stats
+            outlets.append(outlet)
+
+        # Orchestrator thread-safe değil: skorlama tek bir thread'de sıralı çalışır
+        score_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pipeline-score")
+        tasks = [
+            asyncio.create_task(self._source(packets, validate_q, speed), name="source"),
+            asyncio.create_task(self._validate(validate_q, score_q), name="validate"),
+            asyncio.create_task(self._score(score_q, outlets, score_executor), name="score"),
+        ] + [asyncio.create_task(outlet.run(), name=outlet.sink.name) for outlet in outlets]
+
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # Bir aşama çöktü ya da durduruldu (örn. st.stop()): diğerlerini iptal et, hatayı yukarı ilet
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            self.finished_at = time.perf_counter()
+            score_executor.shutdown(wait=False)
+            for outlet in outlets:
+                outlet.close()
+        logger.info(f"Pipeline finished in {self.elapsed():.2f}s | bottleneck: {self.bottleneck()}")
+        return self.stats()
+
+    async def _put(self, queue: asyncio.Queue, item, stats: StageStats):
+        if queue.full():
+            t0 = time.perf_counter()
+            await queue.put(item)
+            stats.blocked_s += time.perf_counter() - t0
+        else:
+            queue.put_nowait(item)
+
+    async def _source(self, packets, out: asyncio.Queue, speed: float):
+        stats = self.stage_stats["source"]
+        iterator = packets.__aiter__() if hasattr(packets, "__aiter__") else _aiter(packets)
+        clock = time.perf_counter()
+        while not self._stopping:
+            t0 = time.perf_counter()
+            try:
+                packet = await iterator.__anext__()
+            except StopAsyncIteration:
+                break
+            stats.record(1, time.perf_counter() - t0)
+            await self._put(out, packet, stats)
+            if speed > 0:
+                # Simülasyon saati: paketler sabit aralıkla (işleme süresinden bağımsız) yayınlanır
+                clock += speed
+                await asyncio.sleep(max(0.0, clock - time.perf_counter()))
+        await out.put(_END)
+
+    async def _validate(self, inbox: asyncio.Queue, out: asyncio.Queue):
+        stats = self.stage_stats["validate"]
+        guard = self.orchestrator.data_guard
+        while True:
+            stats.sample_depth()
+            packet = await inbox.get()
+            if packet is _END:
+                break
+            t0 = time.perf_counter()
+            code, detail = guard.check(packet)
+            stats.record(1, time.perf_counter() - t0)
+            if code != REASON_OK:
+                guard.reporter.record(code, {code: detail} if detail else None)
+                stats.dropped += 1
+                continue
+            await self._put(out, packet, stats)
+        await out.put(_END)
+
+    async def _score(self, inbox: asyncio.Queue, outlets: list, executor: ThreadPoolExecutor):
+        stats = self.stage_stats["score"]
+        loop = asyncio.get_running_loop()
+        done = False
+        while not done:
+            stats.sample_depth()
+            first = await inbox.get()
+            if first is _END:
+                break
+            batch = [first]
+            # Micro-batch: kuyrukta bekleyen her şey (yük arttıkça batch kendiliğinden büyür)
+            deadline = loop.time() + self.batch_wait
+            while len(batch) < self.max_batch:
+                try:
+                    packet = inbox.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        packet = await asyncio.wait_for(inbox.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if packet is _END:
+                    done = True
+                    break
+                batch.append(packet)
+
+            t0 = time.perf_counter()
+            items = await loop.run_in_executor(executor, self._diagnose, batch)
+            stats.record(len(batch), time.perf_counter() - t0)
+            for outlet in outlets:
+                t0 = time.perf_counter()
+                await outlet.offer(items)
+                stats.blocked_s += time.perf_counter() - t0
+
+        for outlet in outlets:
+            await outlet.finish()
+
+    def _diagnose(self, batch: list) -> list:
+        # Paketler validate aşamasında DataGuard.check'ten geçti: tekrar doğrulama yok
+        decisions = self.orchestrator.diagnose_fleet(batch, validated=True).to_dict("records")
+        return [{"packet": packet, "decision": decision} for packet, decision in zip(batch, decisions)]
+
+
+async def _aiter(iterable):
+    for n, item in enumerate(iterable, 1):
+        yield item
+        if n % 64 == 0:
+            await asyncio.sleep(0)  # senkron kaynak loop'u kilitlemesin
+
+
+async def stream_packets(streamer):
+    """Async source over SensorStreamer.stream() (pacing is the pipeline's `speed`)."""
+    async for packet in _aiter(streamer.stream()):
+        yield packet
+
+
+def event_log_sink(event_store, run_id: str = None):
+    """Sink fn writing decisions to the EventStore (run it threaded: SQLite commits block)."""
+    import pandas as pd
+
+    def write(items: list):
+        frame = pd.DataFrame.from_records([item["decision"] for item in items])
+        event_store.record_frame(frame, run_id)
+    return write
+
+
+class _Outlet:
+    def __init__(self, sink: Sink, queue=None):
+        self.sink = sink
+        self.stats = StageStats(sink.name, queue)
+        self._executor = None
+        if sink.threaded and not inspect.iscoroutinefunction(sink.fn):
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"pipeline-{sink.name}",
+                                                initializer=sink.initializer)
+
+    async def deliver(self, items: list):
+        t0 = time.perf_counter()
+        try:
+            if self._executor is not None:
+                await asyncio.get_running_loop().run_in_executor(self._executor, self.sink.fn, items)
+            else:
+                result = self.sink.fn(items)
+                if inspect.isawaitable(result):
+                    await result
+        except Exception as e:
+            self.stats.errors += 1
+            logger.error(f"Pipeline sink '{self.sink.name}' failed on {len(items)} item(s): {e}")
+        self.stats.record(len(items), time.perf_counter() - t0)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+
+class _BlockingOutlet(_Outlet):
+    def __init__(self, sink: Sink, queue: asyncio.Queue):
+        super().__init__(sink, queue)
+        self.queue = queue
+
+    async def offer(self, items: list):
+        await self.queue.put(items)  # dolu kuyruk skorlamayı bekletir (backpressure)
+
+    async def finish(self):
+        await self.queue.put(_END)
+
+    async def run(self):
+        while True:
+            self.stats.sample_depth()
+            items = await self.queue.get()
+            if items is _END:
+                break
+            await self.deliver(items)
+
+
+class _CoalescingOutlet(_Outlet):
+    def __init__(self, sink: Sink):
+        self.pending = []
+        super().__init__(sink, self.pending)
+        self._ready = asyncio.Event()
+        self._ended = False
+
+    async def offer(self, items: list):
+        self.pending.extend(items)
+        overflow = len(self.pending) - self.sink.max_pending
+        if overflow > 0:  # sink çok geride: en eskileri at (bellek sınırlı)
+            del self.pending[:overflow]
+            self.stats.dropped += overflow
+        self.stats.sample_depth()
+        self._ready.set()
+
+    async def finish(self):
+        self._ended = True
+        self._ready.set()
+
+    async def run(self):
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            if self.pending:
+                items, self.pending[:] = list(self.pending), []
+                await self.deliver(items)
+            if self._ended and not self.pending:
+                break
+
+
+def main():
+    from src.simulation.streamer import SensorStreamer
+    from src.orchestrator.manager import Orchestrator
+
+    parser = argparse.ArgumentParser(description="Headless run of the asyncio telemetry pipeline with stage stats")
+    parser.add_argument("--engine", type=int, default=1)
+    parser.add_argument("--speed", type=float, default=0.0, help="seconds between packets (0 = max)")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--render-ms", type=float, default=0.0, help="simulated slow UI sink (ms per call)")
+    parser.add_argument("--alert-ms", type=float, default=0.0, help="simulated slow alert sink (ms per call)")
+    parser.add_argument("--json", action="store_true", help="print the stats as JSON")
+    args = parser.parse_args()
+
+    pipeline = TelemetryPipeline(Orchestrator(record_events=False), max_batch=args.max_batch)
+    pipeline.add_sink("ui", lambda items: time.sleep(args.render_ms / 1e3), policy="coalesce", threaded=True)
+    pipeline.add_sink("alerts", lambda items: time.sleep(args.alert_ms / 1e3), threaded=True)
+    pipeline.run_blocking(stream_packets(SensorStreamer(engine_id=args.engine)), args.speed)
+    print(json.dumps(pipeline.stats(), indent=2) if args.json else pipeline.report())
+
+
+if __name__ == "__main__":
+    main()
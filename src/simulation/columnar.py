@@ -0,0 +1,142 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from config.paths import CACHE_DIR
+from src.utils.logger import logger
+
+# Columnar binary cache for the whitespace-delimited NASA CMAPSS text files.
+# The text file is parsed once into a float64 .npy matrix plus a
+# unit_number -> (start, end) row index; later opens memory-map the .npy.
+
+CACHE_VERSION = 1
+
+# Process-level memo: source path -> ColumnarDataset
+_OPEN_DATASETS = {}
+
+
+class ColumnarDataset:
+    """
+    Read-only view over one cached CMAPSS file.
+    Rows of each engine are contiguous, so `unit()` is an O(1) slice.
+    """
+
+    def __init__(self, source: Path, values: np.ndarray, unit_index: np.ndarray, columns: list, signature: tuple):
+        self.source = source
+        self.values = values
+        self.columns = list(columns)
+        self.column_index = {c: i for i, c in enumerate(self.columns)}
+        self.signature = signature
+        self.unit_spans = {int(u): (int(s), int(e)) for u, s, e in unit_index}
+
+    @property
+    def units(self) -> list:
+        return list(self.unit_spans)
+
+    def span(self, unit_number) -> tuple:
+        return self.unit_spans.get(int(unit_number), (0, 0))
+
+    def unit(self, unit_number) -> np.ndarray:
+        """Rows of one engine as a (n_cycles, n_columns) view of the memory map."""
+        start, end = self.span(unit_number)
+        return self.values[start:end]
+
+    def column(self, name: str) -> np.ndarray:
+        return self.values[:, self.column_index[name]]
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(np.asarray(self.values), columns=self.columns)
+
+
+def _cache_paths(source: Path) -> tuple:
+    stem = source.stem
+    return (CACHE_DIR / f"{stem}.values.npy",
+            CACHE_DIR / f"{stem}.index.npy",
+            CACHE_DIR / f"{stem}.meta.json")
+
+
+def _signature(source: Path) -> tuple:
+    st = source.stat()
+    return st.st_mtime_ns, st.st_size
+
+
+def build_cache(source, columns: list) -> None:
+    """Parses the text file once and writes the .npy matrix, unit index and metadata."""
+    source = Path(source)
+    values_path, index_path, meta_path = _cache_paths(source)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+    signature = _signature(source)
+    df = pd.read_csv(source, sep=r'\s+', header=None, names=columns)
+    values = df.to_numpy(dtype=np.float64)
+
+    # Engine satırlarının ardışık olduğunu garanti et (stable sort döngü sırasını korur)
+    units = values[:, columns.index('unit_number')]
+    if np.any(np.diff(units) < 0):
+        order = np.argsort(units, kind="stable")
+        values = values[order]
+        units = units[order]
+
+    starts = np.flatnonzero(np.r_[True, units[1:] != units[:-1]]) if len(units) else np.empty(0, dtype=np.int64)
+    ends = np.r_[starts[1:], len(units)] if len(units) else np.empty(0, dtype=np.int64)
+    unit_index = np.column_stack([units[starts].astype(np.int64), starts, ends]).astype(np.int64)
+
+    # Atomik yazım: önce .tmp, sonra replace
+    for path, arr in ((values_path, np.ascontiguousarray(values)), (index_path, unit_index)):
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, arr)
+        os.replace(tmp, path)
+
+    meta = {
+        "version": CACHE_VERSION,
+        "source": str(source),
+        "mtime_ns": signature[0],
+        "size": signature[1],
+        "columns": list(columns),
+    }
+    tmp = meta_path.with_name(meta_path.name + ".tmp")
+    tmp.write_text(json.dumps(meta))
+    os.replace(tmp, meta_path)
+    logger.info(f"Columnar cache built: {source.name} -> {values_path.name} ({len(values)} rows, {len(unit_index)} units)")
+
+
+def _load_meta(meta_path: Path):
+    try:
+        return json.loads(meta_path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def open_dataset(source, columns: list) -> ColumnarDataset:
+    """
+    Returns the cached, memory-mapped dataset for `source`, (re)building the
+    cache when it is missing or the source file's mtime/size changed.
+    """
+    source = Path(source)
+    signature = _signature(source)
+
+    cached = _OPEN_DATASETS.get(source)
+    if cached is not None and cached.signature == signature and cached.columns == list(columns):
+        return cached
+
+    values_path, index_path, meta_path = _cache_paths(source)
+    meta = _load_meta(meta_path)
+    fresh = (
+        meta is not None
+        and meta.get("version") == CACHE_VERSION
+        and meta.get("source") == str(source)
+        and (meta.get("mtime_ns"), meta.get("size")) == signature
+        and meta.get("columns") == list(columns)
+        and values_path.exists() and index_path.exists()
+    )
+    if not fresh:
+        build_cache(source, columns)
+
+    values = np.load(values_path, mmap_mode="r")
+    unit_index = np.load(index_path)
+    dataset = ColumnarDataset(source, values, unit_index, columns, signature)
+    _OPEN_DATASETS[source] = dataset
+    return dataset
@@ -1,27 +1,68 @@
 from config.paths import TRAIN_FILE, SETTINGS_FILE
+from src.simulation.columnar import open_dataset
 import pandas as pd
+import numpy as np
 #import time
 import json
 
 # This class simulates the streaming of sensor data for a specific engine from the NASA train dataset.
 
 class SensorStreamer:
-    def __init__(self, engine_id=1):
+    def __init__(self, engine_id=1, data_file=TRAIN_FILE):
         # NASA train data column names
         self.columns = json.load(open(SETTINGS_FILE)).get('data_col_names')
-        self.data = pd.read_csv(TRAIN_FILE, sep='\s+', header=None, names=self.columns)
+
+        # Columnar cache: the text file is parsed only once, engines are O(1) slices of a memory map
+        self.dataset = open_dataset(data_file, self.columns)
 
         # Gets the desired engine with provided engine id
-        self.engine_data = self.data[self.data['unit_number'] == engine_id]
-        self.max_cycles = self.engine_data['cycle'].max()
+        self.engine_id = engine_id
+        self.engine_array = self.dataset.unit(engine_id)
+        self.column_index = self.dataset.column_index  # shared schema for row views: name -> position
+        self._int_columns = [self.column_index['unit_number'], self.column_index['cycle']]
+        cycles = self.engine_array[:, self.dataset.column_index['cycle']]
+        self.max_cycles = cycles.max() if len(cycles) else np.nan
         self.current_cycle = 0
 
+    @property
+    def engine_data(self) -> pd.DataFrame:
+        """The selected engine as a DataFrame (built on demand from the cached array)."""
+        return pd.DataFrame(np.asarray(self.engine_array), columns=self.columns)
+
+    def _rows(self) -> np.ndarray:
+        # Engine slice copied once into a small contiguous in-memory block (row views are cheap on it)
+        return np.array(self.engine_array, dtype=np.float64, order='C')
+
     def stream(self):
         """
         Yields the engine data at each call.
+        Dict adapter over `stream_rows`; unit_number and cycle stay integers.
         """
-        for _, row in self.engine_data.iterrows():
-            data_packet = row.to_dict()
+        columns = self.columns
+        unit_idx, cycle_idx = self._int_columns
+        for row in self.stream_rows():
+            values = row.tolist()
+            data_packet = dict(zip(columns, values))
+            data_packet['unit_number'] = int(values[unit_idx])
+            data_packet['cycle'] = int(values[cycle_idx])
             yield data_packet
 
-            # time.sleep(0.1)
\ No newline at end of file
+            # time.sleep(0.1)
+
+    def stream_rows(self):
+        """
+        Yields each cycle as a read-only float64 row view (no per-cycle dict/Series).
+        Use `self.column_index[name]` to address a column.
+        """
+        values = self._rows()
+        values.flags.writeable = False
+        yield from values
+
+    def stream_chunks(self, n: int):
+        """Yields (<=n, n_columns) blocks of consecutive cycles for batch consumers."""
+        if n < 1:
+            raise ValueError("stream_chunks: n must be >= 1")
+        values = self._rows()
+        values.flags.writeable = False
+        for start in range(0, len(values), n):
+            yield values[start:start + n]
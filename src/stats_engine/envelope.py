@@ -0,0 +1,131 @@
+import json
+import re
+import numpy as np
+from pathlib import Path
+
+from config.paths import SENSOR_ENVELOPE_PATH, SETTINGS_FILE
+from src.utils.logger import logger
+from src.stats_engine.registry import get_model_registry
+
+# Per-dataset, per-sensor operating envelope (min / percentiles / max) computed
+# from the CMAPSS training files. Shared by DataGuard (vectorized bounds check)
+# and the agents' "Fetch Sensor Limits" tool.
+
+ENVELOPE_VERSION = 1
+SENSOR_COLUMNS = [f"sensor_measurement{i}" for i in range(1, 22)]
+ENVELOPE_STATS = ("min", "p01", "p50", "p99", "max", "mean", "std")
+
+# NASA CMAPSS sensor descriptions
+SENSOR_LABELS = {
+    "sensor_measurement1": "T2 (Fan Inlet Temp)",
+    "sensor_measurement2": "T24 (LPC Outlet Temp)",
+    "sensor_measurement3": "T30 (HPC Outlet Temp)",
+    "sensor_measurement4": "T50 (LPT Outlet Temp)",
+    "sensor_measurement5": "P2 (Fan Inlet Pressure)",
+    "sensor_measurement6": "P15 (Bypass-Duct Pressure)",
+    "sensor_measurement7": "P30 (HPC Outlet Pressure)",
+    "sensor_measurement8": "Nf (Physical Fan Speed)",
+    "sensor_measurement9": "Nc (Physical Core Speed)",
+    "sensor_measurement10": "epr (Engine Pressure Ratio)",
+    "sensor_measurement11": "Ps30 (HPC Static Pressure)",
+    "sensor_measurement12": "phi (Fuel Flow / Ps30)",
+    "sensor_measurement13": "NRf (Corrected Fan Speed)",
+    "sensor_measurement14": "NRc (Corrected Core Speed)",
+    "sensor_measurement15": "BPR (Bypass Ratio)",
+    "sensor_measurement16": "farB (Burner Fuel-Air Ratio)",
+    "sensor_measurement17": "htBleed (Bleed Enthalpy)",
+    "sensor_measurement18": "Nf_dmd (Demanded Fan Speed)",
+    "sensor_measurement19": "PCNfR_dmd (Demanded Corrected Fan Speed)",
+    "sensor_measurement20": "W31 (HPT Coolant Bleed)",
+    "sensor_measurement21": "W32 (LPT Coolant Bleed)",
+}
+
+
+class SensorEnvelope:
+    """
+    stats[d, s, k]: statistic ENVELOPE_STATS[k] of sensor SENSOR_COLUMNS[s] in dataset d.
+    """
+
+    def __init__(self, datasets: list, stats: np.ndarray, sensors: list = None):
+        self.datasets = list(datasets)
+        self.sensors = list(sensors or SENSOR_COLUMNS)
+        self.stats = np.asarray(stats, dtype=np.float64)
+        self._stat_pos = {name: i for i, name in enumerate(ENVELOPE_STATS)}
+        self._sensor_pos = {name: i for i, name in enumerate(self.sensors)}
+
+    @classmethod
+    def build(cls, train_files: list):
+        """Computes the table from train_FD00x files (all sensors in one vectorized pass per file)."""
+        from src.simulation.columnar import open_dataset
+
+        columns = json.load(open(SETTINGS_FILE)).get('data_col_names')
+        datasets, tables = [], []
+        for path in train_files:
+            ds = open_dataset(path, columns)
+            idx = [ds.column_index[s] for s in SENSOR_COLUMNS]
+            X = np.asarray(ds.values)[:, idx]
+            p01, p50, p99 = np.percentile(X, [1, 50, 99], axis=0)
+            tables.append(np.stack([X.min(axis=0), p01, p50, p99, X.max(axis=0), X.mean(axis=0), X.std(axis=0)],
+                                   axis=-1))
+            datasets.append(re.search(r"FD\d{3}", Path(path).name).group(0))
+        return cls(datasets, np.stack(tables))
+
+    def save(self, path=SENSOR_ENVELOPE_PATH):
+        np.savez(path, version=np.array(ENVELOPE_VERSION), stats=self.stats,
+                 datasets=np.asarray(self.datasets, dtype=str), sensors=np.asarray(self.sensors, dtype=str),
+                 stat_names=np.asarray(ENVELOPE_STATS, dtype=str))
+
+    @classmethod
+    def load(cls, path=SENSOR_ENVELOPE_PATH):
+        with np.load(path, allow_pickle=False) as z:
+            if int(z["version"]) != ENVELOPE_VERSION or tuple(z["stat_names"]) != ENVELOPE_STATS:
+                raise ValueError(f"SensorEnvelope: incompatible artifact {path}")
+            return cls([str(d) for d in z["datasets"]], z["stats"], [str(s) for s in z["sensors"]])
+
+    def stat(self, name: str, dataset: str = None) -> np.ndarray:
+        """(n_sensors,) values of one statistic; dataset=None takes the widest value across datasets."""
+        k = self._stat_pos[name]
+        if dataset is not None:
+            return self.stats[self.datasets.index(dataset), :, k]
+        agg = np.min if name in ("min", "p01") else np.max
+        return agg(self.stats[:, :, k], axis=0)
+
+    def bounds(self, dataset: str = None, margin: float = 0.5, rel_tol: float = 0.05) -> tuple:
+        """
+        Plausible physical bounds (lo, hi) per sensor: observed [min, max] widened by
+        `margin` x range, and at least `rel_tol` x |value| for (near-)constant sensors.
+        """
+        lo, hi = self.stat("min", dataset), self.stat("max", dataset)
+        pad = np.maximum(margin * (hi - lo), rel_tol * np.maximum(np.abs(lo), np.abs(hi)))
+        return lo - pad, hi + pad
+
+    def hard_bounds(self, dataset: str = None, margin: float = 10.0) -> tuple:
+        """
+        Physically impossible readings (lo, hi), much wider than `bounds`: at least
+        |max| above the observed max, and > 0 for sensors that were always positive.
+        Values outside are rejected; values only outside `bounds` are still scored.
+        """
+        lo, hi = self.bounds(dataset=dataset, margin=margin, rel_tol=1.0)
+        positive = self.stat("min", dataset) > 0
+        lo[positive] = np.maximum(lo[positive], np.nextafter(0.0, 1.0))  # 0 ve negatif: red
+        return lo, hi
+
+    def limits(self, sensor: str, dataset: str = None) -> dict:
+        s = self._sensor_pos[sensor]
+        out = {name: float(self.stat(name, dataset)[s]) for name in ENVELOPE_STATS}
+        out["name"] = SENSOR_LABELS.get(sensor, sensor)
+        return out
+
+
+def get_sensor_envelope(path=SENSOR_ENVELOPE_PATH):
+    """
+    Shared envelope artifact (process-wide model registry for the default path).
+    Returns None if it has not been built (run models/training/build_envelope.py).
+    """
+    if Path(path) == Path(SENSOR_ENVELOPE_PATH):
+        return get_model_registry().get("sensor_envelope")
+    try:
+        return SensorEnvelope.load(path)
+    except FileNotFoundError:
+        logger.warning(f"SensorEnvelope: {Path(path).name} not found (run models/training/build_envelope.py).")
+        return None
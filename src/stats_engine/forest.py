@@ -0,0 +1,132 @@
+import numpy as np
+
+# Flat, sklearn-free representation of the RUL RandomForestRegressor.
+# All trees are concatenated into one set of node arrays (feature, threshold,
+# children, value). Leaves point to themselves, so every row can walk a fixed
+# number of steps (max depth) without branching on "is leaf?".
+
+FOREST_FORMAT_VERSION = 1
+
+
+class FlatForest:
+    """
+    Array-based regression forest evaluator.
+    Produces the same predictions as RandomForestRegressor.predict: inputs are
+    cast to float32 and compared with float64 thresholds (sklearn's rule), and
+    per-tree values are accumulated in tree order before dividing by n_trees.
+    """
+
+    def __init__(self, feature, threshold, children, value, roots, max_depth, feature_names):
+        self.feature = np.asarray(feature, dtype=np.intp)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        self.children = np.asarray(children, dtype=np.intp)  # (n_nodes * 2,): [left, right] per node
+        self.value = np.asarray(value, dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.max_depth = int(max_depth)
+        self.n_trees = len(self.roots)
+        # sklearn ile aynı isim: Orchestrator DataFrame kolonlarını buna göre seçer
+        self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+        self._feature_pos = {name: i for i, name in enumerate(feature_names)}
+
+        # Evaluation layout: a "slot" is 2*node + (0: left, 1: right). Feature and
+        # threshold are repeated per slot, children hold child slots, so one step is
+        # slot = children[slot + (x[feature[slot]] > threshold[slot])]
+        self._slot_feature = np.repeat(self.feature, 2)
+        self._slot_threshold = np.repeat(self.threshold, 2)
+        self._slot_children = 2 * self.children
+        self._slot_roots = 2 * self.roots
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Exports a fitted RandomForestRegressor (single output)."""
+        features, thresholds, children, values, roots = [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for est in model.estimators_:
+            tree = est.tree_
+            n = tree.node_count
+            left = tree.children_left.astype(np.intp)
+            right = tree.children_right.astype(np.intp)
+            is_leaf = left == -1
+            own = np.arange(n, dtype=np.intp)
+
+            left = np.where(is_leaf, own, left) + offset
+            right = np.where(is_leaf, own, right) + offset
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.intp))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold).astype(np.float64))
+            children.append(np.column_stack([left, right]).ravel())
+            values.append(tree.value[:, 0, 0].astype(np.float64))
+            roots.append(offset)
+            max_depth = max(max_depth, int(tree.max_depth))
+            offset += n
+
+        names = getattr(model, "feature_names_in_", None)
+        if names is None:
+            names = [f"x{i}" for i in range(model.n_features_in_)]
+
+        return cls(np.concatenate(features), np.concatenate(thresholds), np.concatenate(children),
+                   np.concatenate(values), np.asarray(roots), max_depth, list(names))
+
+    def save(self, path):
+        np.savez(
+            path,
+            version=np.array(FOREST_FORMAT_VERSION),
+            feature=self.feature.astype(np.int16), threshold=self.threshold,
+            children=self.children.astype(np.int32),
+            value=self.value, roots=self.roots, max_depth=np.array(self.max_depth),
+            feature_names=np.asarray(list(self.feature_names_in_), dtype=str),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as z:
+            if int(z["version"]) != FOREST_FORMAT_VERSION:
+                raise ValueError(f"FlatForest: unsupported format version {int(z['version'])}")
+            return cls(z["feature"], z["threshold"], z["children"], z["value"], z["roots"],
+                       int(z["max_depth"]), [str(n) for n in z["feature_names"]])
+
+    def vector(self, data_packet: dict) -> np.ndarray:
+        """Feature vector of one packet in training column order."""
+        return np.array([data_packet[name] for name in self._feature_pos], dtype=np.float64)
+
+    @staticmethod
+    def _as_model_dtype(X) -> np.ndarray:
+        # float32 yuvarlaması sklearn ile aynı; float64'e geri almak karşılaştırmayı tek tipte tutar
+        return np.asarray(X, dtype=np.float32).astype(np.float64)
+
+    def predict_one(self, x: np.ndarray) -> float:
+        """Single-row path: walks all trees at once, one step per depth level."""
+        x = self._as_model_dtype(x)
+        feature, threshold, children = self._slot_feature, self._slot_threshold, self._slot_children
+        slot = self._slot_roots
+        for _ in range(self.max_depth):
+            slot = children[slot + (x[feature[slot]] > threshold[slot])]
+        # cumsum = sıralı toplama (np.sum'ın pairwise toplamı son bitte farklılaşabilir)
+        return float(np.cumsum(self.value[slot >> 1])[-1] / self.n_trees)
+
+    def predict(self, X) -> np.ndarray:
+        """Batch path. X: (n, n_features) array or a DataFrame holding feature_names_in_."""
+        if hasattr(X, "columns"):
+            X = X[list(self.feature_names_in_)].to_numpy()
+        X = self._as_model_dtype(X)
+        if X.ndim == 1:
+            X = X[None, :]
+
+        # Ağaç ağaç yürü: (n_trees, n) ara dizileri yerine n'lik diziler cache'te kalır.
+        # X sütun-öncelikli düzleştirilir: değer = flat[feature * n + row]
+        n = X.shape[0]
+        flat = np.ascontiguousarray(X.T).ravel()
+        rows = np.arange(n, dtype=np.intp)
+        feature_offset = self._slot_feature * n
+        threshold, children = self._slot_threshold, self._slot_children
+        total = np.zeros(n, dtype=np.float64)
+        slot = np.empty(n, dtype=np.intp)
+        for root in self._slot_roots:
+            slot.fill(root)
+            for _ in range(self.max_depth):
+                go_right = np.take(flat, np.take(feature_offset, slot) + rows) > np.take(threshold, slot)
+                slot = np.take(children, slot + go_right)
+            # Ağaç sırasıyla toplama (sklearn ile bit-bit aynı sonuç için)
+            total += np.take(self.value, slot >> 1)
+        return total / self.n_trees
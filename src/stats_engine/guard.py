@@ -1,9 +1,153 @@
+import logging
+import threading
+import time
+
 import pandas as pd
 import numpy as np
-import joblib
 
 from src.utils.logger import logger
-from config.paths import WATCHDOG_MODEL_PATH, SCALER_PATH
+from src.stats_engine.envelope import get_sensor_envelope
+from src.stats_engine.registry import get_model_registry
+
+RISK_LEVELS = np.array(["LOW", "MEDIUM", "HIGH", "CRITICAL"])
+
+# Risk mapping (sigmoid + hybrid decision). steepness: sigmoid slope around
+# ratio 1.0; spike_ratio: raw SPE/threshold that is CRITICAL regardless of EWMA;
+# critical/high/medium: risk_score breakpoints of the levels.
+RISK_PARAMS = {"steepness": 10.0, "spike_ratio": 1.5, "critical": 0.85, "high": 0.60, "medium": 0.40}
+
+
+def map_risk(ratio, smoothed_ratio, params: dict = None) -> tuple:
+    """
+    Vectorized risk mapping shared by StatsGuard and the watchdog sweep.
+    Returns (risk_score, risk_code) with risk_code indexing RISK_LEVELS.
+    """
+    p = RISK_PARAMS if params is None else {**RISK_PARAMS, **params}
+    risk_score = 1.0 / (1.0 + np.exp(-p["steepness"] * (smoothed_ratio - 1.0)))
+    risk_code = np.select(
+        [(ratio >= p["spike_ratio"]) | (risk_score >= p["critical"]), risk_score >= p["high"],
+         risk_score >= p["medium"]],
+        [3, 2, 1],
+        default=0
+    ).astype(np.int8)
+    return risk_score, risk_code
+
+
+def grouped_ewma(values: np.ndarray, groups: np.ndarray, memory: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    EWMA over an interleaved stream where every group (engine) keeps its own memory.
+
+    Rows of the same group are smoothed in their original order. `memory` holds the
+    last smoothed value per group id (NaN = no history yet) and is updated in place,
+    so consecutive calls continue where the previous batch stopped.
+    The loop runs once per within-group position (e.g. ~360 steps for a full
+    CMAPSS replay), each step being vectorized across all groups.
+    """
+    n = len(values)
+    out = np.empty(n, dtype=np.float64)
+    if n == 0:
+        return out
+
+    order = np.argsort(groups, kind="stable")
+    g_sorted = groups[order]
+    v_sorted = values[order]
+
+    is_first = np.empty(n, dtype=bool)
+    is_first[0] = True
+    np.not_equal(g_sorted[1:], g_sorted[:-1], out=is_first[1:])
+    first_idx = np.flatnonzero(is_first)
+    group_no = np.cumsum(is_first) - 1
+    pos = np.arange(n) - first_idx[group_no]
+
+    step_order = np.argsort(pos, kind="stable")
+    bounds = np.searchsorted(pos[step_order], np.arange(pos.max() + 2))
+
+    group_ids = g_sorted[first_idx]
+    state = memory[group_ids].astype(np.float64)
+    smoothed = np.empty(n, dtype=np.float64)
+    for j in range(len(bounds) - 1):
+        idx = step_order[bounds[j]:bounds[j + 1]]
+        g = group_no[idx]
+        prev = state[g]
+        cur = v_sorted[idx]
+        new = np.where(np.isnan(prev), cur, alpha * cur + (1.0 - alpha) * prev)
+        state[g] = new
+        smoothed[idx] = new
+
+    memory[group_ids] = state
+    out[order] = smoothed
+    return out
+
+
+# DataGuard red nedenleri (validate_batch reason kodları, uint8)
+VALIDATION_REASONS = np.array(["OK", "EMPTY", "MISSING_CYCLE", "MISSING_SENSOR", "NULL", "NON_NUMERIC",
+                               "OUT_OF_BOUNDS", "INVALID_UNIT"])
+REASON_OK, REASON_EMPTY, REASON_MISSING_CYCLE, REASON_MISSING_SENSOR, REASON_NULL, REASON_NON_NUMERIC, \
+    REASON_OUT_OF_BOUNDS, REASON_INVALID_UNIT = range(len(VALIDATION_REASONS))
+
+# Eski validate() ile aynı seviyeler
+_REASON_LOG_LEVEL = {
+    REASON_EMPTY: logging.WARNING,
+    REASON_MISSING_CYCLE: logging.ERROR,
+    REASON_MISSING_SENSOR: logging.ERROR,
+    REASON_NULL: logging.WARNING,
+    REASON_NON_NUMERIC: logging.ERROR,
+    REASON_OUT_OF_BOUNDS: logging.CRITICAL,
+    REASON_INVALID_UNIT: logging.ERROR,
+}
+
+
+class ValidationReporter:
+    """
+    Aggregates rejected packets and logs at most one summary per reason every
+    `interval` seconds. The first rejection of a reason is logged immediately.
+    """
+
+    def __init__(self, interval: float = 5.0):
+        self.interval = float(interval)
+        self._lock = threading.Lock()
+        self._pending = np.zeros(len(VALIDATION_REASONS), dtype=np.int64)
+        self.totals = np.zeros(len(VALIDATION_REASONS), dtype=np.int64)
+        self._last_emit = np.full(len(VALIDATION_REASONS), -np.inf)
+        self._example = [None] * len(VALIDATION_REASONS)
+
+    def record(self, reasons, examples: dict = None):
+        """
+        reasons: one code or an array of codes (OK entries are ignored).
+        examples: optional {code: short description} of one offending packet.
+        """
+        counts = np.bincount(np.atleast_1d(np.asarray(reasons, dtype=np.uint8)), minlength=len(VALIDATION_REASONS))
+        counts[REASON_OK] = 0
+        if not counts.any():
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._pending += counts
+            self.totals += counts
+            for code, example in (examples or {}).items():
+                self._example[code] = example
+            due = np.flatnonzero((self._pending > 0) & (now - self._last_emit >= self.interval))
+            emits = [self._take(code, now) for code in due]
+        for level, msg in emits:
+            logger.log(level, msg)
+
+    def _take(self, code: int, now: float) -> tuple:
+        count, window = int(self._pending[code]), now - self._last_emit[code]
+        self._pending[code] = 0
+        self._last_emit[code] = now
+        example, self._example[code] = self._example[code], None
+        span = f" in last {window:.1f}s" if np.isfinite(window) else ""
+        msg = f"DataGuard: {count} packet(s) rejected [{VALIDATION_REASONS[code]}]{span}"
+        return _REASON_LOG_LEVEL[code], msg + (f" (e.g. {example})" if example else "")
+
+    def flush(self):
+        """Logs every pending summary now (e.g. at the end of a replay)."""
+        now = time.monotonic()
+        with self._lock:
+            emits = [self._take(code, now) for code in np.flatnonzero(self._pending)]
+        for level, msg in emits:
+            logger.log(level, msg)
+
 
 class DataGuard:
     """
@@ -11,43 +155,220 @@ class DataGuard:
     Implements 'Fail-Safe' logic ensuring absolute data integrity.
     """
 
-    def __init__(self):
+    # Envelope yoksa eski kural: sadece Sensor 2 (T24) için 0-1000
+    LEGACY_BOUNDS = {"sensor_measurement2": (0.0, 1000.0)}
+
+    def __init__(self, dataset: str = None, margin: float = 0.5, hard_margin: float = 10.0,
+                 report_interval: float = 5.0):
         self.required_sensors = [f'sensor_measurement{i}' for i in range(1, 22)]
+        self._required_set = frozenset(self.required_sensors)
+        self.dataset = dataset
+        self.margin = margin
+        self.hard_margin = hard_margin
+        self.reload_bounds()
+        self.reporter = ValidationReporter(report_interval)
+
+    def reload_bounds(self):
+        """Re-reads the envelope (e.g. after the model registry swapped it in)."""
+        (self.lower, self.upper), (self.envelope_lower, self.envelope_upper) = \
+            self._load_bounds(self.dataset, self.margin, self.hard_margin)
+
+    def _load_bounds(self, dataset, margin, hard_margin):
+        """
+        ((lower, upper), (envelope_lower, envelope_upper)) arrays aligned with required_sensors.
+        lower/upper: physically impossible values, rejected as OUT_OF_BOUNDS.
+        envelope_*: training envelope + margin; readings outside are scored and escalated
+        by the Orchestrator (a more extreme reading must never silence the alarm).
+        """
+        envelope = get_sensor_envelope()
+        if envelope is not None and envelope.sensors == self.required_sensors:
+            hard = envelope.hard_bounds(dataset=dataset, margin=hard_margin)
+            soft = envelope.bounds(dataset=dataset, margin=margin)
+            logger.info(f"DataGuard: envelope bounds for {len(soft[0])} sensors "
+                        f"({dataset or '+'.join(envelope.datasets)}, margin={margin:g}, "
+                        f"hard_margin={hard_margin:g}).")
+            return hard, soft
+
+        lower = np.full(len(self.required_sensors), -np.inf)
+        upper = np.full(len(self.required_sensors), np.inf)
+        for sensor, (lo, hi) in self.LEGACY_BOUNDS.items():
+            i = self.required_sensors.index(sensor)
+            lower[i], upper[i] = lo, hi
+        return (lower, upper), (lower, upper)
+
+    def out_of_envelope(self, sensors) -> np.ndarray:
+        """
+        Rows outside the training envelope (but inside the hard limits, i.e. valid).
+        sensors: (n, 21) values in required_sensors order, or one packet dict.
+        """
+        if isinstance(sensors, dict):
+            sensors = [[sensors[s] for s in self.required_sensors]]
+        values = np.atleast_2d(np.asarray(sensors, dtype=np.float64))
+        return ((values < self.envelope_lower) | (values > self.envelope_upper)).any(axis=1)
 
     def validate(self, data_packet: dict) -> bool:
+        code, detail = self.check(data_packet)
+        if code != REASON_OK:
+            self.reporter.record(code, {code: detail} if detail else None)
+        return code == REASON_OK
+
+    def check(self, data_packet: dict) -> tuple:
+        """Single-packet check. Returns (reason code, detail string or None)."""
         if not data_packet:
-            logger.warning("DataGuard: Empty data packet received.")
-            return False
+            return REASON_EMPTY, None
 
-        # 1. CYCLE KONTROLÜ
-        if 'cycle' not in data_packet:
-            logger.error("DataGuard: Critical missing key 'cycle'.")
-            return False
+        # 1. CYCLE KONTROLÜ (anahtar yok, None veya NaN: validate_batch ile aynı)
+        cycle = data_packet.get('cycle')
+        if cycle is None or (isinstance(cycle, float) and np.isnan(cycle)):
+            return REASON_MISSING_CYCLE, None
 
         # 2. SENSÖR VARLIK KONTROLÜ
-        missing = [s for s in self.required_sensors if s not in data_packet]
-        if missing:
-            logger.error(f"DataGuard: Missing sensors in cycle {data_packet.get('cycle')}: {missing}")
-            return False
+        try:
+            sensor_vals = [data_packet[s] for s in self.required_sensors]
+        except KeyError:
+            missing = [s for s in self.required_sensors if s not in data_packet]
+            return REASON_MISSING_SENSOR, f"cycle {cycle}: {missing}"
 
         # 3. NULL DEĞER KONTROLÜ
-        sensor_vals = [data_packet.get(s) for s in self.required_sensors]
         if any(v is None for v in sensor_vals):
-            logger.warning(f"DataGuard: Null sensor value detected in cycle {data_packet.get('cycle')}")
-            return False
+            return REASON_NULL, f"cycle {cycle}"
 
-        # 4. FİZİKSEL SINIR VE TİP KONTROLÜ (Example: T24 Temperature)
-        t24_raw = data_packet.get('sensor_measurement2')
+        # 4. TİP KONTROLÜ
         try:
-            t24 = float(t24_raw) if t24_raw is not None else None
-            if t24 is not None and (t24 < 0 or t24 > 1000):
-                logger.critical(f"DataGuard: Sensor 2 (T24) Out of Physical Bounds: {t24}")
-                return False
+            values = np.array(sensor_vals, dtype=np.float64)
         except (TypeError, ValueError):
-            logger.error(f"DataGuard: Sensor 2 (T24) non-numeric value: {t24_raw}")
-            return False
+            bad = [s for s, v in zip(self.required_sensors, sensor_vals) if not _is_number(v)]
+            return REASON_NON_NUMERIC, f"cycle {cycle}: {bad}"
+        if np.isnan(values).any():
+            return REASON_NULL, f"cycle {cycle}"
+
+        # 5. FİZİKSEL SINIR KONTROLÜ (tüm sensörler, tek vektörel karşılaştırma; zarf dışı ama
+        #    mümkün değerler geçer, Orchestrator skorlar ve önceliği yükseltir)
+        out_of_bounds = (values < self.lower) | (values > self.upper)
+        if out_of_bounds.any():
+            details = {self.required_sensors[i]: float(values[i]) for i in np.flatnonzero(out_of_bounds)}
+            return REASON_OUT_OF_BOUNDS, f"cycle {cycle}: {details}"
+
+        # 6. UNIT KONTROLÜ: unit_number fleet durum dizilerinin indeksi (negatif = başka motorun durumu)
+        unit = data_packet.get('unit_number')
+        if unit is not None and not _is_unit_id(unit):
+            return REASON_INVALID_UNIT, f"cycle {cycle}: unit_number={unit!r}"
+
+        return REASON_OK, None
+
+    def validate_batch(self, packets, columns: list = None, report: bool = True) -> tuple:
+        """
+        Vectorized validate() for many packets.
+
+        packets: DataFrame, list of packet dicts, or a 2D array whose columns are
+        `columns` (default: required_sensors, no cycle column).
+        Returns (mask, reasons): bool array and uint8 codes into VALIDATION_REASONS.
+        Rejections go to the rate-limited reporter (one summary per reason).
+        """
+        if isinstance(packets, np.ndarray) and packets.dtype != object:
+            mask, reasons = self._batch_array(np.atleast_2d(packets), columns or self.required_sensors)
+        elif isinstance(packets, pd.DataFrame):
+            mask, reasons = self._batch_frame(packets)
+        else:
+            mask, reasons = self._batch_records(packets if isinstance(packets, list) else list(packets))
+
+        if report and not mask.all():
+            codes, first = np.unique(reasons, return_index=True)
+            self.reporter.record(reasons, {int(c): f"row {i}" for c, i in zip(codes, first) if c != REASON_OK})
+        return mask, reasons
+
+    def _batch_array(self, values: np.ndarray, columns: list) -> tuple:
+        n = len(values)
+        index = {c: i for i, c in enumerate(columns)}
+        missing_sensor = any(s not in index for s in self.required_sensors)
+        if missing_sensor:
+            return self._finish_batch(n, missing_sensor=np.ones(n, dtype=bool))
 
+        sensors = values[:, [index[s] for s in self.required_sensors]].astype(np.float64, copy=False)
+        missing_cycle = np.isnan(values[:, index['cycle']].astype(np.float64)) if 'cycle' in index else None
+        invalid_unit = None
+        if 'unit_number' in index:
+            units = values[:, index['unit_number']].astype(np.float64)
+            invalid_unit = ~np.isnan(units) & ~_unit_id_mask(units)
+        return self._finish_batch(n, missing_cycle=missing_cycle, null=np.isnan(sensors).any(axis=1),
+                                  sensors=sensors, invalid_unit=invalid_unit)
+
+    def _batch_frame(self, frame: pd.DataFrame, present: np.ndarray = None, has_cycle: np.ndarray = None,
+                     empty: np.ndarray = None) -> tuple:
+        n = len(frame)
+        if any(s not in frame.columns for s in self.required_sensors):
+            missing = np.ones(n, dtype=bool) if present is None else ~present
+            return self._finish_batch(n, empty=empty, missing_cycle=None if has_cycle is None else ~has_cycle,
+                                      missing_sensor=missing)
+
+        raw = frame[self.required_sensors]
+        is_null = raw.isna().to_numpy()
+        numeric = raw
+        non_numeric = None
+        object_cols = [c for c in self.required_sensors if raw[c].dtype == object]
+        if object_cols:
+            numeric = raw.copy()
+            numeric[object_cols] = raw[object_cols].apply(pd.to_numeric, errors="coerce")
+            non_numeric = (numeric.isna().to_numpy() & ~is_null).any(axis=1)
+        sensors = numeric.to_numpy(dtype=np.float64)
+
+        if has_cycle is None:
+            has_cycle = frame['cycle'].notna().to_numpy() if 'cycle' in frame.columns else np.zeros(n, dtype=bool)
+        invalid_unit = None
+        if 'unit_number' in frame.columns:
+            units = pd.to_numeric(frame['unit_number'], errors="coerce").to_numpy(dtype=np.float64)
+            invalid_unit = frame['unit_number'].notna().to_numpy() & ~_unit_id_mask(units)
+        return self._finish_batch(n, empty=empty, missing_cycle=~has_cycle,
+                                  missing_sensor=None if present is None else ~present,
+                                  null=is_null.any(axis=1), non_numeric=non_numeric, sensors=sensors,
+                                  invalid_unit=invalid_unit)
+
+    def _batch_records(self, records: list) -> tuple:
+        n = len(records)
+        required = self._required_set
+        empty = np.fromiter((not r for r in records), dtype=bool, count=n)
+        rows = [r if r else {} for r in records]
+        # Anahtar varlığı satır bazında (from_records eksik anahtar ile None'ı ayırt edemez)
+        present = np.fromiter((r.keys() >= required for r in rows), dtype=bool, count=n)
+        frame = pd.DataFrame.from_records(rows)
+        # cycle: DataFrame yolu gibi None/NaN de eksik sayılır (eksik anahtar from_records'ta NaN olur)
+        has_cycle = frame['cycle'].notna().to_numpy() if 'cycle' in frame.columns else np.zeros(n, dtype=bool)
+        return self._batch_frame(frame, present=present, has_cycle=has_cycle, empty=empty)
+
+    def _finish_batch(self, n, empty=None, missing_cycle=None, missing_sensor=None, null=None,
+                      non_numeric=None, sensors=None, invalid_unit=None) -> tuple:
+        none = np.zeros(n, dtype=bool)
+        out_of_bounds = none
+        if sensors is not None:
+            out_of_bounds = ((sensors < self.lower) | (sensors > self.upper)).any(axis=1)
+        # Öncelik sırası validate() ile aynı: ilk tutan koşulun kodu yazılır
+        conditions = [c if c is not None else none
+                      for c in (empty, missing_cycle, missing_sensor, null, non_numeric, out_of_bounds, invalid_unit)]
+        reasons = np.select(conditions, np.arange(1, len(conditions) + 1, dtype=np.uint8),
+                            default=REASON_OK).astype(np.uint8)
+        return reasons == REASON_OK, reasons
+
+
+def _is_number(value) -> bool:
+    try:
+        float(value)
         return True
+    except (TypeError, ValueError):
+        return False
+
+
+def _unit_id_mask(units: np.ndarray) -> np.ndarray:
+    """True where a unit_number is usable as a state index: finite, integral, >= 0."""
+    with np.errstate(invalid="ignore"):
+        return np.isfinite(units) & (units >= 0) & (units == np.floor(units))
+
+
+def _is_unit_id(value) -> bool:
+    try:
+        return bool(_unit_id_mask(np.array([float(value)]))[0])
+    except (TypeError, ValueError):
+        return False
+
 
 class StatsGuard:
     """
@@ -57,27 +378,66 @@ class StatsGuard:
     - Decision Logic via Probabilistic Risk Mapping
     """
 
-    def __init__(self, use_ewma: bool = True, ewma_alpha: float = 0.2):
+    def __init__(self, use_ewma: bool = True, ewma_alpha: float = 0.2, registry=None, risk_params: dict = None):
         self.ready = False
+        self.risk_params = {**RISK_PARAMS, **(risk_params or {})}
+        self.threshold = 0.0
+        self.registry = registry or get_model_registry()
+        self.load_models()
+
+        self.use_ewma = use_ewma
+        self.ewma_alpha = float(ewma_alpha)
+        self._ewma = None
+        self._unit_ewma = np.full(1, np.nan)  # Batch API: EWMA memory indexed by unit_number
+
+    def load_models(self) -> bool:
+        """
+        (Re)binds the watchdog from the model registry; EWMA memory is kept.
+        Prefers the flat, memory-mapped export (no sklearn import); falls back to
+        the scaler.pkl / watchdog_model.pkl pickles if it has not been exported yet.
+        """
         try:
-            self.scaler = joblib.load(SCALER_PATH)
-            packet = joblib.load(WATCHDOG_MODEL_PATH)
+            model = self.registry.watchdog()
+            if model is None:
+                raise FileNotFoundError("watchdog_flat.json / scaler.pkl + watchdog_model.pkl missing")
 
-            self.pca = packet["pca"]
-            self.threshold = float(packet["threshold"])
-            self.features = packet["selected_features"]
+            self.model = model
+            self.threshold = model.threshold
+            self.features = model.features
+            self._scaler_scale, self._scaler_min = model.scale, model.scaler_min
+            self._proj_A, self._proj_b = model.proj_A, model.proj_b
             self.ready = True
             logger.info("StatsGuard: Model and Scaler loaded successfully.")
         except Exception as e:
+            self.ready = False
             logger.error(f"StatsGuard: FAILED to load model components: {e}")
+        return self.ready
 
-        self.use_ewma = use_ewma
-        self.ewma_alpha = float(ewma_alpha)
-        self._ewma = None
+    def _unit_memory(self, unit_ids: np.ndarray) -> np.ndarray:
+        """Returns the per-unit EWMA array, grown to fit the largest unit id."""
+        needed = int(unit_ids.max()) + 1 if len(unit_ids) else 0
+        if needed > len(self._unit_ewma):
+            grown = np.full(max(needed, 2 * len(self._unit_ewma)), np.nan)
+            grown[:len(self._unit_ewma)] = self._unit_ewma
+            self._unit_ewma = grown
+        return self._unit_ewma
+
+    def deviating_sensors(self, data_packet: dict, margin: float = 0.0) -> list:
+        """
+        Features whose value lies outside the healthy training range
+        (MinMax-scaled value below -margin or above 1 + margin).
+        """
+        if not self.ready:
+            return []
+        x = np.array([float(data_packet.get(f, np.nan)) for f in self.features])
+        scaled = x * self._scaler_scale + self._scaler_min
+        outside = (scaled < -margin) | (scaled > 1.0 + margin)
+        return [f for f, out in zip(self.features, outside) if out]
 
     def reset(self):
         """Resets the EWMA memory for a clean simulation start."""
         self._ewma = None
+        self._unit_ewma = np.full(1, np.nan)
         logger.info("StatsGuard: EWMA memory reset.")
 
     def score(self, data_packet: dict) -> dict:
@@ -92,19 +452,18 @@ class StatsGuard:
             return {"ok": False, "reason": "MISSING_FEATURES", "missing": missing}
 
         # 2. VERİ TİPİ GÜVENLİĞİ (Numeric Cast)
-        df = pd.DataFrame([data_packet])[self.features]
-        df = df.apply(pd.to_numeric, errors="coerce")
-        if df.isna().any().any():
+        try:
+            x = np.array([data_packet[f] for f in self.features], dtype=np.float64)
+        except (TypeError, ValueError):
+            x = pd.to_numeric(pd.Series([data_packet[f] for f in self.features]), errors="coerce").to_numpy(np.float64)
+        if np.isnan(x).any():
             logger.error("StatsGuard: Non-numeric or NaN detected after casting.")
             return {"ok": False, "reason": "NON_NUMERIC_OR_NAN_DETECTED"}
 
         # 3. SPE (Squared Prediction Error) HESAPLAMA
-        X = self.scaler.transform(df)
-        X_pca = self.pca.transform(X)
-        X_proj = self.pca.inverse_transform(X_pca)
-
-        # SPE (Q-Residual) hesabı
-        spe = float(np.mean(np.square(X - X_proj), axis=1)[0])
+        # Scaler + PCA reconstruction katlanmış tek affine dönüşüm (score_batch ile aynı)
+        residual = x @ self._proj_A + self._proj_b
+        spe = float(residual @ residual) / residual.shape[0]
         ratio = float(spe / self.threshold) if self.threshold > 0 else 0.0
 
         # 4. TEMPORAL SMOOTHING (EWMA)
@@ -118,15 +477,16 @@ class StatsGuard:
             smoothed_ratio = ratio
 
         # 5. RISK MAPPING (Sigmoid)
-        risk_score = float(1.0 / (1.0 + np.exp(-10.0 * (smoothed_ratio - 1.0))))
+        p = self.risk_params
+        risk_score = float(1.0 / (1.0 + np.exp(-p["steepness"] * (smoothed_ratio - 1.0))))
 
-        # 6. HİBRİT KARAR MEKANİZMASI
-        if ratio >= 1.5:  # Hard Override (Spike detection)
+        # 6. HİBRİT KARAR MEKANİZMASI (map_risk ile aynı kurallar, skaler yol)
+        if ratio >= p["spike_ratio"]:  # Hard Override (Spike detection)
             level = "CRITICAL"
         else:
-            if risk_score >= 0.85: level = "CRITICAL"
-            elif risk_score >= 0.60: level = "HIGH"
-            elif risk_score >= 0.40: level = "MEDIUM"
+            if risk_score >= p["critical"]: level = "CRITICAL"
+            elif risk_score >= p["high"]: level = "HIGH"
+            elif risk_score >= p["medium"]: level = "MEDIUM"
             else: level = "LOW"
 
         return {
@@ -137,4 +497,64 @@ class StatsGuard:
             "smoothed_ratio": smoothed_ratio,
             "risk_score": risk_score,
             "risk_level": level
-        }
\ No newline at end of file
+        }
+
+    def score_batch(self, X, unit_ids=None) -> dict:
+        """
+        Vectorized counterpart of `score` for many packets at once.
+
+        X: (n, len(self.features)) array in `self.features` order (a DataFrame is
+           reduced to those columns). unit_ids: unit_number per row; rows of
+           different engines may be interleaved, each unit keeps its own EWMA
+           state across calls. Rows with NaN features come back with ok=False.
+        """
+        if not self.ready:
+            return {"ok": False, "reason": "MODEL_NOT_READY"}
+
+        if isinstance(X, pd.DataFrame):
+            X = X[self.features].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != len(self.features):
+            raise ValueError(f"StatsGuard: expected (n, {len(self.features)}) feature matrix, got {X.shape}")
+
+        n = X.shape[0]
+        if unit_ids is None:
+            units = np.zeros(n, dtype=np.int64)
+        else:
+            units = np.asarray(unit_ids).astype(np.int64, copy=False)
+            if units.shape != (n,):
+                raise ValueError("StatsGuard: unit_ids must have one entry per row.")
+            if n and units.min() < 0:
+                # Negatif id EWMA dizisinin sonundan başka bir motorun belleğini okur/yazar
+                raise ValueError("StatsGuard: unit_ids must be >= 0.")
+
+        ok = ~np.isnan(X).any(axis=1)
+        spe = np.full(n, np.nan)
+        ratio = np.full(n, np.nan)
+        smoothed = np.full(n, np.nan)
+
+        # 1. SPE: tek matris çarpımı (scaler + PCA reconstruction)
+        residual = X[ok] @ self._proj_A + self._proj_b
+        spe[ok] = np.einsum("ij,ij->i", residual, residual) / residual.shape[1]
+        ratio[ok] = spe[ok] / self.threshold if self.threshold > 0 else 0.0
+
+        # 2. EWMA (unit bazında)
+        if self.use_ewma:
+            memory = self._unit_memory(units[ok])
+            smoothed[ok] = grouped_ewma(ratio[ok], units[ok], memory, self.ewma_alpha)
+        else:
+            smoothed[ok] = ratio[ok]
+
+        # 3. Risk + hybrid level (aynı kurallar: spike override + sigmoid eşikleri)
+        risk_score, risk_code = map_risk(ratio, smoothed, self.risk_params)
+
+        return {
+            "ok": ok,
+            "spe": spe,
+            "threshold": self.threshold,
+            "ratio": ratio,
+            "smoothed_ratio": smoothed,
+            "risk_score": risk_score,
+            "risk_code": risk_code,
+            "risk_level": RISK_LEVELS[risk_code]
+        }
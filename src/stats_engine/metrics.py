@@ -7,17 +7,55 @@
 # - Lead Time: Arızadan kaç cycle önce ilk uyarıyı verdik?
 # - First Warning Cycle: İlk alarm cycle'ı
 # - False Alarm Rate (/100 cycle): failure window dışında verilen alarm oranı
-
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.metrics import (
-    confusion_matrix,
-    recall_score,
-    accuracy_score,
-    f1_score,
-    roc_auc_score,
-    classification_report
-)
+#
+# BACKTEST MODU: `backtest` tüm filonun (unit, cycle, prediction, score) dizilerini
+# tek çağrıda, unit bazında gruplanmış NumPy işlemleriyle değerlendirir.
+
+import math
+
+import numpy as np
+import pandas as pd
+
+# sklearn / matplotlib / seaborn sadece exact rapor ve grafik yollarında (ilk kullanımda) yüklenir:
+# dashboard ve headless scorer bu paketler olmadan da açılır.
+
+
+def binary_metrics(y_true: np.ndarray, y_pred: np.ndarray) -> dict:
+    """Recall / precision / F1 / accuracy of the positive class (zero_division=0)."""
+    y_true = np.asarray(y_true, dtype=bool)
+    y_pred = np.asarray(y_pred, dtype=bool)
+    tp = int(np.count_nonzero(y_true & y_pred))
+    fp = int(np.count_nonzero(~y_true & y_pred))
+    fn = int(np.count_nonzero(y_true & ~y_pred))
+    tn = len(y_true) - tp - fp - fn
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    f1 = 2 * tp / (2 * tp + fp + fn) if tp else 0.0
+    accuracy = (tp + tn) / len(y_true) if len(y_true) else 0.0
+    return {"recall": recall, "precision": precision, "f1": f1, "accuracy": accuracy,
+            "tp": tp, "fp": fp, "fn": fn, "tn": tn}
+
+
+def roc_auc(y_true: np.ndarray, score: np.ndarray) -> float:
+    """
+    ROC-AUC via the rank-sum (Mann-Whitney U) identity; ties get average ranks,
+    so the result equals sklearn's roc_auc_score. 0.0 if only one class is present.
+    """
+    y_true = np.asarray(y_true, dtype=bool)
+    score = np.asarray(score, dtype=np.float64)
+    n = len(score)
+    n_pos = int(np.count_nonzero(y_true))
+    n_neg = n - n_pos
+    if n_pos == 0 or n_neg == 0:
+        return 0.0
+
+    order = np.argsort(score, kind="mergesort")
+    sorted_score = score[order]
+    tie_start = np.flatnonzero(np.r_[True, sorted_score[1:] != sorted_score[:-1]])
+    tie_end = np.r_[tie_start[1:], n]
+    ranks = np.empty(n, dtype=np.float64)
+    ranks[order] = np.repeat((tie_start + tie_end + 1) / 2.0, tie_end - tie_start)
+    return float((ranks[y_true].sum() - n_pos * (n_pos + 1) / 2.0) / (n_pos * n_neg))
 
 
 class PerformanceEvaluator:
@@ -93,6 +131,90 @@ class PerformanceEvaluator:
             return 0.0
         return (self.false_alarm_count / denom) * 100.0
 
+    # --- Fleet backtest (vektörel) ---
+    def backtest(self, units, cycles, y_pred, y_prob=None, y_true=None, fail_cycles=None) -> dict:
+        """
+        Offline evaluation of a whole fleet in one call.
+
+        units, cycles, y_pred (0/1 alarm) and y_prob (score, default y_pred): one entry
+        per step, engines may be interleaved. fail_cycles: {unit: fail cycle}; defaults
+        to each unit's last cycle (run-to-failure files). y_true defaults to the
+        failure window (cycle >= fail_cycle - fail_window), as in the dashboard.
+
+        Per-unit rules match add_record: an alarm event starts where the prediction
+        goes 0 -> 1; events before the failure window are false alarms.
+        Returns {"units": DataFrame (one row per unit), "fleet": dict}.
+        """
+        units = np.asarray(units).astype(np.int64, copy=False)
+        cycles = np.asarray(cycles).astype(np.int64, copy=False)
+        pred = np.asarray(y_pred).astype(bool, copy=False)
+        prob = pred.astype(np.float64) if y_prob is None else np.asarray(y_prob, dtype=np.float64)
+
+        # unit içinde cycle sırasına diz (girdi filo olarak karışık gelebilir)
+        order = np.lexsort((cycles, units))
+        units, cycles, pred, prob = units[order], cycles[order], pred[order], prob[order]
+
+        n = len(units)
+        if n == 0:
+            return {"units": pd.DataFrame(columns=["unit_number", "cycles", "fail_cycle", "first_warning_cycle",
+                                                   "lead_time", "total_triggers", "alarm_events",
+                                                   "false_alarm_count", "false_alarm_rate_per_100"]),
+                    "fleet": {}}
+
+        first_row = np.r_[True, units[1:] != units[:-1]]
+        starts = np.flatnonzero(first_row)
+        lengths = np.diff(np.r_[starts, n])
+        unit_ids = units[starts]
+
+        if fail_cycles is None:
+            unit_fail = cycles[np.r_[starts[1:], n] - 1]
+        else:
+            unit_fail = np.array([fail_cycles.get(int(u), -1) for u in unit_ids], dtype=np.int64)
+        fail = np.repeat(unit_fail, lengths)
+        has_fail = fail >= 0
+
+        if y_true is None:
+            truth = has_fail & (cycles >= fail - self.fail_window)
+        else:
+            truth = np.asarray(y_true).astype(bool, copy=False)[order]
+
+        # Alarm olayları (0 -> 1 geçişleri) ve failure window öncesindekiler = false alarm
+        onset = pred & (first_row | ~np.r_[False, pred[:-1]])
+        false_alarm = onset & has_fail & (cycles < fail - self.fail_window)
+
+        never = np.iinfo(np.int64).max
+        first_warning = np.minimum.reduceat(np.where(pred, cycles, never), starts)
+        warned = first_warning != never
+        triggers = np.add.reduceat(pred.astype(np.int64), starts)
+        events = np.add.reduceat(onset.astype(np.int64), starts)
+        false_count = np.add.reduceat(false_alarm.astype(np.int64), starts)
+
+        per_unit = pd.DataFrame({
+            "unit_number": unit_ids,
+            "cycles": lengths,
+            "fail_cycle": unit_fail,
+            "first_warning_cycle": np.where(warned, first_warning, -1),
+            "lead_time": np.where(warned & (unit_fail >= 0), unit_fail - first_warning, -1),
+            "total_triggers": triggers,
+            "alarm_events": events,
+            "false_alarm_count": false_count,
+            "false_alarm_rate_per_100": false_count / lengths * 100.0,
+        })
+
+        lead = per_unit["lead_time"].to_numpy()
+        fleet = binary_metrics(truth, pred)
+        fleet.update({
+            "auc": roc_auc(truth, prob),
+            "units": len(unit_ids),
+            "steps": n,
+            "detected_units": int(np.count_nonzero(warned)),
+            "lead_time_mean": float(lead[lead >= 0].mean()) if (lead >= 0).any() else None,
+            "lead_time_median": float(np.median(lead[lead >= 0])) if (lead >= 0).any() else None,
+            "false_alarm_count": int(false_count.sum()),
+            "false_alarm_rate_per_100": float(false_count.sum() / n * 100.0),
+        })
+        return {"units": per_unit, "fleet": fleet}
+
     def generate_report(self):
         """
         Calculates and prints standard industrial safety metrics + Watchdog metrics.
@@ -102,6 +224,8 @@ class PerformanceEvaluator:
         print("📊 MODEL PERFORMANCE REPORT (MVP + WATCHDOG)")
         print("=" * 46)
 
+        from sklearn.metrics import recall_score, accuracy_score, f1_score, roc_auc_score
+
         # --- Core Metrics ---
         recall = recall_score(self.y_true, self.y_pred, zero_division=0)
         f1 = f1_score(self.y_true, self.y_pred, zero_division=0)
@@ -141,6 +265,7 @@ class PerformanceEvaluator:
 
         print("\n" + "-" * 46)
         print("🔍 Detailed Classification Report:")
+        from sklearn.metrics import classification_report
         print(classification_report(
             self.y_true,
             self.y_pred,
@@ -154,6 +279,10 @@ class PerformanceEvaluator:
         """
         Visualizes the Confusion Matrix to highlight False Negatives.
         """
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        from sklearn.metrics import confusion_matrix
+
         cm = confusion_matrix(self.y_true, self.y_pred)
 
         plt.figure(figsize=(6, 5))
@@ -169,3 +298,171 @@ class PerformanceEvaluator:
 
         plt.tight_layout()
         plt.show()
+
+
+class _UnitAlarmState:
+    """Alarm-event state machine of one engine (constant size)."""
+    __slots__ = ("prev_pred", "first_warning_cycle", "fail_cycle", "steps", "total_triggers",
+                 "alarm_events", "false_alarm_count")
+
+    def __init__(self):
+        self.prev_pred = 0
+        self.first_warning_cycle = None
+        self.fail_cycle = None
+        self.steps = 0
+        self.total_triggers = 0
+        self.alarm_events = 0
+        self.false_alarm_count = 0
+
+    def lead_time(self):
+        if self.fail_cycle is None or self.first_warning_cycle is None:
+            return None
+        return int(self.fail_cycle - self.first_warning_cycle)
+
+
+class StreamingEvaluator:
+    """
+    Bounded-memory counterpart of PerformanceEvaluator for continuous monitoring.
+
+    - Running confusion matrix (tp/fp/fn/tn counters)
+    - Per-unit alarm-event state machines (same rules as add_record)
+    - Fixed-bin score histograms per class -> approximate ROC-AUC
+      (exact up to ties within one bin of width (hi - lo) / bins); NaN/inf
+      scores are left out of the histograms and counted in nonfinite_scores
+
+    add_record is O(1) and memory is O(bins + n_units); snapshot() is O(bins + n_units).
+    The exact sklearn path stays in PerformanceEvaluator for offline use.
+    """
+
+    def __init__(self, fail_window: int = 10, bins: int = 1000, score_range: tuple = (0.0, 1.0)):
+        self.fail_window = int(fail_window)
+        self.bins = int(bins)
+        self.lo, self.hi = float(score_range[0]), float(score_range[1])
+        self._bin_scale = self.bins / (self.hi - self.lo)
+        self.reset()
+
+    def reset(self):
+        self.tp = self.fp = self.fn = self.tn = 0
+        self._hist = [[0] * self.bins, [0] * self.bins]  # [negatif, pozitif] skor histogramları
+        self.nonfinite_scores = 0
+        self._units = {}
+
+    def _unit(self, unit) -> _UnitAlarmState:
+        state = self._units.get(unit)
+        if state is None:
+            state = self._units[unit] = _UnitAlarmState()
+        return state
+
+    def set_fail_cycle(self, fail_cycle: int, unit=None):
+        """Gerçek arıza cycle'ını bildir (unit=None: tek motor modu)."""
+        self._unit(unit).fail_cycle = int(fail_cycle)
+
+    def add_record(self, ground_truth, prediction, probability=None, cycle: int = None, unit=None):
+        """Same arguments as PerformanceEvaluator.add_record (+ unit for fleet streams)."""
+        gt = int(ground_truth)
+        pred = int(prediction)
+
+        # Karışıklık matrisi
+        if gt:
+            if pred: self.tp += 1
+            else: self.fn += 1
+        else:
+            if pred: self.fp += 1
+            else: self.tn += 1
+
+        # Skor histogramı (aralık dışı skorlar uç binlere kırpılır)
+        # NaN/inf skor: histogram dışı (int() patlar; karar ve alarm sayaçları yine işlenir)
+        score = float(probability) if probability is not None else float(pred)
+        if math.isfinite(score):
+            b = int((score - self.lo) * self._bin_scale)
+            self._hist[1 if gt else 0][0 if b < 0 else (self.bins - 1 if b >= self.bins else b)] += 1
+        else:
+            self.nonfinite_scores += 1
+
+        # Unit alarm durumu
+        state = self._unit(unit)
+        state.steps += 1
+        if pred == 1:
+            state.total_triggers += 1
+            if state.prev_pred == 0:  # yeni alarm olayı
+                state.alarm_events += 1
+                if state.first_warning_cycle is None and cycle is not None:
+                    state.first_warning_cycle = int(cycle)
+                if cycle is not None and state.fail_cycle is not None \
+                        and int(cycle) < state.fail_cycle - self.fail_window:
+                    state.false_alarm_count += 1
+        state.prev_pred = pred
+
+    def approximate_auc(self) -> float:
+        """ROC-AUC from the class histograms (0.0 if only one class was seen)."""
+        neg = np.asarray(self._hist[0], dtype=np.float64)
+        pos = np.asarray(self._hist[1], dtype=np.float64)
+        n_neg, n_pos = neg.sum(), pos.sum()
+        if n_neg == 0 or n_pos == 0:
+            return 0.0
+        neg_below = np.cumsum(neg) - neg
+        # aynı bindeki çiftler beraberlik sayılır (yarım puan)
+        return float((pos * (neg_below + 0.5 * neg)).sum() / (n_pos * n_neg))
+
+    def snapshot(self, per_unit: bool = False) -> dict:
+        """Current metrics; cheap enough to call after every record."""
+        tp, fp, fn, tn = self.tp, self.fp, self.fn, self.tn
+        total = tp + fp + fn + tn
+        states = list(self._units.values())
+        steps = sum(s.steps for s in states)
+        false_alarms = sum(s.false_alarm_count for s in states)
+        leads = [lt for lt in (s.lead_time() for s in states) if lt is not None]
+        if len(states) == 1:
+            lead = states[0].lead_time()
+        else:
+            lead = float(np.mean(leads)) if leads else None  # filo: unit ortalaması
+
+        snap = {
+            "steps": total,
+            "recall": tp / (tp + fn) if tp + fn else 0.0,
+            "precision": tp / (tp + fp) if tp + fp else 0.0,
+            "f1": 2 * tp / (2 * tp + fp + fn) if tp else 0.0,
+            "accuracy": (tp + tn) / total if total else 0.0,
+            "auc": self.approximate_auc(),
+            "nonfinite_scores": self.nonfinite_scores,
+            "tp": tp, "fp": fp, "fn": fn, "tn": tn,
+            "units": len(states),
+            "total_triggers": sum(s.total_triggers for s in states),
+            "false_alarm_count": false_alarms,
+            "false_alarm_rate_per_100": false_alarms / steps * 100.0 if steps else 0.0,
+            "lead_time": lead,
+        }
+        if len(states) == 1:
+            snap["first_warning_cycle"] = states[0].first_warning_cycle
+            snap["fail_cycle"] = states[0].fail_cycle
+        if per_unit:
+            snap["per_unit"] = {
+                unit: {"first_warning_cycle": s.first_warning_cycle, "fail_cycle": s.fail_cycle,
+                       "lead_time": s.lead_time(), "steps": s.steps, "total_triggers": s.total_triggers,
+                       "alarm_events": s.alarm_events, "false_alarm_count": s.false_alarm_count}
+                for unit, s in self._units.items()
+            }
+        return snap
+
+    def generate_report(self):
+        """
+        Prints the streaming metrics.
+        Returns: recall, accuracy, f1, auc, lead_time, false_alarm_rate (PerformanceEvaluator order)
+        """
+        snap = self.snapshot()
+        print("\n" + "=" * 46)
+        print("📊 MODEL PERFORMANCE REPORT (STREAMING)")
+        print("=" * 46)
+        print(f"✅ Recall (Safety Critical):      {snap['recall'] * 100:.2f}%")
+        print(f"🎯 Accuracy (Baseline):           {snap['accuracy'] * 100:.2f}%")
+        print(f"⚖️  F1 Score (Balance):           {snap['f1'] * 100:.2f}%")
+        print(f"📈 ROC-AUC Score (~{self.bins} bins):    {snap['auc']:.4f}")
+        print("\n" + "-" * 46)
+        print("🛡️ WATCHDOG / PdM METRICS")
+        lead = snap["lead_time"]
+        print(f"⏱️ Lead Time (cycles):            {'N/A' if lead is None else lead}")
+        print(f"📉 False Alarm Rate (/100 cycle): {snap['false_alarm_rate_per_100']:.2f}")
+        print(f"🔔 Total Triggers:                {snap['total_triggers']}")
+        print(f"🧮 Confusion [tn fp / fn tp]:     [{snap['tn']} {snap['fp']} / {snap['fn']} {snap['tp']}]")
+
+        return snap["recall"], snap["accuracy"], snap["f1"], snap["auc"], lead, snap["false_alarm_rate_per_100"]
@@ -0,0 +1,231 @@
+import hashlib
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from config.paths import (WATCHDOG_MODEL_PATH, WATCHDOG_FLAT_PATH, SCALER_PATH, RUL_FOREST_PATH,
+                          RUL_MODEL_PATH, SENSOR_ENVELOPE_PATH)
+from src.utils.logger import logger
+
+# Process-wide model registry: every artifact is loaded once per process and
+# shared by all Orchestrators / dashboard sessions. Files are re-checked at most
+# every `check_interval` seconds; a changed file is loaded in full and then
+# swapped in under the lock, so readers see either the old or the new model.
+
+
+def _load_joblib(path):
+    import joblib
+    return joblib.load(path)
+
+
+def _load_forest(path):
+    from src.stats_engine.forest import FlatForest
+    return FlatForest.load(path)
+
+
+def _load_watchdog(path):
+    from src.stats_engine.watchdog import FlatWatchdog
+    return FlatWatchdog.load(path)
+
+
+def _load_envelope(path):
+    from src.stats_engine.envelope import SensorEnvelope
+    return SensorEnvelope.load(path)
+
+
+# name -> (path, loader)
+ARTIFACTS = {
+    "scaler": (SCALER_PATH, _load_joblib),
+    "watchdog": (WATCHDOG_MODEL_PATH, _load_joblib),
+    "watchdog_flat": (WATCHDOG_FLAT_PATH, _load_watchdog),
+    "rul_forest": (RUL_FOREST_PATH, _load_forest),
+    "rul_model": (RUL_MODEL_PATH, _load_joblib),
+    "sensor_envelope": (SENSOR_ENVELOPE_PATH, _load_envelope),
+}
+
+
+def file_sha256(path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _freeze(obj):
+    """Marks the numpy arrays of array-based models read-only (shared between sessions)."""
+    for value in vars(obj).values() if hasattr(obj, "__dict__") else ():
+        if isinstance(value, np.ndarray):
+            value.flags.writeable = False
+    return obj
+
+
+class ArtifactVersion:
+    __slots__ = ("name", "path", "mtime_ns", "size", "sha256", "loaded_at", "generation")
+
+    def __init__(self, name, path, mtime_ns, size, sha256, generation):
+        self.name = name
+        self.path = Path(path)
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.sha256 = sha256
+        self.loaded_at = time.time()
+        self.generation = generation
+
+    def as_dict(self) -> dict:
+        return {"name": self.name, "path": str(self.path), "mtime_ns": self.mtime_ns, "size": self.size,
+                "sha256": self.sha256, "loaded_at": self.loaded_at, "generation": self.generation}
+
+
+class ModelRegistry:
+    """
+    Lazily loads the artifacts in ARTIFACTS and hands out shared references.
+    Returned models must be treated as read-only.
+    `generation` increases on every (re)load, so holders can tell when to refresh.
+    """
+
+    def __init__(self, artifacts: dict = None, check_interval: float = 2.0, settle_time: float = 1.0):
+        self.artifacts = dict(artifacts or ARTIFACTS)
+        self.check_interval = float(check_interval)
+        self.settle_time = float(settle_time)  # yazılmakta olan dosyayı yarım okumamak için
+        self.generation = 0
+
+        self._lock = threading.RLock()
+        self._objects = {}      # name -> model
+        self._versions = {}     # name -> ArtifactVersion
+        self._stamps = {}       # name -> (mtime_ns, size) last seen on disk (loaded or failed)
+        self._last_check = {}   # name -> monotonic time of the last stat()
+        self._derived = {}      # name -> (source generations, model) built from other artifacts
+
+    # --- Internals ---
+    def _stat(self, name):
+        try:
+            st = self.artifacts[name][0].stat()
+            return st.st_mtime_ns, st.st_size
+        except FileNotFoundError:
+            return None
+
+    def _load(self, name, stamp) -> bool:
+        path, loader = self.artifacts[name]
+        t0 = time.perf_counter()
+        try:
+            obj = _freeze(loader(path))
+            checksum = file_sha256(path)
+        except Exception as e:
+            logger.error(f"ModelRegistry: {name} yüklenemedi ({path.name}): {e}")
+            return False
+
+        with self._lock:
+            self.generation += 1
+            previous = self._versions.get(name)
+            self._objects[name] = obj
+            self._versions[name] = ArtifactVersion(name, path, stamp[0], stamp[1], checksum, self.generation)
+        action = "reloaded" if previous is not None else "loaded"
+        logger.info(f"ModelRegistry: {name} {action} ({path.name}, sha256={checksum[:12]}, "
+                    f"{(time.perf_counter() - t0) * 1e3:.0f} ms)")
+        return True
+
+    def _refresh(self, name, force: bool = False) -> bool:
+        """Reloads `name` if its file changed since the last look. Returns True on a (re)load."""
+        now = time.monotonic()
+        if not force and now - self._last_check.get(name, -np.inf) < self.check_interval:
+            return False
+        with self._lock:
+            self._last_check[name] = now
+            stamp = self._stat(name)
+            if stamp is None:
+                if name not in self._stamps or self._stamps[name] is not None:
+                    logger.warning(f"ModelRegistry: {self.artifacts[name][0].name} not found.")
+                self._stamps[name] = None
+                return False
+            if stamp == self._stamps.get(name):
+                return False
+            if name not in self._objects:
+                self._stamps[name] = stamp
+                return self._load(name, stamp)  # ilk yükleme: eşzamanlı okuyucular nesneyi bekler
+            if time.time_ns() - stamp[0] < self.settle_time * 1e9:
+                return False  # dosya az önce değişti: bir sonraki kontrolde yükle
+            self._stamps[name] = stamp
+        # Yeniden yükleme kilit dışında: okuyucular bu sürede eski modeli kullanır
+        return self._load(name, stamp)
+
+    # --- Public API ---
+    def get(self, name: str):
+        """Shared (read-only) model for `name`, or None if the artifact is missing/unloadable."""
+        # İlk istek diske hemen bakar; sonrakiler (eksik olsa bile) check_interval ile sınırlı
+        self._refresh(name, force=name not in self._stamps)
+        return self._objects.get(name)
+
+    def peek(self, name: str):
+        """Currently loaded object without touching the disk."""
+        return self._objects.get(name)
+
+    def check(self) -> int:
+        """
+        Re-checks every artifact requested so far (throttled), including the ones that
+        were missing or failed to load: a file exported after startup is picked up here.
+        Returns the current generation.
+        """
+        for name in list(self._stamps):
+            self._refresh(name)
+        return self.generation
+
+    def reload(self, name: str = None):
+        """Forces a re-stat (and reload if changed) of one or all requested artifacts."""
+        for n in ([name] if name else list(self._stamps)):
+            self._refresh(n, force=True)
+
+    def version(self, name: str):
+        return self._versions.get(name)
+
+    def versions(self) -> dict:
+        with self._lock:
+            return {name: v.as_dict() for name, v in self._versions.items()}
+
+    def fingerprint(self, names=None) -> str:
+        """Short hash over the checksums of `names` (default: every loaded artifact)."""
+        with self._lock:
+            names = sorted(names or self._versions)
+            versions = [self._versions.get(name) for name in names]
+        h = hashlib.sha256()
+        for name, v in zip(names, versions):
+            h.update(f"{name}:{v.sha256 if v else '-'};".encode())
+        return h.hexdigest()[:16]
+
+    def watchdog(self):
+        """Flat watchdog if exported, otherwise built from the sklearn pickles (needs sklearn)."""
+        model = self.get("watchdog_flat")
+        if model is not None:
+            return model
+        if self.get("scaler") is None or self.get("watchdog") is None:
+            return None
+        # Pickle'lardan türetilen model de paylaşımlı: (scaler, watchdog) sürümü başına bir kez kurulur
+        with self._lock:
+            scaler, packet = self._objects["scaler"], self._objects["watchdog"]
+            key = (self._versions["scaler"].generation, self._versions["watchdog"].generation)
+            cached = self._derived.get("watchdog")
+            if cached is None or cached[0] != key:
+                from src.stats_engine.watchdog import FlatWatchdog
+                cached = (key, _freeze(FlatWatchdog.from_sklearn(scaler, packet)))
+                self._derived["watchdog"] = cached
+            return cached[1]
+
+    def rul_model(self):
+        """RUL estimator: flat forest if exported, otherwise the sklearn pickle."""
+        model = self.get("rul_forest")
+        return model if model is not None else self.get("rul_model")
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Process-wide registry (shared by every Streamlit session in this process)."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+# Flat, sklearn-free watchdog artifact (MinMax scaler + PCA residual model).
+# <name>.npy : one float64 matrix with every array row-stacked (memory-mapped
+#              read-only, so all scoring processes on a host share its pages)
+# <name>.json: version, threshold, feature list and the row layout of the .npy
+# The .json is written last and is the file the model registry watches.
+
+WATCHDOG_FORMAT_VERSION = 1
+
+
+def fold_residual_projection(scale, scaler_min, components, mean) -> tuple:
+    """
+    Folds MinMax scaling and a PCA reconstruction into one affine map (A, b):
+    residual = x @ A + b  ==  scaler(x) - pca.inverse_transform(pca.transform(scaler(x)))
+    """
+    components = np.asarray(components, dtype=np.float64)
+    residual_op = np.eye(components.shape[1]) - components.T @ components
+    scale = np.asarray(scale, dtype=np.float64)
+    offset = np.asarray(scaler_min, dtype=np.float64) - np.asarray(mean, dtype=np.float64)
+    return scale[:, None] * residual_op, offset @ residual_op
+
+
+class FlatWatchdog:
+    """
+    Array-only watchdog model. proj_A / proj_b are the folded projection, so
+    scoring is one affine map: spe = mean((x @ proj_A + proj_b) ** 2).
+    """
+
+    # .npy satır düzeni (her blok n_features sütunlu)
+    BLOCKS = ("scale", "min", "mean", "components", "proj_A", "proj_b")
+
+    def __init__(self, scale, scaler_min, mean, components, threshold, features, proj_A=None, proj_b=None):
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.scaler_min = np.asarray(scaler_min, dtype=np.float64)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.components = np.atleast_2d(np.asarray(components, dtype=np.float64))
+        self.threshold = float(threshold)
+        self.features = list(features)
+        if proj_A is None or proj_b is None:
+            proj_A, proj_b = fold_residual_projection(self.scale, self.scaler_min, self.components, self.mean)
+        self.proj_A = proj_A
+        self.proj_b = proj_b
+
+    @property
+    def n_components(self) -> int:
+        return self.components.shape[0]
+
+    @classmethod
+    def from_sklearn(cls, scaler, packet: dict):
+        """Exports a fitted MinMaxScaler + the watchdog packet ({"pca", "threshold", "selected_features"})."""
+        pca = packet["pca"]
+        return cls(scaler.scale_, scaler.min_, pca.mean_, pca.components_, packet["threshold"],
+                   packet["selected_features"])
+
+    def _rows(self) -> tuple:
+        blocks = [self.scale[None, :], self.scaler_min[None, :], self.mean[None, :], self.components,
+                  np.asarray(self.proj_A), np.asarray(self.proj_b)[None, :]]
+        layout, start = {}, 0
+        for name, block in zip(self.BLOCKS, blocks):
+            layout[name] = [start, start + block.shape[0]]
+            start += block.shape[0]
+        return np.ascontiguousarray(np.vstack(blocks), dtype=np.float64), layout
+
+    def save(self, path):
+        """path: the .json metadata file; the matrix goes to the sibling .npy."""
+        path = Path(path)
+        data_path = path.with_suffix(".npy")
+        matrix, layout = self._rows()
+
+        # Atomik yazım: önce .npy, sonra (registry'nin izlediği) .json
+        tmp = data_path.with_name(data_path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, matrix)
+        os.replace(tmp, data_path)
+
+        meta = {
+            "version": WATCHDOG_FORMAT_VERSION,
+            "threshold": self.threshold,
+            "features": self.features,
+            "n_components": self.n_components,
+            "data_file": data_path.name,
+            "data_sha256": hashlib.sha256(matrix.tobytes()).hexdigest(),
+            "shape": list(matrix.shape),
+            "layout": layout,
+        }
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(meta, indent=2))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, mmap: bool = True):
+        """Memory-maps the matrix read-only (mmap=False reads a private copy)."""
+        path = Path(path)
+        meta = json.loads(path.read_text())
+        if meta.get("version") != WATCHDOG_FORMAT_VERSION:
+            raise ValueError(f"FlatWatchdog: unsupported format version {meta.get('version')}")
+
+        matrix = np.load(path.with_name(meta["data_file"]), mmap_mode="r" if mmap else None)
+        # .json ve .npy aynı export'tan mı? (sağlama toplamı birkaç KB üzerinde, mikrosaniyeler)
+        if list(matrix.shape) != meta["shape"] or matrix.shape[1] != len(meta["features"]) \
+                or hashlib.sha256(matrix.tobytes()).hexdigest() != meta["data_sha256"]:
+            raise ValueError(f"FlatWatchdog: {meta['data_file']} does not match {path.name}")
+
+        block = {name: matrix[start:end] for name, (start, end) in meta["layout"].items()}
+        return cls(block["scale"][0], block["min"][0], block["mean"][0], block["components"],
+                   meta["threshold"], meta["features"], block["proj_A"], block["proj_b"][0])
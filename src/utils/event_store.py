@@ -0,0 +1,204 @@
+import atexit
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from config.paths import DB_LOG_PATH
+from src.utils.logger import logger
+
+# Append-only diagnosis history (SQLite, WAL).
+# Every Orchestrator.diagnose / diagnose_fleet result becomes one row; writes are
+# buffered and committed in batches, reads go through the indexes below.
+
+EVENT_COLUMNS = ("ts", "run_id", "unit", "cycle", "status", "priority", "spe", "ratio", "risk_score",
+                 "predicted_rul")
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS events ("
+    " id INTEGER PRIMARY KEY, ts REAL NOT NULL, run_id TEXT, unit INTEGER, cycle INTEGER,"
+    " status TEXT NOT NULL, priority INTEGER NOT NULL, spe REAL, ratio REAL, risk_score REAL,"
+    " predicted_rul REAL)",
+    "CREATE INDEX IF NOT EXISTS idx_events_unit_cycle ON events(unit, cycle)",
+    "CREATE INDEX IF NOT EXISTS idx_events_priority ON events(priority, unit)",
+    "CREATE INDEX IF NOT EXISTS idx_events_ts ON events(ts)",
+)
+
+
+def _int_or_none(value):
+    try:
+        return None if value is None or value != value else int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class EventStore:
+    """
+    Batched writer + indexed query helpers over the events table.
+    record() only appends to an in-memory buffer; the buffer is committed in one
+    transaction every `batch_size` events or `flush_interval` seconds.
+    A failed commit (e.g. "database is locked" with several writer processes on
+    one file) is logged and never raised to the caller: the rows stay buffered
+    and are retried after `flush_interval`; beyond `max_buffer` rows the oldest
+    are dropped (counted in stats()). `timeout` is SQLite's busy wait per commit.
+    """
+
+    def __init__(self, path=DB_LOG_PATH, batch_size: int = 256, flush_interval: float = 1.0,
+                 max_buffer: int = 100_000, timeout: float = 5.0):
+        self.path = path
+        self.batch_size = int(batch_size)
+        self.flush_interval = float(flush_interval)
+        self.max_buffer = int(max_buffer)
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._failing = False
+        self.written = 0
+        self.write_errors = 0
+        self.dropped = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=float(timeout))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for stmt in _SCHEMA:
+            self._conn.execute(stmt)
+        self._conn.commit()
+
+    # --- Write ---
+    def record(self, result: dict, unit=None, cycle=None, run_id: str = None):
+        """Buffers one diagnose() result."""
+        row = (time.time(), run_id, _int_or_none(unit), _int_or_none(cycle), result.get("status", "UNKNOWN"),
+               int(result.get("priority", 0)), result.get("spe", result.get("loss")), result.get("ratio"),
+               result.get("risk_score"), result.get("predicted_rul"))
+        with self._lock:
+            self._buffer.append(row)
+            if (len(self._buffer) >= self.batch_size and not self._failing) \
+                    or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush_locked()
+
+    def record_frame(self, frame: pd.DataFrame, run_id: str = None):
+        """Buffers a diagnose_fleet() result frame (one event per row)."""
+        n = len(frame)
+        if n == 0:
+            return
+        cols = [[time.time()] * n, [run_id] * n, frame["unit_number"].to_numpy(dtype=np.int64).tolist(),
+                frame["cycle"].to_numpy(dtype=np.int64).tolist(), frame["status"].tolist(),
+                frame["priority"].to_numpy(dtype=np.int64).tolist()]
+        cols += [frame[c].to_numpy(dtype=np.float64).tolist() for c in ("spe", "ratio", "risk_score", "predicted_rul")]
+        with self._lock:
+            self._buffer.extend(zip(*cols))
+            # Yazma hata veriyorsa her batch'te tekrar deneme: flush_interval kadar bekle
+            if not self._failing or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush_locked()
+
+    def _flush_locked(self) -> bool:
+        """Commits the buffer; on sqlite3.Error keeps it for the next attempt. Returns success."""
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return True
+        try:
+            with self._conn:
+                self._conn.executemany(
+                    f"INSERT INTO events ({', '.join(EVENT_COLUMNS)}) VALUES ({', '.join('?' * len(EVENT_COLUMNS))})",
+                    self._buffer)
+        except sqlite3.Error as e:
+            self.write_errors += 1
+            overflow = len(self._buffer) - self.max_buffer
+            if overflow > 0:
+                del self._buffer[:overflow]
+                self.dropped += overflow
+            if not self._failing or self.write_errors % 50 == 0:
+                logger.error(f"EventStore: write failed ({e}); {len(self._buffer)} event(s) kept for retry, "
+                             f"{self.dropped} dropped so far.")
+            self._failing = True
+            return False
+
+        if self._failing:
+            logger.info(f"EventStore: writes recovered, {len(self._buffer)} buffered event(s) committed.")
+            self._failing = False
+        self.written += len(self._buffer)
+        self._buffer = []
+        return True
+
+    def flush(self) -> bool:
+        with self._lock:
+            return self._flush_locked()
+
+    # --- Query ---
+    def query(self, sql: str, params: tuple = ()) -> pd.DataFrame:
+        """Runs a read query after committing buffered events."""
+        with self._lock:
+            self._flush_locked()
+            return pd.read_sql_query(sql, self._conn, params=params)
+
+    def critical_events(self, unit: int = None, min_priority: int = 4, limit: int = 500) -> pd.DataFrame:
+        """Events at or above `min_priority` (default: CRITICAL), newest first."""
+        where, params = "priority >= ?", [int(min_priority)]
+        if unit is not None:
+            where += " AND unit = ?"
+            params.append(int(unit))
+        return self.query(f"SELECT * FROM events WHERE {where} ORDER BY ts DESC, id DESC LIMIT ?",
+                          tuple(params) + (int(limit),))
+
+    def unit_history(self, unit: int, since_cycle: int = None, run_id: str = None) -> pd.DataFrame:
+        """All events of one engine in cycle order."""
+        where, params = "unit = ?", [int(unit)]
+        if since_cycle is not None:
+            where += " AND cycle >= ?"
+            params.append(int(since_cycle))
+        if run_id is not None:
+            where += " AND run_id = ?"
+            params.append(run_id)
+        return self.query(f"SELECT * FROM events WHERE {where} ORDER BY cycle, id", tuple(params))
+
+    def last_cycles(self, n: int = 10, units: list = None) -> pd.DataFrame:
+        """The last `n` recorded cycles of every engine (or of `units`)."""
+        where, params = "", ()
+        if units is not None:
+            units = [int(u) for u in units]
+            where = f"WHERE unit IN ({', '.join('?' * len(units))})"
+            params = tuple(units)
+        return self.query(
+            "SELECT * FROM ("
+            " SELECT *, ROW_NUMBER() OVER (PARTITION BY unit ORDER BY cycle DESC, id DESC) AS rn"
+            f" FROM events {where}) WHERE rn <= ? ORDER BY unit, cycle",
+            params + (int(n),)).drop(columns="rn")
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._flush_locked()
+            total, units, last_ts = self._conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT unit), MAX(ts) FROM events").fetchone()
+            pending = len(self._buffer)
+        return {"events": total, "units": units, "last_ts": last_ts, "written": self.written, "pending": pending,
+                "write_errors": self.write_errors, "dropped": self.dropped}
+
+    def close(self):
+        with self._lock:
+            if not self._flush_locked():
+                logger.warning(f"EventStore: closing with {len(self._buffer)} unwritten event(s).")
+            self._conn.close()
+
+
+_event_store = None
+_event_store_lock = threading.Lock()
+
+
+def get_event_store():
+    """Process-wide EventStore. Returns None when JETGUARD_EVENT_STORE=off."""
+    global _event_store
+    if os.getenv("JETGUARD_EVENT_STORE", "on").lower() in ("off", "0", "false"):
+        return None
+    with _event_store_lock:
+        if _event_store is None:
+            try:
+                _event_store = EventStore()
+                atexit.register(_event_store.flush)
+            except sqlite3.Error as e:
+                logger.error(f"EventStore: {DB_LOG_PATH} açılamadı: {e}")
+                return None
+        return _event_store
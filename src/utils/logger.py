@@ -1,12 +1,110 @@
+import atexit
+import json
 import logging
+import os
+import queue
 import sys
-from config.paths import LOGS_DIR
+import time
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener, RotatingFileHandler
+from config.paths import LOGS_DIR, ensure_directories
 
+# Structured fields picked up by the JSON-lines format:
+# logger.warning("...", extra={"unit": 3, "cycle": 120, "spe": 0.8, "ratio": 1.2, "rul": 14.0, "priority": 3})
+STRUCTURED_FIELDS = ("unit", "cycle", "spe", "ratio", "rul", "priority")
 
-def setup_logger(name="JetGuard", log_file="system.log", level=logging.INFO):
+_listeners = []
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One compact JSON object per line: ts, level, logger, msg + structured fields when present."""
+
+    def format(self, record):
+        payload = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                payload[field] = value.item() if hasattr(value, "item") else value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """
+    Does not block the caller: when the queue is full, records below ERROR are
+    dropped and counted (ERROR and above wait for a free slot).
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def drop_notice(self, name: str):
+        record = logging.makeLogRecord({
+            "name": name, "levelno": logging.WARNING, "levelname": "WARNING", "created": time.time(),
+            "msg": f"Logger: {self.dropped} log record(s) dropped (queue full).",
+        })
+        self.dropped = 0
+        return record
+
+    def prepare(self, record):
+        # f-string mesajlar zaten hazır: kopyalama/formatlama işini listener thread'ine bırak
+        if not record.args and not record.exc_info and isinstance(record.msg, str):
+            return record
+        return super().prepare(record)
+
+    def enqueue(self, record):
+        if record.levelno >= logging.ERROR:
+            self.queue.put(record)
+            return
+        try:
+            if self.dropped:
+                self.queue.put_nowait(self.drop_notice(record.name))
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _FlushingQueueListener(QueueListener):
+    """Buffers while the queue is busy and flushes the targets whenever it drains."""
+
+    def dequeue(self, block):
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            for handler in self.handlers:
+                handler.flush()
+            return self.queue.get(block)
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)  # kuyruk doluysa bile stop() kaybolmasın
+
+
+def _build_formatters(fmt: str):
+    if fmt == "json":
+        json_format = JsonLinesFormatter()
+        return json_format, json_format
+    return (logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'),
+            logging.Formatter('%(levelname)s: %(message)s'))
+
+
+def setup_logger(name="JetGuard", log_file="system.log", level=logging.INFO, mode=None, fmt=None):
     """
     Sets up a centralized logger that outputs to both console and file.
+
+    mode: "async" (default) -> records are enqueued by the caller and written by a
+          background listener thread in batches; "sync" -> handlers write inline.
+    fmt:  "text" (default) or "json" (JSON lines with STRUCTURED_FIELDS).
+    Defaults come from JETGUARD_LOG_MODE / JETGUARD_LOG_FORMAT; the file rotates at
+    JETGUARD_LOG_MAX_BYTES (default 5 MB, 3 backups).
     """
+    mode = (mode or os.getenv("JETGUARD_LOG_MODE", "async")).lower()
+    fmt = (fmt or os.getenv("JETGUARD_LOG_FORMAT", "text")).lower()
 
     # Create Logger
     logger = logging.getLogger(name)
@@ -16,22 +114,52 @@ def setup_logger(name="JetGuard", log_file="system.log", level=logging.INFO):
     if logger.hasHandlers():
         return logger
 
-    # 1. File Handler (Saves to file)
-    file_handler = logging.FileHandler(LOGS_DIR / log_file)
-    file_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    file_format, stream_format = _build_formatters(fmt)
+
+    # 1. File Handler (Saves to file, rotates by size)
+    ensure_directories()
+    file_handler = RotatingFileHandler(LOGS_DIR / log_file, encoding="utf-8",
+                                       maxBytes=int(os.getenv("JETGUARD_LOG_MAX_BYTES", 5 * 1024 * 1024)),
+                                       backupCount=3)
     file_handler.setFormatter(file_format)
 
     # 2. Stream Handler (Prints to console)
     stream_handler = logging.StreamHandler(sys.stdout)
-    stream_format = logging.Formatter('%(levelname)s: %(message)s')
     stream_handler.setFormatter(stream_format)
 
-    # Add Handlers
-    logger.addHandler(file_handler)
-    logger.addHandler(stream_handler)
+    if mode != "async":
+        logger.addHandler(file_handler)
+        logger.addHandler(stream_handler)
+        return logger
+
+    # 3. Async: caller only enqueues; the listener thread formats and writes in batches
+    # (ERROR and above are flushed immediately)
+    targets = [MemoryHandler(256, flushLevel=logging.ERROR, target=h) for h in (file_handler, stream_handler)]
+    log_queue = queue.Queue(maxsize=int(os.getenv("JETGUARD_LOG_QUEUE", 10000)))
+    queue_handler = _DroppingQueueHandler(log_queue)
+    logger.addHandler(queue_handler)
 
+    listener = _FlushingQueueListener(log_queue, *targets, respect_handler_level=True)
+    listener.start()
+    _listeners.append((listener, queue_handler))
     return logger
 
 
+def shutdown_logging():
+    """Drains the async queues and flushes every buffered record (also runs at exit)."""
+    while _listeners:
+        listener, queue_handler = _listeners.pop()
+        if queue_handler.dropped:
+            listener.queue.put(queue_handler.drop_notice("JetGuard"))
+        listener.stop()
+        for handler in listener.handlers:
+            target = handler.target
+            handler.close()  # MemoryHandler: kalanları hedefe yazar
+            if target is not None:
+                target.close()
+
+
+atexit.register(shutdown_logging)
+
 # Global instance to be used everywhere
-logger = setup_logger()
\ No newline at end of file
+logger = setup_logger()
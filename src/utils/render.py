@@ -0,0 +1,91 @@
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# Dashboard render helpers: the telemetry loop scores every cycle, but only
+# redraws at a capped frame rate (intermediate cycles are coalesced).
+
+
+class RingBuffer:
+    """Fixed-capacity, column-oriented history (one float64 array per field)."""
+
+    def __init__(self, capacity: int, fields: tuple):
+        self.capacity = int(capacity)
+        self.fields = tuple(fields)
+        self._data = np.zeros((len(self.fields), self.capacity), dtype=np.float64)
+        self._next = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, *values):
+        """One value per field, in `fields` order."""
+        self._data[:, self._next] = values
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def clear(self):
+        self._next = 0
+        self._size = 0
+
+    def arrays(self) -> dict:
+        """Oldest -> newest copy of every field."""
+        start = (self._next - self._size) % self.capacity
+        idx = (start + np.arange(self._size)) % self.capacity
+        return {name: self._data[i, idx] for i, name in enumerate(self.fields)}
+
+    def last(self) -> dict:
+        if not self._size:
+            return {}
+        i = (self._next - 1) % self.capacity
+        return {name: float(self._data[k, i]) for k, name in enumerate(self.fields)}
+
+    def frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.arrays())
+
+
+class RenderScheduler:
+    """
+    Frame-rate cap for Streamlit redraws.
+    ready() is called once per scored cycle; it returns True at most `fps` times
+    per second (or when forced, e.g. on a critical alert / the last cycle).
+    """
+
+    def __init__(self, fps: float = 10.0):
+        self.min_interval = 1.0 / float(fps) if fps > 0 else 0.0
+        self._last_frame = -np.inf
+        self.frames = 0
+        self.coalesced = 0
+        self._pending = 0
+
+    def ready(self, force: bool = False) -> bool:
+        now = time.monotonic()
+        if force or now - self._last_frame >= self.min_interval:
+            self._last_frame = now
+            self.frames += 1
+            self._pending = 0
+            return True
+        self._pending += 1
+        self.coalesced += 1
+        return False
+
+    @property
+    def dirty(self) -> bool:
+        """True if cycles were scored since the last drawn frame."""
+        return self._pending > 0
+
+
+class TerminalLog:
+    """Last `size` terminal lines; HTML is rebuilt only when a frame is drawn."""
+
+    def __init__(self, lines=(), size: int = 12):
+        self._lines = deque(lines, maxlen=int(size))
+
+    def append(self, line: str):
+        self._lines.append(line)
+
+    def html(self) -> str:
+        return "<div class='terminal-box'>" + "<br>".join(self._lines) + "</div>"
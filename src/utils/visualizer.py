@@ -1,6 +1,7 @@
-import altair as alt
 import pandas as pd
 
+# altair ilk grafik çiziminde yüklenir (import maliyeti ilk frame'e kadar ertelenir)
+
 
 class DashboardVisualizer:
     @staticmethod
@@ -9,11 +10,12 @@ class DashboardVisualizer:
         Generates the Altair Line Chart for the Dashboard.
         Expects DataFrame with columns: ['Cycle', 'Anomaly Score', 'Threshold']
         """
-        if data.empty:
+        if data is None or data.empty:
             return None
+        import altair as alt
 
-        # Base Chart
-        base = alt.Chart(data).encode(
+        # Base Chart (veri katman seviyesinde: update_anomaly_chart sadece veriyi değiştirir)
+        base = alt.Chart().encode(
             x=alt.X('Cycle', axis=alt.Axis(title='Engine Cycles (Time)')),
             tooltip=['Cycle', 'Anomaly Score', 'Threshold']
         )
@@ -39,7 +41,15 @@ class DashboardVisualizer:
         # 3. Critical Area Highlight (Area under curve if needed, or simple layering)
         # Kırmızı bölgeyi boyamak için gradient eklenebilir ama şimdilik simple tutalım.
 
-        return (line_loss + line_thresh).properties(
+        return alt.layer(line_loss, line_thresh, data=data).properties(
             height=350,
             title="Real-Time Sensor Deviation Monitor"
-        ).interactive()
\ No newline at end of file
+        ).interactive()
+
+    @staticmethod
+    def update_anomaly_chart(chart, data: pd.DataFrame):
+        """Reuses an existing anomaly chart spec with new data (no re-encoding)."""
+        if chart is None:
+            return DashboardVisualizer.create_anomaly_chart(data)
+        chart.data = data
+        return chart
@@ -0,0 +1,30 @@
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Testler repo kökünden import eder (src.*, config.*), scriptlerle aynı düzen
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from config.paths import RAW_DATA_DIR, SETTINGS_FILE
+
+
+@pytest.fixture(scope="session")
+def columns():
+    with open(SETTINGS_FILE) as f:
+        return json.load(f)["data_col_names"]
+
+
+@pytest.fixture(scope="session")
+def fleet_frame(columns):
+    """Units 1-4 of train_FD001, interleaved by cycle like a live fleet feed."""
+    from src.simulation.columnar import open_dataset
+    values = np.asarray(open_dataset(RAW_DATA_DIR / "train_FD001.txt", columns).values)
+    frame = pd.DataFrame(values, columns=columns)
+    frame = frame[frame["unit_number"] <= 4].astype({"unit_number": int, "cycle": int})
+    return frame.sort_values(["cycle", "unit_number"], kind="stable").reset_index(drop=True)
@@ -0,0 +1,139 @@
+import threading
+import time
+
+import pytest
+
+from src.ai_core.dispatch import CrewDispatcher, DispatchHandle, default_crew_factory
+from src.ai_core.mission_cache import CachedJetEngineCrew, MissionCache
+from src.ai_core.stub import StubJetEngineCrew
+
+
+def test_stub_backend_without_cache_accepts_fingerprint_kwargs(monkeypatch):
+    # JETGUARD_CREW_CACHE=off: factory returns the bare stub, dashboard still passes the cache kwargs
+    monkeypatch.setenv("JETGUARD_CREW_BACKEND", "stub")
+    monkeypatch.setenv("JETGUARD_STUB_LATENCY", "0")
+    monkeypatch.setenv("JETGUARD_CREW_CACHE", "off")
+    assert isinstance(default_crew_factory(), StubJetEngineCrew)
+
+    dispatcher = CrewDispatcher(workers=1, max_queue=4, timeout=10.0)
+    try:
+        handle = dispatcher.submit(1, 120, {"sensor_11": 48.2}, 0.9,
+                                   deviating_sensors=["sensor_11"], predicted_rul=14.0)
+        report = handle.result()
+    finally:
+        dispatcher.shutdown()
+
+    assert handle.status == DispatchHandle.DONE
+    assert report.startswith("[STUB CREW REPORT]")
+    assert dispatcher.stats()["failed"] == 0
+
+
+class _HangingCrew:
+    """run_mission blocks on `release` when sensor_data == "hang" (a stuck LLM call)."""
+
+    def __init__(self, release):
+        self.release = release
+
+    def run_mission(self, sensor_data, loss_score, deviating_sensors=None, predicted_rul=None):
+        if sensor_data == "hang":
+            self.release.wait(10.0)
+        return f"report {sensor_data}"
+
+
+def test_stuck_worker_is_replaced_and_pool_shrinks_back():
+    release = threading.Event()
+    dispatcher = CrewDispatcher(crew_factory=lambda: _HangingCrew(release), workers=1, max_spare=1, timeout=0.2)
+    try:
+        stuck = dispatcher.submit(1, 100, "hang", 0.9)
+        with pytest.raises(TimeoutError):
+            stuck.result()
+        assert stuck.status == DispatchHandle.TIMED_OUT
+
+        # Tek worker hâlâ takılı: yedek thread yeni görevi çalıştırır
+        assert dispatcher.submit(2, 100, "ok", 0.9).result(timeout=2.0) == "report ok"
+        stats = dispatcher.stats()
+        assert stats["replaced"] == 1 and stats["stuck_workers"] == 1 and stats["workers"] == 2
+
+        release.set()
+        deadline = time.monotonic() + 2.0
+        while dispatcher.stats()["workers"] > 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert dispatcher.stats()["workers"] == 1
+    finally:
+        release.set()
+        dispatcher.shutdown()
+
+
+def test_single_flight_follower_wait_is_bounded(tmp_path):
+    release = threading.Event()
+    cache = MissionCache(tmp_path / "missions.sqlite")
+    leader = CachedJetEngineCrew(_HangingCrew(release), cache, wait_timeout=0.2)
+    follower = CachedJetEngineCrew(_HangingCrew(release), cache, wait_timeout=0.2)
+    incident = {"deviating_sensors": ["sensor_measurement11"], "predicted_rul": 40.0}
+
+    worker = threading.Thread(target=leader.run_mission, args=("hang", 0.9), kwargs=incident)
+    worker.start()
+    try:
+        time.sleep(0.05)  # lider in-flight kaydını alsın
+        t0 = time.monotonic()
+        with pytest.raises(TimeoutError):
+            follower.run_mission("hang", 0.9, **incident)
+        assert time.monotonic() - t0 < 1.0
+    finally:
+        release.set()
+        worker.join()
+        cache.close()
+
+
+def _wait_running(handle, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while handle.status != DispatchHandle.RUNNING and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert handle.status == DispatchHandle.RUNNING
+
+
+def _full_queue_behind_stuck_worker(release) -> tuple:
+    dispatcher = CrewDispatcher(crew_factory=lambda: _HangingCrew(release), workers=1, max_queue=2,
+                                max_spare=0, timeout=30.0)
+    running = dispatcher.submit(1, 100, "hang", 0.9)
+    _wait_running(running)
+    queued = [dispatcher.submit(u, 100, f"unit {u}", 0.9) for u in (2, 3)]
+    assert dispatcher.submit(4, 100, "x", 0.9).status == DispatchHandle.REJECTED  # kuyruk dolu
+    return dispatcher, running, queued
+
+
+@pytest.mark.parametrize("cancel_pending", [False, True])
+def test_shutdown_does_not_block_on_full_queue_with_stuck_worker(cancel_pending):
+    release = threading.Event()
+    dispatcher, running, queued = _full_queue_behind_stuck_worker(release)
+    try:
+        closer = threading.Thread(target=dispatcher.shutdown,
+                                  kwargs={"cancel_pending": cancel_pending, "timeout": 0.3}, daemon=True)
+        closer.start()
+        closer.join(3.0)
+        assert not closer.is_alive(), "shutdown hung on the full queue"
+        if cancel_pending:
+            assert all(h.status == DispatchHandle.CANCELLED for h in queued)
+            assert all(item is None for item in list(dispatcher._queue.queue))  # sadece sentinel'lar kaldı
+    finally:
+        release.set()
+
+    # Takılı çağrı dönünce worker kuyruğu bitirip çıkar (sentinel kuyruğa sığmamış olsa bile)
+    worker = dispatcher._workers[0]
+    worker.join(3.0)
+    assert not worker.is_alive()
+    expected = DispatchHandle.CANCELLED if cancel_pending else DispatchHandle.DONE
+    assert [h.status for h in queued] == [expected, expected]
+
+
+def test_graceful_shutdown_runs_queued_missions():
+    release = threading.Event()
+    dispatcher, running, queued = _full_queue_behind_stuck_worker(release)
+    closer = threading.Thread(target=dispatcher.shutdown, kwargs={"timeout": 5.0}, daemon=True)
+    closer.start()
+    release.set()
+    closer.join(6.0)
+
+    assert not closer.is_alive()
+    assert [h.result(timeout=0) for h in [running] + queued] == ["report hang", "report unit 2", "report unit 3"]
+    assert dispatcher.submit(5, 100, "late", 0.9).status == DispatchHandle.REJECTED
@@ -0,0 +1,63 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from src.utils.event_store import EventStore
+
+
+def fleet_result(units, cycle):
+    n = len(units)
+    return pd.DataFrame({"unit_number": units, "cycle": [cycle] * n, "spe": [0.1] * n, "threshold": 0.2,
+                         "ratio": [0.5] * n, "risk_score": [0.01] * n, "status": ["NORMAL"] * n,
+                         "priority": [1] * n, "color": ["green"] * n, "predicted_rul": [-1.0] * n})
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = EventStore(tmp_path / "events.db", batch_size=4, flush_interval=0.0, timeout=0.05)
+    yield store
+    store.close()
+
+
+def test_record_and_query_paths(store):
+    for cycle in range(1, 4):
+        store.record_frame(fleet_result([1, 2], cycle), run_id="r1")
+    store.record({"status": "CRITICAL FAILURE", "priority": 4, "spe": 2.0, "ratio": 3.0, "risk_score": 1.0,
+                  "predicted_rul": 3.0}, unit=2, cycle=4, run_id="r1")
+
+    assert store.stats()["events"] == 7
+    assert store.unit_history(2)["cycle"].tolist() == [1, 2, 3, 4]
+    assert store.critical_events()["unit"].tolist() == [2]
+    last = store.last_cycles(n=1)
+    assert dict(zip(last["unit"], last["cycle"])) == {1: 3, 2: 4}
+
+
+def test_locked_database_keeps_events_for_retry(store):
+    blocker = sqlite3.connect(str(store.path), timeout=0.05)
+    blocker.execute("BEGIN IMMEDIATE")  # başka bir süreç yazma kilidini tutuyor
+    try:
+        store.record_frame(fleet_result([1, 2, 3], 1))  # hata yükselmez
+        store.record({"status": "NORMAL", "priority": 1}, unit=4, cycle=1)
+        assert store.write_errors >= 1
+        assert store.stats()["pending"] == 4
+    finally:
+        blocker.rollback()
+        blocker.close()
+
+    assert store.flush()
+    stats = store.stats()
+    assert stats["events"] == 4 and stats["pending"] == 0 and stats["dropped"] == 0
+
+
+def test_buffer_is_capped_while_writes_fail(tmp_path):
+    store = EventStore(tmp_path / "events.db", flush_interval=0.0, max_buffer=5, timeout=0.05)
+    blocker = sqlite3.connect(str(store.path), timeout=0.05)
+    blocker.execute("BEGIN IMMEDIATE")
+    try:
+        store.record_frame(fleet_result(list(range(8)), 1))
+        assert store.dropped == 3 and len(store._buffer) == 5
+    finally:
+        blocker.rollback()
+        blocker.close()
+        store.close()
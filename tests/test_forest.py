@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from src.stats_engine.forest import FlatForest
+
+sklearn_ensemble = pytest.importorskip("sklearn.ensemble")
+
+
+@pytest.fixture(scope="module")
+def fitted(fleet_frame):
+    X = fleet_frame.drop(columns=["unit_number", "cycle"])
+    # Hedef: unit başına kalan cycle (RUL), train_rul.py ile aynı tanım
+    y = fleet_frame.groupby("unit_number")["cycle"].transform("max") - fleet_frame["cycle"]
+    model = sklearn_ensemble.RandomForestRegressor(n_estimators=12, max_depth=9, random_state=0, n_jobs=1)
+    model.fit(X, y)
+    return model, X
+
+
+def test_flat_forest_matches_sklearn_batch_and_single_row(fitted):
+    model, X = fitted
+    flat = FlatForest.from_sklearn(model)
+    expected = model.predict(X)
+
+    np.testing.assert_array_equal(flat.predict(X), expected)
+    np.testing.assert_array_equal(flat.predict(X.to_numpy()), expected)
+    rows = X.to_dict("records")[::25]
+    np.testing.assert_array_equal([flat.predict_one(flat.vector(r)) for r in rows], expected[::25])
+
+
+def test_flat_forest_save_load_roundtrip(fitted, tmp_path):
+    model, X = fitted
+    path = tmp_path / "forest.npz"
+    FlatForest.from_sklearn(model).save(path)
+    loaded = FlatForest.load(path)
+
+    assert list(loaded.feature_names_in_) == list(model.feature_names_in_)
+    np.testing.assert_array_equal(loaded.predict(X), model.predict(X))
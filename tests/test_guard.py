@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.orchestrator.manager import Orchestrator
+from src.stats_engine.guard import DataGuard, StatsGuard, REASON_OK, REASON_INVALID_UNIT, REASON_MISSING_CYCLE
+
+
+@pytest.fixture
+def stats_guard():
+    guard = StatsGuard(use_ewma=True, ewma_alpha=0.2)
+    assert guard.ready, "watchdog artifact missing"
+    return guard
+
+
+def sequential_scores(guard, frame):
+    """score() per packet, one fresh EWMA per unit; rows in frame order."""
+    out = {}
+    for unit, rows in frame.groupby("unit_number", sort=False):
+        guard.reset()
+        for i, packet in zip(rows.index, rows.to_dict("records")):
+            out[i] = guard.score(packet)
+    return [out[i] for i in frame.index]
+
+
+def test_score_batch_matches_sequential_score(stats_guard, fleet_frame):
+    expected = sequential_scores(StatsGuard(use_ewma=True, ewma_alpha=0.2), fleet_frame)
+    batch = stats_guard.score_batch(fleet_frame[stats_guard.features], fleet_frame["unit_number"].to_numpy())
+
+    assert batch["ok"].all()
+    for field in ("spe", "ratio", "smoothed_ratio", "risk_score"):
+        np.testing.assert_allclose(batch[field], [r[field] for r in expected], rtol=1e-9, atol=1e-12)
+    assert list(batch["risk_level"]) == [r["risk_level"] for r in expected]
+
+
+def test_score_batch_keeps_per_unit_ewma_across_calls(stats_guard, fleet_frame):
+    X, units = fleet_frame[stats_guard.features], fleet_frame["unit_number"].to_numpy()
+    whole = stats_guard.score_batch(X, units)["smoothed_ratio"]
+
+    stats_guard.reset()
+    cut = len(fleet_frame) // 3
+    parts = [stats_guard.score_batch(X.iloc[s], units[s])["smoothed_ratio"] for s in (slice(None, cut), slice(cut, None))]
+    np.testing.assert_allclose(np.concatenate(parts), whole, rtol=1e-12)
+
+
+def test_score_batch_rejects_negative_unit_ids(stats_guard, fleet_frame):
+    X = fleet_frame[stats_guard.features].iloc[:2]
+    with pytest.raises(ValueError):
+        stats_guard.score_batch(X, np.array([1, -1]))
+
+
+@pytest.mark.parametrize("unit", [-1, -7, "abc", 2.5])
+def test_invalid_unit_numbers_are_rejected(fleet_frame, unit):
+    guard = DataGuard()
+    packet = {**fleet_frame.iloc[0].to_dict(), "unit_number": unit}
+    assert guard.check(packet)[0] == REASON_INVALID_UNIT
+
+    mask, reasons = guard.validate_batch([fleet_frame.iloc[1].to_dict(), packet], report=False)
+    assert mask.tolist() == [True, False]
+    assert reasons.tolist() == [REASON_OK, REASON_INVALID_UNIT]
+
+
+def test_invalid_unit_does_not_touch_other_engines(fleet_frame):
+    clean, noisy = Orchestrator(record_events=False), Orchestrator(record_events=False)
+    packets = fleet_frame.to_dict("records")
+    # Aynı akış + araya karışmış negatif / bozuk unit_number'lı paketler
+    bad = [{**packets[-1], "unit_number": -1}, {**packets[-2], "unit_number": "x"}]
+    expected = clean.diagnose_fleet(packets)
+    result = noisy.diagnose_fleet(bad + packets)
+
+    assert (result["status"].iloc[:2] == "INVALID DATA").all()
+    got = result.iloc[2:].reset_index(drop=True)
+    np.testing.assert_allclose(got["risk_score"], expected["risk_score"])
+    assert got["status"].tolist() == expected["status"].tolist()
+    assert noisy.fleet_state().equals(clean.fleet_state())
+
+
+@pytest.mark.parametrize("cycle", [None, float("nan")])
+def test_missing_cycle_verdict_is_the_same_for_every_input_shape(fleet_frame, cycle):
+    guard = DataGuard()
+    records = [fleet_frame.iloc[0].to_dict(), {**fleet_frame.iloc[1].to_dict(), "cycle": cycle}]
+    expected = [REASON_OK, REASON_MISSING_CYCLE]
+
+    assert [guard.check(r)[0] for r in records] == expected
+    assert guard.validate_batch(records, report=False)[1].tolist() == expected
+    assert guard.validate_batch(pd.DataFrame(records), report=False)[1].tolist() == expected
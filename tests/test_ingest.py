@@ -0,0 +1,137 @@
+import http.client
+import json
+import queue
+import threading
+import time
+
+import pytest
+
+from src.ingest.server import IngestService, make_server, shard_of
+
+
+def _post(port: int, payload, raw: str = None) -> tuple:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    conn.request("POST", "/ingest", raw if raw is not None else json.dumps(payload),
+                 {"Content-Type": "application/json"})
+    response = conn.getresponse()
+    body = json.loads(response.read())
+    conn.close()
+    return response.status, body
+
+
+def _get(port: int, path: str) -> tuple:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    conn.request("GET", path)
+    response = conn.getresponse()
+    body = json.loads(response.read())
+    conn.close()
+    return response.status, body
+
+
+@pytest.fixture
+def serve():
+    """Runs make_server(service) on a free port in a thread; workers are started only if asked."""
+    running = []
+
+    def _serve(service: IngestService, start_workers: bool = False) -> int:
+        if start_workers:
+            service.start()
+        server = make_server(service, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        running.append((service, server, start_workers))
+        return server.server_address[1]
+
+    yield _serve
+    for service, server, started in running:
+        server.shutdown()
+        server.server_close()
+        if started:
+            service.stop()
+
+
+def _drain(service: IngestService, shard: int) -> list:
+    """Packets enqueued for one shard (workers not started), in queue order."""
+    packets = []
+    while True:
+        try:
+            packets.extend(service.queues[shard].get(timeout=0.2))
+        except queue.Empty:
+            return packets
+
+
+def _fleet(units: int, cycles: int) -> list:
+    # Cycle-interleaved, load generator ile aynı sıra
+    return [{"unit_number": u, "cycle": c} for c in range(1, cycles + 1) for u in range(1, units + 1)]
+
+
+def test_batches_are_routed_by_unit_with_per_unit_order(serve):
+    service = IngestService(workers=3, record_events=False)
+    port = serve(service)
+    packets = _fleet(units=7, cycles=5)
+
+    for i in range(0, len(packets), 4):
+        assert _post(port, packets[i:i + 4]) == (202, {"accepted": len(packets[i:i + 4])})
+
+    for shard in range(3):
+        routed = _drain(service, shard)
+        assert {p["unit_number"] for p in routed} == {u for u in range(1, 8) if shard_of(u, 3) == shard}
+        for unit in {p["unit_number"] for p in routed}:
+            assert [p["cycle"] for p in routed if p["unit_number"] == unit] == [1, 2, 3, 4, 5]
+    assert _get(port, "/stats")[1]["accepted"] == len(packets)
+
+
+def test_full_shard_queue_answers_503_and_enqueues_nothing(serve):
+    service = IngestService(workers=2, record_events=False, queue_size=1, put_timeout=0.1)
+    port = serve(service)
+
+    assert _post(port, [{"unit_number": 2, "cycle": 1}])[0] == 202   # shard 0'ın tek slotu dolar
+    # Hepsi ya da hiçbiri: shard 1'e gidecek paket de kuyruğa girmez
+    status, body = _post(port, [{"unit_number": 3, "cycle": 1}, {"unit_number": 4, "cycle": 1}])
+    assert status == 503 and "retry" in body["error"]
+    assert _drain(service, 1) == []
+
+    stats = _get(port, "/stats")[1]
+    assert stats["accepted"] == 1 and stats["rejected"] == 2
+
+
+@pytest.mark.parametrize("raw", [
+    "[1, 2]",
+    '[{"unit_number": 1, "cycle": 1}, "x"]',
+    '{"unit_number": Infinity, "cycle": 1}',
+    '{"unit_number": NaN, "cycle": 1}',
+    '{"unit_number": -1, "cycle": 1}',
+    '{"unit_number": 1.5, "cycle": 1}',
+    '{"unit_number": true, "cycle": 1}',
+    '{"cycle": 1}',
+    "{not json",
+])
+def test_malformed_payloads_get_400_and_are_not_accepted(serve, raw):
+    service = IngestService(workers=2, record_events=False)
+    port = serve(service)
+
+    status, body = _post(port, None, raw=raw)
+    assert status == 400 and "error" in body
+    stats = _get(port, "/stats")[1]
+    assert stats["accepted"] == 0
+    assert _drain(service, 0) == [] and _drain(service, 1) == []
+    # Servis ayakta: sonraki geçerli istek normal işlenir
+    assert _post(port, {"unit_number": 1.0, "cycle": 1})[0] == 202
+
+
+def test_workers_process_everything_that_was_accepted(serve, fleet_frame):
+    service = IngestService(workers=2, record_events=False)
+    port = serve(service, start_workers=True)
+    packets = fleet_frame.head(200).to_dict("records")
+
+    for i in range(0, len(packets), 50):
+        assert _post(port, packets[i:i + 50])[0] == 202
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        stats = _get(port, "/stats")[1]
+        if stats["processed"] >= len(packets):
+            break
+        time.sleep(0.05)
+    assert stats["processed"] == len(packets) and stats["pending"] == 0
+    assert sum(shard["invalid"] for shard in stats["shards"]) == 0
+    assert _get(port, "/health") == (200, {"ok": True})
@@ -0,0 +1,77 @@
+import threading
+import time
+
+import pytest
+
+from src.ai_core.manual_index import ManualIndex, tokenize
+
+MANUAL = """[FAULT CODE: HPC-STALL-01]
+SYMPTOM: Abnormal rise in static pressure and exhaust gas temperature.
+ACTION: Borescope inspection of the HPC stage blades; check for surge.
+
+[FAULT CODE: FAN-IMB-02]
+SYMPTOM: High fan vibration at takeoff.
+ACTION: Inspect fan boxes and bearing wear.
+"""
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = tmp_path / "manual.txt"
+    path.write_text(MANUAL)
+    return ManualIndex([path])
+
+
+@pytest.mark.parametrize("plural, singular", [
+    ("pressures", "pressure"), ("temperatures", "temperature"), ("stages", "stage"),
+    ("surges", "surge"), ("stalls", "stall"), ("boxes", "box"), ("bearings", "bearing"),
+])
+def test_plural_and_singular_share_a_stem(plural, singular):
+    assert tokenize(plural) == tokenize(singular)
+
+
+@pytest.mark.parametrize("plural, singular", [
+    ("pressures", "pressure"), ("temperatures", "temperature"), ("stages", "stage"), ("surges", "surge"),
+])
+def test_plural_query_retrieves_singular_paragraph(index, plural, singular):
+    plural_hits = index.search(plural)
+    singular_hits = index.search(singular)
+    assert plural_hits, f"search({plural!r}) returned nothing"
+    assert [h.text for h in plural_hits] == [h.text for h in singular_hits]
+    assert "HPC-STALL-01" in plural_hits[0].text
+
+
+def _write_corpus(root, n_a: int):
+    # Her paragraf kendi dosya adını taşır; a.txt'nin boyu sürüme göre değişir (b.txt'nin indeksleri kayar)
+    for name, count in (("a.txt", n_a), ("b.txt", 3)):
+        (root / name).write_text("\n\n".join(f"pressure fault {i} from {name}" for i in range(count)))
+
+
+def test_search_during_rebuild_sees_one_consistent_build(tmp_path):
+    _write_corpus(tmp_path, 400)
+    index = ManualIndex([tmp_path])
+    stop = threading.Event()
+    errors = []
+
+    def rebuild():
+        n_a = 400
+        while not stop.is_set():
+            n_a = 1 if n_a == 400 else 400
+            _write_corpus(tmp_path, n_a)
+            index.refresh(force=True)
+
+    builder = threading.Thread(target=rebuild)
+    builder.start()
+    try:
+        deadline = time.monotonic() + 1.0
+        while time.monotonic() < deadline:
+            try:
+                for hit in index.search("pressure fault from", top_k=5):
+                    assert hit.text.endswith(f"from {hit.source}")
+            except Exception as e:  # IndexError veya karışık kaynak
+                errors.append(e)
+                break
+    finally:
+        stop.set()
+        builder.join()
+    assert not errors, errors[0]
@@ -0,0 +1,131 @@
+import numpy as np
+import pytest
+
+from src.stats_engine.metrics import PerformanceEvaluator, StreamingEvaluator, binary_metrics, roc_auc
+
+
+@pytest.fixture
+def sklearn_metrics():
+    return pytest.importorskip("sklearn.metrics")
+
+
+@pytest.mark.parametrize("levels", [None, 7])
+def test_roc_auc_matches_sklearn(sklearn_metrics, levels):
+    rng = np.random.default_rng(1)
+    y = rng.random(2000) < 0.2
+    score = rng.random(2000)
+    if levels:
+        score = np.round(score * levels) / levels  # bol tie: ortalama rank yolu
+    assert roc_auc(y, score) == pytest.approx(sklearn_metrics.roc_auc_score(y, score), abs=1e-12)
+
+
+def test_roc_auc_single_class_is_zero():
+    assert roc_auc(np.zeros(10), np.linspace(0, 1, 10)) == 0.0
+    assert roc_auc(np.ones(10), np.linspace(0, 1, 10)) == 0.0
+
+
+def test_binary_metrics_match_sklearn(sklearn_metrics):
+    rng = np.random.default_rng(2)
+    y, pred = rng.random(500) < 0.3, rng.random(500) < 0.4
+    m = binary_metrics(y, pred)
+    assert m["recall"] == pytest.approx(sklearn_metrics.recall_score(y, pred, zero_division=0))
+    assert m["precision"] == pytest.approx(sklearn_metrics.precision_score(y, pred, zero_division=0))
+    assert m["f1"] == pytest.approx(sklearn_metrics.f1_score(y, pred, zero_division=0))
+    assert m["accuracy"] == pytest.approx(sklearn_metrics.accuracy_score(y, pred))
+
+
+def test_backtest_fleet_auc_matches_sklearn_on_failure_window(sklearn_metrics):
+    # İki unit, karışık sırada; truth = fail_cycle - fail_window sonrası
+    units = np.r_[np.full(40, 1), np.full(30, 2)]
+    cycles = np.r_[np.arange(1, 41), np.arange(1, 31)]
+    rng = np.random.default_rng(3)
+    prob = rng.random(len(units))
+    shuffle = rng.permutation(len(units))
+
+    fleet = PerformanceEvaluator(fail_window=10).backtest(
+        units[shuffle], cycles[shuffle], prob[shuffle] > 0.5, prob[shuffle])["fleet"]
+
+    truth = cycles >= np.where(units == 1, 40, 30) - 10
+    assert fleet["auc"] == pytest.approx(sklearn_metrics.roc_auc_score(truth, prob), abs=1e-12)
+
+
+def _alarm_stream(fleet_frame, fail_window: int = 30, seed: int = 4):
+    """(unit, cycle, truth, pred, prob) rows, cycle-interleaved; noisy score rising towards failure."""
+    rng = np.random.default_rng(seed)
+    units = fleet_frame["unit_number"].to_numpy()
+    cycles = fleet_frame["cycle"].to_numpy()
+    fail = fleet_frame.groupby("unit_number")["cycle"].transform("max").to_numpy()
+    prob = np.clip(cycles / fail + rng.normal(0, 0.15, len(cycles)) - 0.25, 0, 1)
+    truth = cycles >= fail - fail_window
+    pred = prob > 0.5  # gürültü: birden çok alarm olayı, erken olanlar false alarm
+    return units, cycles, truth, pred, prob, dict(zip(units, fail))
+
+
+def test_streaming_matches_performance_evaluator_single_engine(fleet_frame):
+    units, cycles, truth, pred, prob, fail = _alarm_stream(fleet_frame)
+    one = units == 1
+    exact, stream = PerformanceEvaluator(fail_window=30), StreamingEvaluator(fail_window=30)
+    exact.set_fail_cycle(fail[1])
+    stream.set_fail_cycle(fail[1])
+    for gt, p, score, c in zip(truth[one], pred[one], prob[one], cycles[one]):
+        exact.add_record(gt, p, score, c)
+        stream.add_record(gt, p, score, c)
+
+    snap = stream.snapshot()
+    expected = binary_metrics(exact.y_true, exact.y_pred)
+    for key in ("recall", "precision", "f1", "accuracy", "tp", "fp", "fn", "tn"):
+        assert snap[key] == pytest.approx(expected[key]), key
+    assert snap["first_warning_cycle"] == exact.first_warning_cycle
+    assert snap["lead_time"] == exact.calculate_lead_time()
+    assert snap["false_alarm_count"] == exact.false_alarm_count > 0
+    assert snap["false_alarm_rate_per_100"] == pytest.approx(exact.calculate_false_alarm_rate_per_100())
+
+
+def test_streaming_per_unit_state_matches_one_evaluator_per_unit(fleet_frame):
+    units, cycles, truth, pred, prob, fail = _alarm_stream(fleet_frame)
+    stream = StreamingEvaluator(fail_window=30)
+    exact = {}
+    for u in np.unique(units):
+        exact[u] = PerformanceEvaluator(fail_window=30)
+        exact[u].set_fail_cycle(fail[u])
+        stream.set_fail_cycle(fail[u], unit=u)
+    for u, gt, p, score, c in zip(units, truth, pred, prob, cycles):  # motorlar karışık sırada
+        exact[u].add_record(gt, p, score, c)
+        stream.add_record(gt, p, score, c, unit=u)
+
+    per_unit = stream.snapshot(per_unit=True)["per_unit"]
+    for u, ev in exact.items():
+        assert per_unit[u]["first_warning_cycle"] == ev.first_warning_cycle
+        assert per_unit[u]["lead_time"] == ev.calculate_lead_time()
+        assert per_unit[u]["false_alarm_count"] == ev.false_alarm_count
+        assert per_unit[u]["total_triggers"] == ev.total_triggers
+    assert stream.snapshot()["tp"] == int(np.count_nonzero(truth & pred))
+
+
+@pytest.mark.parametrize("bins", [10, 100, 1000])
+def test_approximate_auc_is_within_bin_tolerance_of_exact(fleet_frame, bins):
+    _, _, truth, pred, prob, _ = _alarm_stream(fleet_frame)
+    stream = StreamingEvaluator(bins=bins)
+    for gt, p, score in zip(truth, pred, prob):
+        stream.add_record(gt, p, score)
+
+    # Sadece aynı bindeki (pozitif, negatif) çiftler yarım puan alır: hata en fazla onların yarısı
+    neg, pos = np.asarray(stream._hist[0], dtype=float), np.asarray(stream._hist[1], dtype=float)
+    tolerance = 0.5 * (pos * neg).sum() / (pos.sum() * neg.sum())
+    assert abs(stream.approximate_auc() - roc_auc(truth, prob)) <= tolerance + 1e-12
+    if bins == 1000:
+        assert tolerance < 0.01
+
+
+def test_streaming_skips_nonfinite_scores():
+    stream, finite_only = StreamingEvaluator(), StreamingEvaluator()
+    records = [(1, 1, 0.9), (0, 0, 0.1), (1, 1, float("nan")), (0, 1, float("inf")), (0, 0, -np.inf), (1, 0, 0.4)]
+    for gt, p, score in records:
+        stream.add_record(gt, p, score)
+        if np.isfinite(score):
+            finite_only.add_record(gt, p, score)
+
+    snap = stream.snapshot()
+    assert snap["nonfinite_scores"] == 3
+    assert snap["steps"] == len(records)  # karar sayaçları yine işlenir
+    assert snap["auc"] == finite_only.snapshot()["auc"]
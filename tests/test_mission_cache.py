@@ -0,0 +1,123 @@
+import time
+
+import pytest
+
+import src.ai_core.mission_cache as mission_cache
+from src.ai_core.dispatch import default_crew_factory
+from src.ai_core.mission_cache import CachedJetEngineCrew, MissionCache, fingerprint_key, mission_fingerprint
+from src.ai_core.stub import StubJetEngineCrew
+
+SENSORS = ["sensor_measurement11", "sensor_measurement4"]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = MissionCache(tmp_path / "missions.sqlite")
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def crew(cache):
+    return CachedJetEngineCrew(StubJetEngineCrew(latency=0.0), cache)
+
+
+def _key(sensors, loss, rul) -> str:
+    return fingerprint_key(mission_fingerprint(sensors, loss, rul))
+
+
+def test_repeated_incident_is_answered_from_cache(crew, cache):
+    first = crew.run_mission({"cycle": 120}, 0.9, deviating_sensors=SENSORS, predicted_rul=42.0)
+    second = crew.run_mission({"cycle": 121}, 0.9, deviating_sensors=SENSORS, predicted_rul=42.0)
+
+    assert second == first and crew.crew.calls == 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["stores"], stats["entries"]) == (1, 1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_fingerprint_ignores_sensor_order_and_buckets_loss_and_rul():
+    base = _key(SENSORS, 0.90, 41.0)
+    assert _key(SENSORS[::-1] + SENSORS, 0.95, 49.0) == base  # sıra/tekrar, aynı log2 ve RUL bucket'ı
+    assert _key(SENSORS, 1.9, 41.0) != base                    # yaklaşık bir oktav yukarı
+    assert _key(SENSORS, 0.90, 51.0) != base                   # bir sonraki RUL bucket'ı
+    assert _key(SENSORS[:1], 0.90, 41.0) != base
+
+
+def test_calls_without_sensors_bypass_the_cache(crew, cache):
+    crew.run_mission({"cycle": 1}, 0.9)
+    crew.run_mission({"cycle": 1}, 0.9)
+    assert crew.crew.calls == 2 and crew.bypassed == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_expired_entry_is_a_miss(tmp_path):
+    cache = MissionCache(tmp_path / "missions.sqlite", ttl=0.05)
+    try:
+        cache.put("k", "report", {})
+        assert cache.get("k") == "report"
+        time.sleep(0.1)
+        assert cache.get("k") is None
+        stats = cache.stats()
+        assert stats["expired"] == 1 and stats["entries"] == 0
+    finally:
+        cache.close()
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = MissionCache(tmp_path / "missions.sqlite", max_entries=2)
+    try:
+        cache.put("a", "A", {})
+        time.sleep(0.01)
+        cache.put("b", "B", {})
+        time.sleep(0.01)
+        assert cache.get("a") == "A"  # a yeniden kullanıldı: en eski erişim artık b
+        time.sleep(0.01)
+        cache.put("c", "C", {})
+
+        assert cache.get("b") is None
+        assert cache.get("a") == "A" and cache.get("c") == "C"
+        assert cache.stats()["evictions"] == 1
+    finally:
+        cache.close()
+
+
+class _CrewOutput:
+    """Stands in for crewai's CrewOutput (not a str, renders via __str__)."""
+
+    def __init__(self, text):
+        self.text = text
+
+    def __str__(self):
+        return self.text
+
+
+class _ObjectCrew:
+    def run_mission(self, sensor_data, loss_score, deviating_sensors=None, predicted_rul=None):
+        return _CrewOutput(f"report {loss_score}")
+
+
+def test_miss_hit_and_bypass_all_return_str(cache):
+    crew = CachedJetEngineCrew(_ObjectCrew(), cache)
+    miss = crew.run_mission({}, 0.9, deviating_sensors=SENSORS, predicted_rul=42.0)
+    hit = crew.run_mission({}, 0.9, deviating_sensors=SENSORS, predicted_rul=42.0)
+    bypass = crew.run_mission({}, 0.9)
+    assert miss == hit == bypass == "report 0.9"
+    assert all(type(r) is str for r in (miss, hit, bypass))
+
+
+@pytest.mark.parametrize("setting, cached", [("on", True), ("off", False), ("0", False), ("false", False)])
+def test_cache_opt_out(monkeypatch, cache, setting, cached):
+    monkeypatch.setenv("JETGUARD_CREW_BACKEND", "stub")
+    monkeypatch.setenv("JETGUARD_STUB_LATENCY", "0")
+    monkeypatch.setenv("JETGUARD_CREW_CACHE", setting)
+    monkeypatch.setattr(mission_cache, "_shared_cache", cache)  # süreç cache'i tmp dosyada
+
+    crew = default_crew_factory()
+    for _ in range(2):
+        crew.run_mission({}, 0.9, deviating_sensors=SENSORS, predicted_rul=42.0)
+
+    assert isinstance(crew, CachedJetEngineCrew) == cached
+    stub = crew.crew if cached else crew
+    assert stub.calls == (1 if cached else 2)
+    assert cache.stats()["entries"] == (1 if cached else 0)
@@ -0,0 +1,70 @@
+import logging
+
+import numpy as np
+import pytest
+
+from src.orchestrator.manager import Orchestrator
+from src.stats_engine.guard import REASON_MISSING_CYCLE
+
+
+@pytest.fixture
+def orchestrator():
+    return Orchestrator(record_events=False)
+
+
+def test_invalid_packets_are_logged_as_rate_limited_summaries(orchestrator, caplog):
+    orchestrator.data_guard.reporter.interval = 3600.0
+    bad = {"unit_number": 1, "sensor_measurement2": 640.0}  # cycle yok
+    with caplog.at_level(logging.WARNING):
+        results = [orchestrator.diagnose(bad) for _ in range(50)]
+
+    assert all(r["status"] == "INVALID DATA" for r in results)
+    assert orchestrator.data_guard.reporter.totals[REASON_MISSING_CYCLE] == 50
+    # Paket başına log yok: ilk red hemen özetlenir, kalanlar bir sonraki aralığa kadar birikir
+    warnings = [r.getMessage() for r in caplog.records if r.levelno >= logging.WARNING]
+    assert len(warnings) == 1 and "rejected [MISSING_CYCLE]" in warnings[0]
+
+
+def _sweep(guard, i: int) -> tuple:
+    """In-envelope values and out-of-envelope (but physically possible) values of sensor i."""
+    lo, hi = guard.envelope_lower[i], guard.envelope_upper[i]
+    hard_lo, hard_hi = guard.lower[i], guard.upper[i]
+    inside = np.linspace(lo, hi, 5)
+    outside = np.r_[hi + np.array([0.01, 0.3, 0.9]) * (hard_hi - hi),
+                    lo - np.array([0.01, 0.3, 0.9]) * (lo - hard_lo)]
+    return inside, outside
+
+
+@pytest.mark.parametrize("stage", ["healthy", "failing"])
+def test_out_of_envelope_reading_is_never_less_severe(orchestrator, fleet_frame, stage):
+    unit1 = fleet_frame[fleet_frame["unit_number"] == 1]
+    base = (unit1.iloc[10] if stage == "healthy" else unit1.iloc[-1]).to_dict()
+    guard = orchestrator.data_guard
+
+    for i, sensor in enumerate(guard.required_sensors):
+        inside, outside = _sweep(guard, i)
+        values = np.r_[inside, outside]
+        # Her değer ayrı unit: EWMA geçmişi paylaşılmaz
+        packets = [dict(base, unit_number=k + 1, **{sensor: v}) for k, v in enumerate(values)]
+        result = orchestrator.diagnose_fleet(packets)
+
+        assert (result["status"] != "INVALID DATA").all(), sensor
+        prio_in = result["priority"].to_numpy()[:len(inside)]
+        prio_out = result["priority"].to_numpy()[len(inside):]
+        assert prio_out.min() >= max(prio_in.max(), 3), sensor
+
+
+def test_out_of_envelope_single_packet_path_matches_fleet(fleet_frame):
+    last = fleet_frame[fleet_frame["unit_number"] == 1].iloc[-1].to_dict()
+    for value in (49.5, 50.9, 52.0):
+        packet = dict(last, sensor_measurement11=value)
+        single = Orchestrator(record_events=False).diagnose(packet)
+        fleet = Orchestrator(record_events=False).diagnose_fleet([packet]).iloc[0]
+        assert single["priority"] == fleet["priority"] == 4
+
+
+def test_physically_impossible_reading_is_still_rejected(orchestrator, fleet_frame):
+    packet = fleet_frame.iloc[0].to_dict()
+    i = orchestrator.data_guard.required_sensors.index("sensor_measurement11")
+    for value in (0.0, -1.0, 2 * orchestrator.data_guard.upper[i]):
+        assert orchestrator.diagnose(dict(packet, sensor_measurement11=value))["status"] == "INVALID DATA"
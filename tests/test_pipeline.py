@@ -0,0 +1,36 @@
+import threading
+
+import numpy as np
+
+from src.orchestrator.manager import Orchestrator
+from src.orchestrator.pipeline import TelemetryPipeline
+
+
+def test_pipeline_validates_once_and_runs_threaded_sinks_off_loop(fleet_frame, monkeypatch):
+    packets = fleet_frame.to_dict("records")[:200]
+    packets[10] = {**packets[10], "cycle": None}
+    packets[20] = {**packets[20], "unit_number": -3}
+    valid = [p for i, p in enumerate(packets) if i not in (10, 20)]
+    expected = Orchestrator(record_events=False).diagnose_fleet(valid)
+
+    orchestrator = Orchestrator(record_events=False)
+
+    def no_revalidation(*args, **kwargs):
+        raise AssertionError("validate_batch called for packets that passed the validate stage")
+    monkeypatch.setattr(orchestrator.data_guard, "validate_batch", no_revalidation)
+
+    seen, threads, initialized = [], set(), []
+
+    def ui(items):
+        threads.add(threading.current_thread().name)
+        seen.extend(items)
+
+    pipeline = TelemetryPipeline(orchestrator, max_batch=16)
+    pipeline.add_sink("ui", ui, policy="coalesce", threaded=True,
+                      initializer=lambda: initialized.append(threading.current_thread().name))
+    pipeline.run_blocking(packets)
+
+    assert pipeline.stats()["validate"]["dropped"] == 2
+    assert [item["packet"] for item in seen] == valid
+    np.testing.assert_allclose([item["decision"]["risk_score"] for item in seen], expected["risk_score"])
+    assert threads == set(initialized) and threading.main_thread().name not in threads
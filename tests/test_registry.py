@@ -0,0 +1,128 @@
+import logging
+import os
+
+import pytest
+
+from config.paths import WATCHDOG_FLAT_PATH
+from src.stats_engine.guard import StatsGuard
+from src.stats_engine.registry import ModelRegistry, _load_joblib, _load_watchdog
+from src.stats_engine.watchdog import FlatWatchdog
+
+if not WATCHDOG_FLAT_PATH.exists():
+    pytest.skip("watchdog_flat.json not exported", allow_module_level=True)
+
+
+@pytest.fixture
+def flat_path(tmp_path):
+    path = tmp_path / "watchdog_flat.json"
+    FlatWatchdog.load(WATCHDOG_FLAT_PATH, mmap=False).save(path)
+    return path
+
+
+def _retrain(path, threshold, age_s=10.0):
+    """Re-exports with a new threshold; mtime is pushed back so settle_time is already over."""
+    model = FlatWatchdog.load(path, mmap=False)
+    model.threshold = threshold
+    model.save(path)
+    stamp = path.stat().st_mtime_ns - int(age_s * 1e9)
+    os.utime(path, ns=(stamp, stamp))
+
+
+def _retrain_from(model, path, threshold):
+    model = FlatWatchdog(model.scale, model.scaler_min, model.mean, model.components, threshold, model.features)
+    model.save(path)
+
+
+def _registry(path, settle_time=0.0):
+    return ModelRegistry({"watchdog_flat": (path, _load_watchdog)}, check_interval=0.0, settle_time=settle_time)
+
+
+def test_check_reloads_changed_file_and_guard_rebinds(flat_path):
+    registry = _registry(flat_path)
+    guard = StatsGuard(registry=registry)
+    assert guard.ready
+    generation, fingerprint, old = registry.generation, registry.fingerprint(), guard.threshold
+
+    assert registry.check() == generation  # değişiklik yok: yeniden yükleme yok
+    _retrain(flat_path, old * 2)
+
+    assert registry.check() == generation + 1
+    assert registry.fingerprint() != fingerprint
+    assert guard.threshold == old  # bağlı model, load_models çağrılana kadar eski
+    assert guard.load_models() and guard.threshold == pytest.approx(old * 2)
+
+
+def test_reload_waits_for_settle_time(flat_path):
+    registry = _registry(flat_path, settle_time=3600.0)
+    old = registry.get("watchdog_flat").threshold
+    generation = registry.generation
+
+    _retrain(flat_path, old * 2)
+    assert registry.check() == generation  # dosya hâlâ "yeni": yarım yazım riski
+    registry.settle_time = 0.0
+    assert registry.check() == generation + 1
+    assert registry.get("watchdog_flat").threshold == pytest.approx(old * 2)
+
+
+def test_failed_reload_keeps_serving_previous_model(flat_path, caplog):
+    registry = _registry(flat_path)
+    model = registry.get("watchdog_flat")
+    generation = registry.generation
+
+    flat_path.write_text("{ broken")
+    os.utime(flat_path, ns=(0, 0))
+    with caplog.at_level(logging.ERROR):
+        assert registry.check() == generation
+        assert registry.check() == generation
+    assert registry.get("watchdog_flat") is model
+    # Aynı bozuk dosya her kontrolde tekrar denenmez: tek hata logu
+    assert sum("yüklenemedi" in r.getMessage() for r in caplog.records) == 1
+
+
+def test_check_picks_up_artifact_missing_at_startup(tmp_path):
+    path = tmp_path / "watchdog_flat.json"
+    registry = _registry(path)
+    assert registry.get("watchdog_flat") is None and registry.generation == 0
+
+    # Yeniden eğitim: dosya servis çalışırken ilk kez oluşur (restart yok)
+    FlatWatchdog.load(WATCHDOG_FLAT_PATH, mmap=False).save(path)
+    assert registry.check() == 1
+    assert registry.peek("watchdog_flat") is not None
+
+
+def test_new_flat_export_is_preferred_over_pickles(tmp_path):
+    pytest.importorskip("sklearn")
+    from config.paths import SCALER_PATH, WATCHDOG_MODEL_PATH
+    flat_path = tmp_path / "watchdog_flat.json"
+    registry = ModelRegistry({"watchdog_flat": (flat_path, _load_watchdog),
+                              "scaler": (SCALER_PATH, _load_joblib),
+                              "watchdog": (WATCHDOG_MODEL_PATH, _load_joblib)},
+                             check_interval=0.0, settle_time=0.0)
+    guard = StatsGuard(registry=registry)
+    derived = guard.model
+    assert guard.ready and registry.peek("watchdog_flat") is None
+
+    _retrain_from(derived, flat_path, derived.threshold * 2)
+    generation = registry.generation
+    assert registry.check() == generation + 1
+    assert guard.load_models() and guard.model is registry.peek("watchdog_flat")
+    assert guard.threshold == pytest.approx(derived.threshold * 2)
+
+
+def test_watchdog_from_pickles_is_shared_frozen_and_rebuilt_on_reload(tmp_path):
+    pytest.importorskip("sklearn")
+    from config.paths import SCALER_PATH, WATCHDOG_MODEL_PATH
+    scaler_path = tmp_path / "scaler.pkl"
+    scaler_path.write_bytes(SCALER_PATH.read_bytes())
+    registry = ModelRegistry({"watchdog_flat": (tmp_path / "missing.json", _load_watchdog),
+                              "scaler": (scaler_path, _load_joblib),
+                              "watchdog": (WATCHDOG_MODEL_PATH, _load_joblib)},
+                             check_interval=0.0, settle_time=0.0)
+    model = registry.watchdog()
+    assert registry.watchdog() is model
+    assert not model.proj_A.flags.writeable
+
+    os.utime(scaler_path, ns=(0, 0))  # aynı içerik, yeni damga: scaler yeniden yüklenir
+    registry.check()
+    rebuilt = registry.watchdog()
+    assert rebuilt is not model and registry.watchdog() is rebuilt
@@ -0,0 +1,22 @@
+import joblib
+import numpy as np
+
+import models.training.train_stats as train_stats
+from src.stats_engine.watchdog import FlatWatchdog
+
+
+def test_train_watchdog_writes_pickles_and_flat_artifact(tmp_path, monkeypatch):
+    # Çıktılar tmp'ye: repo içindeki modeller değişmez
+    monkeypatch.setattr(train_stats, "SCALER_PATH", tmp_path / "scaler.pkl")
+    monkeypatch.setattr(train_stats, "WATCHDOG_MODEL_PATH", tmp_path / "watchdog_model.pkl")
+    monkeypatch.setattr(train_stats, "WATCHDOG_FLAT_PATH", tmp_path / "watchdog_flat.json")
+
+    train_stats.train_watchdog()
+
+    scaler = joblib.load(tmp_path / "scaler.pkl")
+    packet = joblib.load(tmp_path / "watchdog_model.pkl")
+    flat = FlatWatchdog.load(tmp_path / "watchdog_flat.json")
+    assert flat.features == list(packet["selected_features"])
+    assert flat.threshold == packet["threshold"]
+    np.testing.assert_allclose(flat.scale, scaler.scale_)
+    np.testing.assert_allclose(flat.components, packet["pca"].components_)